@@ -0,0 +1,137 @@
+"""
+End-to-end browser benchmarks against local fixture pages.
+
+Measures cold launch, `goto` until load, the `execute_script` round trip, batched
+extraction, screenshot throughput and multi-tab / multi-browser scaling, then writes
+the results as JSON. With `--compare` the run is checked against a saved baseline and
+the exit code is 1 when any result regressed by more than `--threshold`:
+
+    python -m benchmarks.bench_browser --output baseline.json
+    python -m benchmarks.bench_browser --output current.json --compare baseline.json
+"""
+import argparse
+import sys
+import threading
+import time
+
+from navium import Browser
+from . import results
+from .fixtures import FixtureServer
+
+def timed(function) -> float:
+    started = time.perf_counter()
+    function()
+    return (time.perf_counter() - started) * 1000
+
+def bench_launch(browser_kwargs: dict, repeat: int) -> dict:
+    samples = {"launch": [], "launch_attach": [], "close": []}
+    for _ in range(repeat):
+        browser = Browser(**browser_kwargs)
+        samples["launch"].append(timed(browser.start))
+        samples["launch_attach"].append(browser.startup_timings["attached"] * 1000)
+        samples["close"].append(timed(browser.close))
+    return samples
+
+def bench_page(browser: Browser, server: FixtureServer, repeat: int) -> dict:
+    samples = {}
+    for path in ("/static", "/js-heavy", "/many-elements", "/large-dom"):
+        samples[f"goto_load{path.replace('/', '_').replace('-', '_')}"] = [
+            timed(lambda: browser.goto(server.url(path))) for _ in range(repeat)
+        ]
+
+    page = browser.goto(server.url("/many-elements"))
+    samples["execute_script_round_trip"] = [timed(lambda: page.execute_script("1 + 1")) for _ in range(repeat * 20)]
+    samples["query_all_5000_rows"] = [
+        timed(lambda: page.query_all("li.item", ["textContent", "@data-id"])) for _ in range(repeat)
+    ]
+    samples["batch_20_reads"] = [
+        timed(lambda: page.batch().count("li").text("h1, li").attribute("a", "href").text("span.price").run())
+        for _ in range(repeat * 5)
+    ]
+    samples["get_text_20_reads"] = [
+        timed(lambda: [page.get_text("li") for _ in range(20)]) for _ in range(repeat)
+    ]
+
+    page = browser.goto(server.url("/static"))
+    for format in ("png", "jpeg"):
+        started = time.perf_counter()
+        count = repeat * 5
+        for _ in range(count):
+            page.screenshot(format=format)
+        samples[f"screenshot_{format}_per_sec"] = [count / (time.perf_counter() - started)]
+    return samples
+
+def run_parallel(functions: list) -> float:
+    threads = [threading.Thread(target=function) for function in functions]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+def bench_scaling(browser_kwargs: dict, server: FixtureServer, repeat: int, tabs: list, browsers: list) -> dict:
+    samples = {}
+    url = server.url("/js-heavy")
+
+    with Browser(**browser_kwargs) as browser:
+        for count in tabs:
+            pages = [browser.new_page() for _ in range(count)]
+            work = [lambda page=page: [page.goto(url) for _ in range(repeat)] for page in pages]
+            samples[f"tabs_{count}_pages_per_sec"] = [count * repeat / run_parallel(work)]
+            for page in pages:
+                page.close()
+
+    for count in browsers:
+        instances = [Browser(**browser_kwargs) for _ in range(count)]
+        run_parallel([instance.start for instance in instances])
+        try:
+            work = [lambda instance=instance: [instance.goto(url) for _ in range(repeat)] for instance in instances]
+            samples[f"browsers_{count}_pages_per_sec"] = [count * repeat / run_parallel(work)]
+        finally:
+            for instance in instances:
+                instance.close()
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description="Navium browser benchmarks")
+    parser.add_argument("--output", default="benchmark.json", help="Where to write the JSON results.")
+    parser.add_argument("--compare", help="A baseline JSON to check the results against.")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed slowdown before flagging, as a fraction.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tabs", type=int, nargs="*", default=[1, 4, 8])
+    parser.add_argument("--browsers", type=int, nargs="*", default=[1, 2, 4])
+    parser.add_argument("--executable-path", help="The Chromium binary to benchmark.")
+    parser.add_argument("--transport", default="websocket", choices=("websocket", "pipe"))
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--only", nargs="*", choices=("launch", "page", "scaling"), default=("launch", "page", "scaling"))
+    args = parser.parse_args()
+
+    browser_kwargs = {"headless": not args.headed, "transport": args.transport}
+    if args.executable_path:
+        browser_kwargs["executable_path"] = args.executable_path
+
+    samples = {}
+    with FixtureServer() as server:
+        if "launch" in args.only:
+            samples.update(bench_launch(browser_kwargs, args.repeat))
+        if "page" in args.only:
+            with Browser(**browser_kwargs) as browser:
+                samples.update(bench_page(browser, server, args.repeat))
+        if "scaling" in args.only:
+            samples.update(bench_scaling(browser_kwargs, server, args.repeat, args.tabs, args.browsers))
+
+    document = results.save(args.output, samples, {"transport": args.transport, "repeat": args.repeat})
+    baseline = results.load(args.compare) if args.compare else None
+    results.report(document, baseline)
+    print(f"\nResults written to {args.output}")
+
+    if baseline is not None:
+        regressions = results.compare(baseline, document, args.threshold)
+        for name, before, after, change in regressions:
+            print(f"REGRESSION {name}: {before:.2f} -> {after:.2f} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
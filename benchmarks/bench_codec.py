@@ -0,0 +1,84 @@
+"""
+Compares the JSON codecs on DevTools Protocol payloads.
+
+Runs on synthetic payloads shaped like real traffic (screenshot results, large
+evaluate results, event floods), or on a recording made with the session recorder,
+one message per line:
+
+    python -m benchmarks.bench_codec [--recording session.jsonl] [--repeat 20]
+"""
+import argparse
+import base64
+import json
+import os
+import time
+
+from scripts.codec import CODECS, peek_method
+
+def synthetic_payloads() -> dict:
+    screenshot = json.dumps({
+        "id": 1,
+        "result": {"data": base64.b64encode(os.urandom(3 * 1024 * 1024)).decode()},
+        "sessionId": "A" * 32
+    })
+    evaluate = json.dumps({
+        "id": 2,
+        "result": {"result": {"type": "object", "value": [
+            {"title": f"Item {i}", "href": f"https://example.com/items/{i}", "price": i * 1.5, "tags": ["a", "b"]}
+            for i in range(20000)
+        ]}},
+        "sessionId": "A" * 32
+    })
+    events = [json.dumps({
+        "method": "Network.dataReceived",
+        "params": {"requestId": str(i), "timestamp": 1000.0 + i, "dataLength": 1024, "encodedDataLength": 512},
+        "sessionId": "A" * 32
+    }) for i in range(5000)]
+    return {"screenshot": [screenshot], "evaluate": [evaluate], "events": events}
+
+def recorded_payloads(path: str) -> dict:
+    messages = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            messages.append(entry["message"] if "direction" in entry else line.rstrip("\n"))
+    return {"recording": messages}
+
+def measure(function, messages: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for message in messages:
+            function(message)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Navium codec benchmark")
+    parser.add_argument("--recording", help="A recorded session, one message per line.")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    payloads = recorded_payloads(args.recording) if args.recording else synthetic_payloads()
+    codecs = {}
+    for name, codec in CODECS.items():
+        try:
+            codecs[name] = codec()
+        except ImportError:
+            print(f"{name}: not installed")
+
+    for payload, messages in payloads.items():
+        size = sum(len(message) for message in messages) / 1024 / 1024
+        print(f"\n{payload} ({len(messages)} messages, {size:.1f} MiB)")
+        for name, codec in codecs.items():
+            decoded = [codec.loads(message) for message in messages]
+            loads = measure(codec.loads, messages, args.repeat)
+            dumps = measure(codec.dumps, decoded, args.repeat)
+            print(f"  {name:<8} loads {loads * 1000:9.2f} ms  dumps {dumps * 1000:9.2f} ms")
+        peek = measure(peek_method, messages, args.repeat)
+        print(f"  {'peek':<8} {peek * 1000:9.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Measures the `Runtime`'s own overhead against a `FakeCDPServer`, with no browser.
+
+Covers the sequential command round trip, pipelined commands from several threads,
+and event storms delivered at a fixed rate and as fast as possible. Results are
+written and compared like `bench_browser`:
+
+    python -m benchmarks.bench_runtime --output runtime.json [--compare baseline.json]
+    python -m benchmarks.bench_runtime --replay session.jsonl
+"""
+import argparse
+import sys
+import threading
+import time
+
+from navium.testing import FakeCDPServer, ReplayTransport
+from scripts.page import Page
+from scripts.runtime import Runtime
+from . import results
+
+def bench_commands(runtime: Runtime, count: int, threads: int) -> dict:
+    command = {"method": "Runtime.evaluate", "params": {"expression": "1 + 1", "returnByValue": True}}
+    samples = {}
+
+    started = time.perf_counter()
+    for _ in range(count):
+        runtime.execute_command(command)
+    samples["sequential_commands_per_sec"] = [count / (time.perf_counter() - started)]
+
+    def work():
+        for _ in range(count // threads):
+            runtime.execute_command(command)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    samples[f"threads_{threads}_commands_per_sec"] = [count // threads * threads / (time.perf_counter() - started)]
+
+    futures = []
+    started = time.perf_counter()
+    for _ in range(count):
+        futures.append(runtime.main.send_command(command))
+    for future in futures:
+        future.result(timeout=30)
+    samples["pipelined_commands_per_sec"] = [count / (time.perf_counter() - started)]
+    return samples
+
+def bench_events(server: FakeCDPServer, runtime: Runtime, count: int, rate: float) -> dict:
+    samples = {}
+    for name, flood_rate in ((f"events_at_{int(rate)}_per_sec", rate), ("events_max_per_sec", None)):
+        received = []
+        done = threading.Event()
+
+        def on_event(params, received=received, done=done):
+            received.append(params["seq"])
+            if params["seq"] == count - 1:
+                done.set()
+
+        subscription = runtime.on("Network.dataReceived", on_event)
+        started = time.perf_counter()
+        server.flood("Network.dataReceived", count, {"dataLength": 1024}, rate=flood_rate)
+        done.wait(timeout=60)
+        samples[name] = [len(received) / (time.perf_counter() - started)]
+        samples[f"{name.replace('_per_sec', '')}_lost"] = [count - len(received)]
+        runtime.off(subscription)
+    return samples
+
+def bench_replay(path: str, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        runtime = Runtime(transport=ReplayTransport(path))
+        runtime.attach_ready.wait(timeout=10)
+        samples.append((time.perf_counter() - started) * 1000)
+        runtime.ws.close()
+    return {"replay_attach": samples}
+
+def main():
+    parser = argparse.ArgumentParser(description="Navium runtime benchmarks, against a fake browser")
+    parser.add_argument("--output", default="runtime.json")
+    parser.add_argument("--compare", help="A baseline JSON to check the results against.")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--commands", type=int, default=10000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--rate", type=float, default=10000, help="Events per second of the paced storm.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the fake browser delays every message by.")
+    parser.add_argument("--replay", help="Also replays a recorded session.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = {}
+    with FakeCDPServer(
+        responses={"Runtime.evaluate": {"result": {"type": "number", "value": 2}}},
+        latency=args.latency
+    ) as server:
+        runtime = Runtime(server.ws_url)
+        try:
+            runtime.attach_ready.wait(timeout=10)
+            Page(runtime, None).goto("http://fixture/")
+            samples.update(bench_commands(runtime, args.commands, args.threads))
+            samples.update(bench_events(server, runtime, args.events, args.rate))
+        finally:
+            runtime.ws.close()
+
+    if args.replay:
+        samples.update(bench_replay(args.replay, args.repeat))
+
+    document = results.save(args.output, samples, {"latency": args.latency})
+    baseline = results.load(args.compare) if args.compare else None
+    results.report(document, baseline)
+    print(f"\nResults written to {args.output}")
+
+    if baseline is not None:
+        regressions = results.compare(baseline, document, args.threshold)
+        for name, before, after, change in regressions:
+            print(f"REGRESSION {name}: {before:.2f} -> {after:.2f} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Deterministic fixture pages served from a local HTTP server, so the benchmarks never
+touch the network and every run loads byte-identical pages.
+"""
+import http.server
+import threading
+
+def static_page() -> str:
+    return "<!doctype html><html><head><title>static</title></head><body><h1>Static</h1>" + \
+        "".join(f"<p>Paragraph {i}</p>" for i in range(50)) + "</body></html>"
+
+def js_heavy_page() -> str:
+    return """<!doctype html><html><head><title>js-heavy</title></head><body><div id="app"></div>
+<script>
+let x = 0;
+for (let i = 0; i < 2000000; i++) { x = (x + i * 31) % 1000003; }
+const app = document.getElementById("app");
+for (let i = 0; i < 500; i++) {
+    const row = document.createElement("div");
+    row.className = "row";
+    row.textContent = "Row " + i + " " + x;
+    app.appendChild(row);
+}
+</script></body></html>"""
+
+def many_elements_page(count: int = 5000) -> str:
+    items = "".join(
+        f'<li class="item" data-id="{i}"><a href="/items/{i}">Item {i}</a> <span class="price">{i * 1.5:.2f}</span></li>'
+        for i in range(count)
+    )
+    return f"<!doctype html><html><head><title>many-elements</title></head><body><ul>{items}</ul></body></html>"
+
+def large_dom_page(depth: int = 12, breadth: int = 3) -> str:
+    def tree(level):
+        if level == depth:
+            return "<span>leaf</span>"
+        return "".join(f'<div class="d{level}">{tree(level + 1)}</div>' for _ in range(breadth if level > depth - 8 else 1))
+    return f"<!doctype html><html><head><title>large-dom</title></head><body>{tree(0)}</body></html>"
+
+PAGES = {
+    "/static": static_page,
+    "/js-heavy": js_heavy_page,
+    "/many-elements": many_elements_page,
+    "/large-dom": large_dom_page
+}
+
+class FixtureServer:
+    """
+    Serves `PAGES` on 127.0.0.1 from a background thread, on a free port.
+
+    Usage:
+        with FixtureServer() as server:
+            browser.goto(server.url("/static"))
+    """
+
+    def __init__(self) -> None:
+        pages = {path: build().encode() for path, build in PAGES.items()}
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = pages.get(self.path.split("?")[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
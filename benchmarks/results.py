@@ -0,0 +1,90 @@
+"""
+Benchmark results as JSON, and comparison against a saved baseline.
+
+Every result is a list of samples summarised by its median: durations in milliseconds,
+rates for names ending in `_per_sec` (higher is better) and counts for names ending in
+`_lost`, `_count` or `_errors` (lower is better, compared in absolute terms too).
+"""
+import json
+import platform
+import statistics
+import sys
+import time
+
+def summarise(samples: list) -> dict:
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "runs": len(samples)
+    }
+
+COUNT_SUFFIXES = ("_lost", "_count", "_errors")
+
+def kind(name: str) -> str:
+    """`rate`, `count` or `ms`, from the result's name."""
+    if name.endswith("_per_sec"):
+        return "rate"
+    if name.endswith(COUNT_SUFFIXES):
+        return "count"
+    return "ms"
+
+def higher_is_better(name: str) -> bool:
+    return kind(name) == "rate"
+
+def save(path: str, results: dict, extra: dict = None):
+    document = {
+        "meta": dict({
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform()
+        }, **(extra or {})),
+        "results": {name: summarise(samples) for name, samples in results.items()}
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    return document
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> list:
+    """
+    Returns `(name, baseline, current, change)` for every result that got worse than the
+    baseline's median by more than `threshold` (a fraction), in either direction of "worse".
+    Counts must also grow by at least one, and any growth from zero is a regression.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+
+        if kind(name) == "count":
+            increase = result["median"] - before["median"]
+            if increase >= 1 and (not before["median"] or increase / before["median"] > threshold):
+                change = increase / before["median"] if before["median"] else float("inf")
+                regressions.append((name, before["median"], result["median"], change))
+            continue
+
+        if not before["median"]:
+            continue
+        change = (result["median"] - before["median"]) / before["median"]
+        worse = -change if higher_is_better(name) else change
+        if worse > threshold:
+            regressions.append((name, before["median"], result["median"], change))
+    return regressions
+
+def report(document: dict, baseline: dict = None):
+    units = {"rate": "/s", "count": "  ", "ms": " ms"}
+    for name, result in document["results"].items():
+        line = f"  {name:<32} {result['median']:10.2f}{units[kind(name)]}  (min {result['min']:.2f}, {result['runs']} runs)"
+        if baseline is not None and name in baseline["results"]:
+            before = baseline["results"][name]["median"]
+            if kind(name) == "count":
+                line += f"  {result['median'] - before:+g} vs baseline"
+            elif before:
+                line += f"  {(result['median'] - before) / before:+.1%} vs baseline"
+        print(line)
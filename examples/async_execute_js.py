@@ -0,0 +1,15 @@
+import asyncio
+from navium import AsyncBrowser
+
+async def main():
+    async with AsyncBrowser(headless=True) as browser:
+        page = await browser.goto("https://hianime.to/home")
+        js = await page.execute_script(
+            expression="document.title",
+            returnValue=True,
+            awaitPromise=False
+        )
+
+        print(js)
+
+asyncio.run(main())
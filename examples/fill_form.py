@@ -1,12 +1,11 @@
-import time
 from navium import Browser
 
 with Browser() as browser:
     page = browser.goto("https://www.w3schools.com/html/html_forms.asp")
-    time.sleep(5)
+    page.wait_for_selector("#fname")
 
     page.fill_text("#fname", "hi")
     page.fill_text("#lname", "bye")
     page.click("#main > div:nth-child(7) > div > form > input[type=submit]:nth-child(10)")
 
-    time.sleep(10)
\ No newline at end of file
+    page.wait_for_function("() => location.pathname.includes('action_page')")
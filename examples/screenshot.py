@@ -1,10 +1,8 @@
-import time
 from navium import Browser
 
 with Browser() as browser:
-    page = browser.goto("https://discord.com/")
-
-    time.sleep(5)
+    page = browser.goto("https://discord.com/", wait_until="networkidle")
+    page.wait_for_selector("main")
 
     screenshot = page.take_screenshot()
-    screenshot.show()
\ No newline at end of file
+    screenshot.show()
@@ -0,0 +1,8 @@
+from navium import Browser
+
+with Browser(headless=True) as browser:
+    page = browser.goto("https://time.is/")
+
+    with page.watch({"time": "#clock", "date": "#dd"}) as watch:
+        for _ in range(5):
+            print(watch.get(timeout=10))
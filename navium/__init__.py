@@ -6,4 +6,10 @@ Designed for flexibility and ease of use, Navium allows developers to automate b
 While it focuses on low-level protocol commands and browser management, Navium provides the foundation for advanced automation scenarios, including testing, scraping, and custom browsing workflows.
 """
 
-from .browser import Browser
\ No newline at end of file
+from .browser import Browser
+from .async_browser import AsyncBrowser
+from .pool import BrowserPool
+from .parallel import ParallelMap, map
+from scripts.cache import ResponseCache
+from scripts.metrics import Instrumentation
+from scripts.profiles import ProfileTemplate
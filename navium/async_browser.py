@@ -0,0 +1,163 @@
+import asyncio
+import time
+
+from scripts.async_page import AsyncPage
+from scripts.async_runtime import AsyncRuntime
+from scripts.exceptions import PIDNotFound, LaunchError, CloseError
+from scripts.process import remove_profile
+from scripts.profiles import ProfileTemplate
+from .browser import Browser, poll_interval
+
+class AsyncBrowser(Browser):
+    """
+        asyncio counterpart of `Browser`.
+
+        Launches the same isolated Chromium instance, but talks to it from the
+        running event loop, so a single loop can drive many browsers at once.
+
+        Usage:
+            async with AsyncBrowser() as browser:
+                page = await browser.goto("https://example.com/")
+                title = await page.execute_script("document.title")
+    """
+
+    def __enter__(self):
+        # Inherited, it would leave `start` and `close` as coroutines nobody awaits.
+        raise TypeError("AsyncBrowser must be used with `async with`")
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        raise TypeError("AsyncBrowser must be used with `async with`")
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def get_ws_url(self) -> str:
+        """Returns the WebSocket URL for low-level use using /json/version endpoint."""
+        return (await self.client.exec_request_async("/json/version"))["webSocketDebuggerUrl"]
+
+    async def get_page_id(self):
+        """Returns the page id."""
+        return (await self.client.exec_request_async("/json/list"))[0]["id"]
+
+    async def wait_for_endpoint(self) -> str:
+        """Waits until the browser's DevTools endpoint is published, up to `launch_timeout`."""
+        deadline = time.perf_counter() + self.launch_timeout
+        while (ws := self.read_endpoint()) is None:
+            self.check_process()
+            if time.perf_counter() > deadline:
+                raise LaunchError("The browser's DevTools endpoint was not ready in time")
+            await asyncio.sleep(poll_interval)
+
+        return ws
+
+    async def start(self):
+        """Starts the browser instance."""
+        if self.transport != "websocket":
+            raise LaunchError("AsyncBrowser only supports the websocket transport")
+
+        try:
+            started = time.perf_counter()
+            self.prepare_profile()
+            prepared = time.perf_counter()
+            self.run(self.build_commands())
+            spawned = time.perf_counter()
+
+            ws = await self.wait_for_endpoint()
+            ready = time.perf_counter()
+
+            self.runtime = AsyncRuntime(ws, instrumentation=self.instrumentation)
+            await self.runtime.connect()
+            await asyncio.wait_for(self.runtime.attach_ready.wait(), timeout=self.launch_timeout)
+            self.runtime_ready.set()
+            attached = time.perf_counter()
+
+            if self.cache is not None:
+                await AsyncPage(self.runtime, self.temp_dir).use_cache(self.cache)
+
+            self.startup_timings = {
+                "profile": prepared - started,
+                "spawn": spawned - prepared,
+                "endpoint": ready - spawned,
+                "attached": attached - ready,
+                "total": attached - started
+            }
+            self.record_timings()
+        except LaunchError:
+            self.abort()
+            raise
+        except Exception as er:
+            self.abort()
+            raise LaunchError(er)
+
+    async def goto(self, url, wait_until: str = "load", timeout: float = 30) -> AsyncPage:
+        """Opens the desired page using its URL, see `Page.goto` for `wait_until`."""
+        return await AsyncPage(self.runtime, self.temp_dir).goto(url, wait_until, timeout)
+
+    async def new_page(self, url: str = None, wait_until: str = "load") -> AsyncPage:
+        """Opens a new tab sharing the browser's connection, optionally navigating it to a URL."""
+        page = AsyncPage(self.runtime, self.temp_dir, await self.runtime.new_session())
+        if self.cache is not None:
+            await page.use_cache(self.cache)
+        if url is not None:
+            await page.goto(url, wait_until)
+
+        return page
+
+    def is_alive(self) -> bool:
+        """Checks whether the browser process and its connection are still up."""
+        return (
+            self.runtime is not None
+            and self.process.poll() is None
+            and bool(self.runtime.ws.tasks)
+            and not any(task.done() for task in self.runtime.ws.tasks)
+        )
+
+    async def reset(self) -> AsyncPage:
+        """Closes other tabs and workers, blanks the main page and clears all storage, see `Browser.reset`."""
+        for session in list(self.runtime.sessions.values()):
+            if session is not self.runtime.main:
+                await self.runtime.close_session(session)
+        future = self.runtime.send_command({"method": "Target.getTargets"}, session_id=None)
+        targets = await self.runtime.retrieve_command_results(future.command_id, future)
+        for target_id in self.extra_targets(targets["targetInfos"]):
+            self.runtime.send_command({"method": "Target.closeTarget", "params": {"targetId": target_id}}, session_id=None)
+
+        page = AsyncPage(self.runtime, self.temp_dir)
+        await page.execute_script("try { sessionStorage.clear(); } catch (e) {}", False)
+        await page.goto("about:blank", "commit")
+        for command in self.reset_commands():
+            await page.session.execute_command(cdp_obj=command)
+        return page
+
+    async def capture_template(self, name: str, consistent: bool = True) -> ProfileTemplate:
+        """Saves this browser's profile as a template, see `Browser.capture_template`."""
+        template = ProfileTemplate(name)
+        loop = asyncio.get_running_loop()
+        if consistent:
+            self.request_close()
+            await loop.run_in_executor(None, self.process.shutdown, self.close_timeout)
+        await loop.run_in_executor(None, template.capture, self.temp_dir)
+        if consistent:
+            await self.close()
+        return template
+
+    async def close(self) -> None:
+        """Closes the browser instance."""
+        try:
+            if hasattr(self, "pid"):
+                started = time.perf_counter()
+                self.request_close()
+                await asyncio.get_running_loop().run_in_executor(None, self.process.shutdown, self.close_timeout)
+                if self.runtime is not None:
+                    await self.runtime.close()
+                remove_profile(self.temp_dir)
+                if self.instrumentation is not None:
+                    self.instrumentation.timing("browser.teardown", time.perf_counter() - started)
+            else:
+                raise PIDNotFound("No PID Found!")
+        except Exception as er:
+            raise CloseError(er)
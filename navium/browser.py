@@ -1,33 +1,20 @@
 import os
-import subprocess
 import tempfile
 import secrets
 import time
-import shutil
-import socket
 import threading
-import time
 
+from scripts.cache import ResponseCache
+from scripts.metrics import Instrumentation
 from scripts.page import Page
+from scripts.profiles import ProfileTemplate
+from scripts.process import LIMITS, BrowserProcess, default_executable, remove_profile, sweep_once, write_owner
 from scripts.runtime import Runtime
+from scripts.transports import PipeTransport, pipe_fds_preexec
 from scripts._http import HTTPClient
 from scripts.exceptions import PIDNotFound, LaunchError, CloseError
 
-base_port = 9222
-max_attempts = 50
-
-def is_port_free(port: int) -> bool:
-    """Check if the specified port is free."""
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        return s.connect_ex(("127.0.0.1", port)) != 0
-
-def get_free_port() -> int:
-    """Finds a free port starting from the base port."""
-    for i in range(max_attempts):
-        port = base_port + i
-        if is_port_free(port):
-            return port
-    raise RuntimeError("No free ports available")
+poll_interval = 0.005
 
 class Browser:
     """
@@ -38,15 +25,38 @@ class Browser:
         and does not interfere with others. The user data directory is created
         in the user's temporary folder and is identified by a randomly generated
         session ID.
+
+        Chromium picks its own debugging port and publishes it in the profile, so
+        any number of browsers can be launched in parallel; `startup_timings` holds
+        the spawn / endpoint / attach breakdown of the last launch in seconds.
+        With `transport="pipe"` the protocol runs over `--remote-debugging-pipe`
+        instead and no debugging port is opened at all. Passing a `ResponseCache` answers
+        the requests of every page from it, passing an `Instrumentation` measures every
+        command along with the launch, attach and teardown durations.
+
+        The browser runs in its own process group, `close` asks it to exit over the
+        protocol and escalates to SIGTERM then SIGKILL after `close_timeout` seconds, so no
+        renderer outlives it. `limits` caps its resources (see `limits_preexec`), profiles
+        left behind by crashed runs are swept when the first browser is created.
+
+        `profile` names a `ProfileTemplate` the user data directory is copied from, so the
+        launch skips first-run work and starts with its cookies, extensions and caches.
     """
 
     def __init__(
             self,
             args: list = [],
             headless: bool = False,
-            executable_path: str = None
+            executable_path: str = None,
+            launch_timeout: float = 30,
+            transport: str = "websocket",
+            cache: ResponseCache = None,
+            instrumentation: Instrumentation = None,
+            limits: dict = None,
+            close_timeout: float = 5,
+            profile: str | ProfileTemplate = None
         ) -> None:
-        self.args = args
+        self.args = list(args)
         if headless:
             self.args.append("--headless")
             self.args.append("--no-sandbox")
@@ -54,20 +64,38 @@ class Browser:
         if executable_path is not None:
             self.path = executable_path
         else:
-            self.path = os.path.join(os.getenv("APPDATA"), "navium_build", "build", "chrome.exe")
+            self.path = default_executable()
         
         if not os.path.exists(self.path):
             raise FileNotFoundError("The executable path specified is not available, perhaps try doing `navium install`?")
+        if transport not in ("websocket", "pipe"):
+            raise ValueError("transport must be either 'websocket' or 'pipe'")
+        if unknown := [name for name in limits or () if name not in LIMITS and not name.startswith("RLIMIT_")]:
+            raise ValueError("Unknown limits: {}".format(", ".join(sorted(unknown))))
+        self.profile = ProfileTemplate(profile) if isinstance(profile, str) else profile
 
+        # Nothing touches the filesystem before every argument is known to be valid.
+        sweep_once()
         self._session_id = secrets.token_hex(16)
         self.user_data_dir = tempfile.gettempdir()
         self.temp_dir = os.path.join(self.user_data_dir, f'navium_{self._session_id}')
         os.makedirs(self.temp_dir, exist_ok=False)
-        self.port = get_free_port()
+
+        self.launch_timeout = launch_timeout
+        self.transport = transport
+        self.cache = cache
+        self.instrumentation = instrumentation
+        self.limits = limits
+        self.close_timeout = close_timeout
+        self.profile_stats = None
+        self.pipe = None
+        self.port = None
+        self.ws_url = None
+        self.client = None
         self.runtime_thread = None
         self.runtime = None
         self.runtime_ready = threading.Event()
-        self.client = HTTPClient(self.port)
+        self.startup_timings = {}
 
     def __enter__(self):
         self.start()
@@ -80,17 +108,65 @@ class Browser:
         """Returns the WebSocket URL for low-level use using /json/version endpoint."""
         return self.client.exec_request("/json/version")["webSocketDebuggerUrl"]
 
-    def run(self, cmd) -> subprocess.Popen:
+    def prepare_profile(self):
+        """Materialises the profile template into the user data directory, if any."""
+        if self.profile is not None and self.profile_stats is None:
+            self.profile_stats = self.profile.materialize(self.temp_dir)
+
+    def capture_template(self, name: str, consistent: bool = True) -> ProfileTemplate:
+        """
+        Saves this browser's profile as a template. With `consistent` the browser is closed
+        first, so every store is flushed to disk, otherwise it keeps running and state it
+        has not written yet (cookies are flushed every 30 seconds or so) may be missing.
+        """
+        template = ProfileTemplate(name)
+        if consistent:
+            self.request_close()
+            self.process.shutdown(self.close_timeout)
+        template.capture(self.temp_dir)
+        if consistent:
+            self.close()
+        return template
+
+    def run(self, cmd) -> BrowserProcess:
         """Creates a sub-process of the chrome instance."""
-        process = subprocess.Popen(cmd)
+        if self.transport == "pipe":
+            process = self.run_with_pipe(cmd)
+        else:
+            process = BrowserProcess(cmd, limits=self.limits)
+        self.process = process
         self.pid = process.pid
+        write_owner(self.temp_dir, process.pid)
 
         return process
 
+    def run_with_pipe(self, cmd) -> BrowserProcess:
+        """Creates the sub-process with its DevTools pipes on fds 3 and 4."""
+        if os.name != "posix":
+            raise LaunchError("The pipe transport is only supported on POSIX systems")
+
+        browser_read, our_write = os.pipe()
+        our_read, browser_write = os.pipe()
+        try:
+            process = BrowserProcess(
+                cmd,
+                pass_fds=(3, 4),
+                preexec=pipe_fds_preexec(browser_read, browser_write),
+                limits=self.limits
+            )
+        except Exception:
+            os.close(our_read); os.close(our_write)
+            raise
+        finally:
+            os.close(browser_read); os.close(browser_write)
+
+        self.pipe = PipeTransport(our_read, our_write)
+        return process
+
     def build_commands(self):
         return [
                 self.path,
-                f"--remote-debugging-port={self.port}",
+                "--remote-debugging-pipe" if self.transport == "pipe" else "--remote-debugging-port=0",
                 "--user-data-dir={}".format(self.temp_dir),
                 "--remote-allow-origins=*"
             ] + self.args
@@ -99,51 +175,185 @@ class Browser:
         """Returns the page id."""
         return self.client.exec_request("/json/list")[0]["id"]
 
-    def init_runtime(self, ws, page):
+    def read_endpoint(self) -> str | None:
+        """
+        Reads the DevTools endpoint Chromium publishes in `DevToolsActivePort` once it listens.
+
+        The file holds the port picked by `--remote-debugging-port=0` and the browser's
+        WebSocket path, it is only complete once both lines are written.
+        """
+        try:
+            with open(os.path.join(self.temp_dir, "DevToolsActivePort")) as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+
+        if len(lines) < 2 or not lines[0].isdigit() or not lines[1].startswith("/"):
+            return None
+
+        self.port = int(lines[0])
+        self.client = HTTPClient(self.port)
+        self.ws_url = f"ws://127.0.0.1:{self.port}{lines[1]}"
+        return self.ws_url
+
+    def check_process(self):
+        """Raises if the browser process exited before becoming ready."""
+        if self.process.poll() is not None:
+            raise LaunchError(f"The browser exited during startup with code {self.process.returncode}")
+
+    def wait_for_endpoint(self) -> str:
+        """Waits until the browser's DevTools endpoint is published, up to `launch_timeout`."""
+        deadline = time.perf_counter() + self.launch_timeout
+        while (ws := self.read_endpoint()) is None:
+            self.check_process()
+            if time.perf_counter() > deadline:
+                raise LaunchError("The browser's DevTools endpoint was not ready in time")
+            time.sleep(poll_interval)
+
+        return ws
+
+    def init_runtime(self, ws, page=None):
         """Initialises the runtime."""
-        self.runtime = Runtime(ws, page)
+        self.runtime = Runtime(ws, page, transport=self.pipe, instrumentation=self.instrumentation)
+        self.runtime_thread = self.runtime.open_thread
         self.runtime_ready.set()
 
     def start(self):
         """Starts the browser instance."""
         try:
+            started = time.perf_counter()
+            self.prepare_profile()
+            prepared = time.perf_counter()
             self.run(self.build_commands())
-            ws = self.get_ws_url()
-            page_id = self.get_page_id()
+            spawned = time.perf_counter()
 
-            self.runtime_thread = threading.Thread(
-                target=self.init_runtime,
-                args=(ws, page_id),
-                daemon=True
-            )
-            self.runtime_thread.start()
-            self.runtime_ready.wait()
-            time.sleep(0.5)
+            ws = self.wait_for_endpoint() if self.pipe is None else None
+            ready = time.perf_counter()
+
+            self.init_runtime(ws)
+            if not self.runtime.attach_ready.wait(timeout=self.launch_timeout):
+                raise TimeoutError("Attach Failed")
+            attached = time.perf_counter()
+
+            if self.cache is not None:
+                Page(self.runtime, self.temp_dir).use_cache(self.cache)
+
+            self.startup_timings = {
+                "profile": prepared - started,
+                "spawn": spawned - prepared,
+                "endpoint": ready - spawned,
+                "attached": attached - ready,
+                "total": attached - started
+            }
+            self.record_timings()
+        except LaunchError:
+            self.abort()
+            raise
         except Exception as er:
+            self.abort()
             raise LaunchError(er)
 
-    def goto(self, url) -> Page:
-        """Opens the desired page using its URL."""
-        self.runtime.execute_command(cdp_obj={
-            "method": "Page.navigate",
-            "params": {
-                "url": url
-            }
-        })
+    def record_timings(self):
+        """Feeds the startup timings to the instrumentation, if any."""
+        if self.instrumentation is not None:
+            for name, seconds in self.startup_timings.items():
+                self.instrumentation.timing(f"browser.{name}", seconds)
 
-        return Page(self.runtime, self.temp_dir)
+    def goto(self, url, wait_until: str = "load", timeout: float = 30) -> Page:
+        """Opens the desired page using its URL, see `Page.goto` for `wait_until`."""
+        return Page(self.runtime, self.temp_dir).goto(url, wait_until, timeout)
+
+    def new_page(self, url: str = None, wait_until: str = "load") -> Page:
+        """Opens a new tab sharing the browser's connection, optionally navigating it to a URL."""
+        page = Page(self.runtime, self.temp_dir, self.runtime.new_session())
+        if self.cache is not None:
+            page.use_cache(self.cache)
+        if url is not None:
+            page.goto(url, wait_until)
+
+        return page
     
+    def is_alive(self) -> bool:
+        """Checks whether the browser process and its connection are still up."""
+        return (
+            self.runtime is not None
+            and self.process.poll() is None
+            and self.runtime.open_thread.is_alive()
+        )
+
+    def extra_targets(self, targets: list) -> list:
+        """The target IDs of the pages and workers left over besides the main page."""
+        return [
+            target["targetId"] for target in targets
+            if target["type"] in ("page", "service_worker", "shared_worker") and target["targetId"] != self.runtime.page
+        ]
+
+    def reset_commands(self) -> list:
+        """The commands wiping cookies, caches and every storage of the origins visited."""
+        commands = [{"method": "Network.clearBrowserCookies"}, {"method": "Network.clearBrowserCache"}]
+        origins, self.runtime.origins = self.runtime.origins, set()
+        for origin in sorted(origins):
+            commands.append({
+                "method": "Storage.clearDataForOrigin",
+                "params": {
+                    "origin": origin,
+                    "storageTypes": "all"
+                }
+            })
+        return commands
+
+    def reset(self) -> Page:
+        """
+        Closes every other tab and worker, blanks the main page, then clears cookies, cache
+        and all storage (IndexedDB, service workers, CacheStorage...) of every origin visited.
+        """
+        for session in list(self.runtime.sessions.values()):
+            if session is not self.runtime.main:
+                self.runtime.close_session(session)
+        future = self.runtime.send_command({"method": "Target.getTargets"}, session_id=None)
+        targets = self.runtime.retrieve_command_results(future.command_id, future)
+        for target_id in self.extra_targets(targets["targetInfos"]):
+            self.runtime.send_command({"method": "Target.closeTarget", "params": {"targetId": target_id}}, session_id=None)
+
+        page = Page(self.runtime, self.temp_dir)
+        page.execute_script("try { sessionStorage.clear(); } catch (e) {}", False)
+        page.goto("about:blank", "commit")
+        for command in self.reset_commands():
+            page.session.execute_command(cdp_obj=command)
+        return page
+
+    def abort(self):
+        """Kills a browser that failed to start and removes its profile."""
+        if hasattr(self, "process"):
+            self.process.kill()
+        remove_profile(self.temp_dir)
+
+    def request_close(self):
+        """Asks the browser to exit over the protocol, without waiting for an answer."""
+        if self.runtime is not None and self.process.poll() is None:
+            try:
+                self.runtime.send_command({"method": "Browser.close"}, session_id=None)
+            except Exception:
+                pass
+
     def __cleanup(self):
-        self.runtime.ws.close()
-        self.runtime_thread.join()
-        os.system(f"taskkill /pid {self.pid} /f >nul 2>&1")
-        time.sleep(1); shutil.rmtree(self.temp_dir)
+        if self.client is not None:
+            self.client.close()
+        self.request_close()
+        self.process.shutdown(self.close_timeout)
+        if self.runtime is not None:
+            self.runtime.ws.close()
+            self.runtime_thread.join(timeout=self.close_timeout)
+        remove_profile(self.temp_dir)
 
     def close(self) -> None:
         """Closes the browser instance."""
         try:
             if hasattr(self, "pid"):
+                started = time.perf_counter()
                 self.__cleanup()
+                if self.instrumentation is not None:
+                    self.instrumentation.timing("browser.teardown", time.perf_counter() - started)
             else:
                 raise PIDNotFound("No PID Found!")
         except Exception as er:
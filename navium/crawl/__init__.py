@@ -0,0 +1,9 @@
+"""
+A crawl engine on top of `Browser`: a prioritised, polite URL frontier with
+memory-bounded deduplication, fanned out over many browsers and tabs.
+"""
+
+from .crawler import Crawler, Link
+from .frontier import Frontier, Entry
+from .seen import BloomFilter
+from .urls import normalize_url
@@ -0,0 +1,239 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from urllib.parse import urljoin
+
+from scripts.exceptions import NaviumException
+from ..browser import Browser
+from .frontier import Frontier, Entry
+from .seen import BloomFilter
+
+logger = logging.getLogger("navium")
+
+class Link:
+    """
+    A URL found by `extract`, queued in the frontier rather than returned as a result.
+    Relative URLs are resolved against the page they were found on.
+    """
+
+    def __init__(self, url: str, priority: float = 0) -> None:
+        self.url = url
+        self.priority = priority
+
+
+class Crawler:
+    """
+        Crawls URLs over several browsers and tabs.
+
+        One worker thread drives each tab: it takes the best URL whose host is ready from
+        the `Frontier`, navigates, and runs `extract(page)`, which returns or yields results
+        and `Link`s to follow. Navigation failures are retried with exponential backoff,
+        the frontier is checkpointed to `checkpoint` periodically and on exit, and a crawl
+        started with an existing checkpoint resumes from it.
+
+        Usage:
+            def extract(page):
+                yield {"title": page.execute_script("document.title")}
+                for href in page.execute_script("[...document.links].map(a => a.href)"):
+                    yield Link(href)
+
+            crawler = Crawler(extract, ["https://example.com/"], browsers=2, tabs_per_browser=4)
+            for result in crawler.run():
+                print(result, crawler.metrics())
+    """
+
+    def __init__(
+            self,
+            extract,
+            seeds: list = (),
+            browsers: int = 1,
+            tabs_per_browser: int = 4,
+            delay: float = 1.0,
+            host_concurrency: int = 2,
+            max_retries: int = 3,
+            backoff: float = 2.0,
+            timeout: float = 30,
+            wait_until: str = "load",
+            max_depth: int = None,
+            max_pages: int = None,
+            checkpoint: str = None,
+            checkpoint_interval: float = 60,
+            seen_capacity: int = 10_000_000,
+            error_rate: float = 1e-4,
+            result_buffer: int = 1000,
+            browser_kwargs: dict = None
+        ) -> None:
+        self.extract = extract
+        self.browsers = browsers
+        self.tabs_per_browser = tabs_per_browser
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.wait_until = wait_until
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.browser_kwargs = browser_kwargs or {}
+
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self.frontier = Frontier.load(checkpoint, delay, host_concurrency)
+        else:
+            self.frontier = Frontier(delay, host_concurrency, BloomFilter(seen_capacity, error_rate))
+        for seed in seeds:
+            self.frontier.add(seed)
+
+        self.results = queue.Queue(result_buffer)
+        self.stats = {"pages": 0, "failures": 0, "retries": 0, "results": 0, "links": 0}
+        self.recent = deque(maxlen=1000)
+        self.started = None
+        self._lock = threading.Lock()
+
+    def metrics(self) -> dict:
+        """Live crawl statistics, `pages_per_sec` is measured over the last minute."""
+        now = time.monotonic()
+        with self._lock:
+            stats = dict(self.stats)
+            recent = [t for t in self.recent if now - t <= 60]
+        window = min(60, now - self.started) if self.started else 0
+        stats.update(
+            queued=len(self.frontier),
+            in_flight=len(self.frontier.in_flight),
+            seen=len(self.frontier.seen),
+            elapsed=now - self.started if self.started else 0,
+            pages_per_sec=len(recent) / window if window > 0 else 0.0
+        )
+        return stats
+
+    def count(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            self.stats[name] += amount
+            return self.stats[name]
+
+    def visit(self, page, entry: Entry):
+        page.goto(entry.url, self.wait_until, self.timeout)
+        items = self.extract(page)
+        for item in items if items is not None else ():
+            if isinstance(item, Link):
+                if self.max_depth is None or entry.depth < self.max_depth:
+                    if self.frontier.add(urljoin(entry.url, item.url), item.priority, entry.depth + 1):
+                        self.count("links")
+            else:
+                self.count("results")
+                if not self.deliver(item):
+                    return
+
+    def deliver(self, item) -> bool:
+        """Queues a result, giving up once the crawl is closed, e.g. when the consumer stopped."""
+        while not self.frontier.closed:
+            try:
+                self.results.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def work(self, page):
+        while True:
+            entry = self.frontier.get()
+            if entry is None:
+                return
+
+            try:
+                self.visit(page, entry)
+            except (TimeoutError, NaviumException) as er:
+                if entry.attempts < self.max_retries:
+                    self.count("retries")
+                    self.frontier.retry(entry, self.backoff ** entry.attempts)
+                else:
+                    self.count("failures")
+                    logger.warning("Giving up on %s: %s", entry.url, er)
+            except Exception:
+                self.count("failures")
+                logger.exception("Extraction failed on %s", entry.url)
+            else:
+                with self._lock:
+                    self.stats["pages"] += 1
+                    self.recent.append(time.monotonic())
+                    finished = self.max_pages is not None and self.stats["pages"] >= self.max_pages
+                if finished:
+                    self.frontier.close()
+            finally:
+                self.frontier.done(entry)
+
+    def launch(self, browsers: list, pages: list, failures: list):
+        try:
+            browser = Browser(**self.browser_kwargs)
+            browser.start()
+            with self._lock:
+                browsers.append(browser)
+            tabs = [browser.goto("about:blank", "commit")]
+            tabs += [browser.new_page() for _ in range(self.tabs_per_browser - 1)]
+        except Exception as er:
+            with self._lock:
+                failures.append(er)
+            return
+        with self._lock:
+            pages.extend(tabs)
+
+    def run(self):
+        """Runs the crawl, yielding results as they are extracted."""
+        browsers, pages, failures = [], [], []
+        launchers = [threading.Thread(target=self.launch, args=(browsers, pages, failures)) for _ in range(self.browsers)]
+        for launcher in launchers:
+            launcher.start()
+        for launcher in launchers:
+            launcher.join()
+
+        if failures:
+            if not pages:
+                self.close_browsers(browsers)
+                raise failures[0]
+            logger.warning("%d of %d browsers failed to launch: %s", len(failures), self.browsers, failures[0])
+
+        self.started = time.monotonic()
+        workers = [threading.Thread(target=self.work, args=(page,), daemon=True) for page in pages]
+        for worker in workers:
+            worker.start()
+
+        saved = time.monotonic()
+        try:
+            while any(worker.is_alive() for worker in workers) or not self.results.empty():
+                try:
+                    yield self.results.get(timeout=0.5)
+                except queue.Empty:
+                    pass
+
+                if self.checkpoint is not None and time.monotonic() - saved >= self.checkpoint_interval:
+                    self.frontier.save(self.checkpoint)
+                    saved = time.monotonic()
+        finally:
+            self.frontier.close()
+            self.stop_workers(workers)
+            if self.checkpoint is not None:
+                self.frontier.save(self.checkpoint)
+            self.close_browsers(browsers)
+
+    def stop_workers(self, workers: list):
+        """Waits up to `timeout` for the workers to finish their page, draining their results."""
+        deadline = time.monotonic() + self.timeout
+        while any(worker.is_alive() for worker in workers) and time.monotonic() < deadline:
+            try:
+                while True:
+                    self.results.get_nowait()
+            except queue.Empty:
+                pass
+            for worker in workers:
+                worker.join(0.05)
+        if any(worker.is_alive() for worker in workers):
+            logger.warning("Closing the browsers under workers still busy after %s seconds", self.timeout)
+
+    def close_browsers(self, browsers: list):
+        for browser in browsers:
+            try:
+                browser.close()
+            except NaviumException:
+                pass
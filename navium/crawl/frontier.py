@@ -0,0 +1,188 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+
+from .seen import BloomFilter
+from .urls import normalize_url, host_of
+
+class Entry:
+    """A URL waiting in the frontier."""
+
+    __slots__ = ("url", "priority", "depth", "attempts")
+
+    def __init__(self, url: str, priority: float = 0, depth: int = 0, attempts: int = 0) -> None:
+        self.url = url
+        self.priority = priority
+        self.depth = depth
+        self.attempts = attempts
+
+    @property
+    def host(self) -> str:
+        return host_of(self.url)
+
+    def to_list(self) -> list:
+        return [self.url, self.priority, self.depth, self.attempts]
+
+
+class Host:
+    """Politeness state of one host."""
+
+    __slots__ = ("active", "ready_at", "parked")
+
+    def __init__(self) -> None:
+        self.active = 0
+        self.ready_at = 0.0
+        self.parked = []
+
+
+class Frontier:
+    """
+    A thread-safe priority queue of URLs with per-host politeness.
+
+    URLs are normalised and deduplicated against a Bloom filter, higher priorities are
+    served first, but a host only gets a new request `delay` seconds after the previous
+    one started and never has more than `host_concurrency` requests in flight. Entries
+    whose host isn't ready are parked with it until it is.
+    """
+
+    def __init__(
+            self,
+            delay: float = 1.0,
+            host_concurrency: int = 2,
+            seen: BloomFilter = None
+        ) -> None:
+        self.delay = delay
+        self.host_concurrency = host_concurrency
+        self.seen = seen if seen is not None else BloomFilter()
+        self.heap = []
+        self.delayed = []
+        self.hosts = {}
+        self.in_flight = {}
+        self.sequence = itertools.count()
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def __len__(self):
+        with self.condition:
+            return len(self.heap) + len(self.delayed) + sum(len(host.parked) for host in self.hosts.values())
+
+    def host(self, name: str) -> Host:
+        host = self.hosts.get(name)
+        if host is None:
+            host = self.hosts[name] = Host()
+        return host
+
+    def push(self, entry: Entry):
+        heapq.heappush(self.heap, (-entry.priority, next(self.sequence), entry))
+
+    def add(self, url: str, priority: float = 0, depth: int = 0, force: bool = False) -> bool:
+        """Queues a URL unless it was seen before, returns whether it was queued."""
+        url = normalize_url(url)
+        with self.condition:
+            if not self.seen.add(url) and not force:
+                return False
+            self.push(Entry(url, priority, depth))
+            self.condition.notify()
+        return True
+
+    def retry(self, entry: Entry, delay: float):
+        """Queues an entry again once `delay` seconds passed."""
+        entry.attempts += 1
+        with self.condition:
+            heapq.heappush(self.delayed, (time.monotonic() + delay, next(self.sequence), entry))
+            self.condition.notify()
+
+    def available(self, host: Host, now: float) -> bool:
+        return host.active < self.host_concurrency and host.ready_at <= now
+
+    def promote(self, now: float):
+        while self.delayed and self.delayed[0][0] <= now:
+            self.push(heapq.heappop(self.delayed)[2])
+
+        for host in self.hosts.values():
+            if host.parked and self.available(host, now):
+                for item in host.parked:
+                    heapq.heappush(self.heap, item)
+                host.parked = []
+
+    def next_wakeup(self, now: float) -> float | None:
+        times = [self.delayed[0][0]] if self.delayed else []
+        times += [host.ready_at for host in self.hosts.values() if host.parked and host.active < self.host_concurrency]
+        return max(min(times) - now, 0.001) if times else None
+
+    def get(self, timeout: float = None) -> Entry | None:
+        """
+        Takes the best entry whose host is ready, waiting for one as needed. Returns None
+        once the frontier is closed, or when nothing is queued or in flight anymore.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while not self.closed:
+                now = time.monotonic()
+                self.promote(now)
+
+                while self.heap:
+                    item = heapq.heappop(self.heap)
+                    entry = item[2]
+                    host = self.host(entry.host)
+                    if self.available(host, now):
+                        host.active += 1
+                        host.ready_at = now + self.delay
+                        self.in_flight[id(entry)] = entry
+                        return entry
+                    host.parked.append(item)
+
+                wait = self.next_wakeup(now)
+                if wait is None and not self.in_flight:
+                    return None
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise TimeoutError("No URL became available in time")
+                    wait = remaining if wait is None else min(wait, remaining)
+                self.condition.wait(wait)
+        return None
+
+    def done(self, entry: Entry):
+        """Marks an entry taken with `get` as finished, retried or not."""
+        with self.condition:
+            self.in_flight.pop(id(entry), None)
+            self.host(entry.host).active -= 1
+            self.condition.notify_all()
+
+    def close(self):
+        """Wakes every waiting `get` up, making it return None."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def save(self, path: str):
+        """Checkpoints the queued and in-flight entries with the seen-set, atomically."""
+        with self.condition:
+            entries = [item[2] for item in self.heap]
+            entries += [item[2] for item in self.delayed]
+            entries += [item[2] for host in self.hosts.values() for item in host.parked]
+            entries += list(self.in_flight.values())
+            state = {
+                "entries": [entry.to_list() for entry in entries],
+                "seen": self.seen.to_dict()
+            }
+
+        temp = f"{path}.tmp"
+        with open(temp, "w") as f:
+            json.dump(state, f)
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path: str, delay: float = 1.0, host_concurrency: int = 2) -> "Frontier":
+        """Restores a frontier saved with `save`, in-flight entries are queued again."""
+        with open(path) as f:
+            state = json.load(f)
+
+        frontier = cls(delay, host_concurrency, BloomFilter.from_dict(state["seen"]))
+        for url, priority, depth, attempts in state["entries"]:
+            frontier.push(Entry(url, priority, depth, attempts))
+        return frontier
@@ -1,63 +1,357 @@
 import httpx
 import argparse
 import tqdm
+import base64
+import concurrent.futures
+import contextlib
+import hashlib
+import json
 import os
-import zipfile
+import secrets
 import shutil
+import stat
+import sys
+import threading
+import zipfile
+
+from scripts.process import build_dir
+
+DEFAULT_REVISION = "1364698"
+SNAPSHOTS = "https://commondatastorage.googleapis.com/chromium-browser-snapshots"
+
+# Snapshot folder, archive name and its top-level directory, per platform.
+PLATFORMS = {
+    "win64": ("Win_x64", "chrome-win.zip", "chrome-win"),
+    "linux64": ("Linux_x64", "chrome-linux.zip", "chrome-linux"),
+    "mac": ("Mac", "chrome-mac.zip", "chrome-mac"),
+    "mac-arm": ("Mac_Arm", "chrome-mac.zip", "chrome-mac")
+}
+
+PART_SIZE = 8 << 20
+CHUNK_SIZE = 1 << 20
+
+def current_platform() -> str:
+    if os.name == "nt":
+        return "win64"
+    if sys.platform == "darwin":
+        return "mac-arm" if os.uname().machine == "arm64" else "mac"
+    return "linux64"
+
+def cache_dir() -> str:
+    """The build cache, shared between users and containers by pointing `NAVIUM_CACHE_DIR` at a common volume."""
+    return os.getenv("NAVIUM_CACHE_DIR") or os.path.join(build_dir(), "cache")
+
+def snapshot_url(platform: str, revision: str) -> str:
+    folder, archive, _ = PLATFORMS[platform]
+    return f"{SNAPSHOTS}/{folder}/{revision}/{archive}"
+
+def write_atomic(path: str, data: str):
+    """Writes a small file through a temporary name, readers see the old or the new content."""
+    temp = f"{path}.{secrets.token_hex(4)}.tmp"
+    with open(temp, "w") as f:
+        f.write(data)
+    os.replace(temp, path)
+
+@contextlib.contextmanager
+def locked(path: str):
+    """Serialises installers of the same build across processes (POSIX only)."""
+    with open(path, "a") as f:
+        if os.name == "posix":
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
 
-APPDATA = os.getenv("APPDATA")
-def install_chromium():
-    dir = os.path.join(APPDATA, "navium_build")
-    dir_file = os.path.join(APPDATA, "navium_build", "build.zip")
-    extraction_path = os.path.join(dir, "build")
-
-    if not os.path.exists(dir):
-        os.mkdir(dir)
-    else:
-        return print("The build is already installed in <{}> skipping the process.".format(dir))
-
-    with httpx.Client() as client:
-        print("Installing Chromium...")
-        with client.stream("GET", "https://commondatastorage.googleapis.com/chromium-browser-snapshots/Win_x64/1364698/chrome-win.zip") as response:
-            if response.status_code == 200:
-                total_size = int(response.headers.get("content-length", 0))
-
-                with open(dir_file, "wb") as f, tqdm.tqdm(
-                    desc="Downloading Chromium",
-                    total=total_size,
-                    unit="iB",
-                    unit_scale=True,
-                    unit_divisor=1024
-                ) as bar:
-                    for chunk in response.iter_bytes(chunk_size=1024):
-                        f.write(chunk)
-                        bar.update(len(chunk))
-
-                with zipfile.ZipFile(dir_file) as z:
-                    z.extractall(os.path.join(dir, "build"))
-
-                os.remove(dir_file)
-                chrome_win_dir = os.path.join(extraction_path, "chrome-win")
-                for file_name in os.listdir(chrome_win_dir):
-                    source_file = os.path.join(chrome_win_dir, file_name)
-                    destination_file = os.path.join(extraction_path, file_name)
-                    shutil.move(source_file, destination_file)
-
-                shutil.rmtree(chrome_win_dir)
-
-                print("Chromium has been downloaded successfully :3")
+class Download:
+    """
+    Downloads a file with parallel HTTP range requests, resumable across runs.
+
+    The file is preallocated at `<path>.part` and every finished part is recorded in
+    `<path>.part.json` along with the ETag and size, so an interrupted download only
+    fetches the parts it misses, as long as the remote file did not change.
+    Servers without range support fall back to a single stream.
+    """
+
+    def __init__(self, client: httpx.Client, url: str, path: str, workers: int = 8) -> None:
+        self.client = client
+        self.url = url
+        self.path = path
+        self.part_path = path + ".part"
+        self.state_path = path + ".part.json"
+        self.workers = workers
+        self.headers = {}
+        self._lock = threading.Lock()
+
+    def probe(self) -> int:
+        response = self.client.head(self.url)
+        response.raise_for_status()
+        self.headers = response.headers
+        return int(response.headers.get("content-length", 0))
+
+    def expected_md5(self) -> bytes | None:
+        """The MD5 Google Cloud Storage publishes in `x-goog-hash`, if any."""
+        for value in self.headers.get_list("x-goog-hash", split_commas=True):
+            name, _, digest = value.strip().partition("=")
+            if name == "md5":
+                return base64.b64decode(digest)
+        return None
+
+    def load_state(self, size: int, etag: str) -> set:
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        if state.get("size") != size or state.get("etag") != etag or not os.path.exists(self.part_path):
+            return set()
+        return set(state["done"])
+
+    def save_state(self, size: int, etag: str, done: set):
+        write_atomic(self.state_path, json.dumps({"size": size, "etag": etag, "done": sorted(done)}))
+
+    def fetch_part(self, index: int, start: int, end: int, bar):
+        headers = {"Range": f"bytes={start}-{end}"}
+        with self.client.stream("GET", self.url, headers=headers) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise httpx.HTTPError("The server ignored the range request")
+            with open(self.part_path, "r+b") as f:
+                f.seek(start)
+                for chunk in response.iter_bytes(CHUNK_SIZE):
+                    f.write(chunk)
+                    bar.update(len(chunk))
+        return index
+
+    def fetch_whole(self, bar):
+        with self.client.stream("GET", self.url) as response:
+            response.raise_for_status()
+            with open(self.part_path, "wb") as f:
+                for chunk in response.iter_bytes(CHUNK_SIZE):
+                    f.write(chunk)
+                    bar.update(len(chunk))
+
+    def run(self) -> str:
+        """Downloads the file and returns its path."""
+        size = self.probe()
+        etag = self.headers.get("etag", "")
+        ranged = size > 0 and self.headers.get("accept-ranges") == "bytes"
+        parts = [(i, start, min(start + PART_SIZE, size) - 1) for i, start in enumerate(range(0, size, PART_SIZE))]
+        done = self.load_state(size, etag) if ranged else set()
+
+        if ranged and not done:
+            with open(self.part_path, "wb") as f:
+                f.truncate(size)
+            self.save_state(size, etag, done)
+
+        resumed = sum(end - start + 1 for i, start, end in parts if i in done)
+        with tqdm.tqdm(desc="Downloading Chromium", total=size or None, initial=resumed,
+                       unit="iB", unit_scale=True, unit_divisor=1024) as bar:
+            if not ranged:
+                self.fetch_whole(bar)
             else:
-                print("Failed to download chromium: {} ({})".format(response.text, response.status_code))
+                with concurrent.futures.ThreadPoolExecutor(self.workers) as executor:
+                    futures = [executor.submit(self.fetch_part, i, start, end, bar)
+                               for i, start, end in parts if i not in done]
+                    errors = []
+                    for future in concurrent.futures.as_completed(futures):
+                        try:
+                            index = future.result()
+                        except Exception as er:
+                            errors.append(er)
+                            continue
+                        with self._lock:
+                            done.add(index)
+                            self.save_state(size, etag, done)
+                    if errors:
+                        raise errors[0]
+
+        os.replace(self.part_path, self.path)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.state_path)
+        return self.path
+
+
+def file_digests(path: str):
+    """Returns the SHA-256 and MD5 of a file, read once."""
+    sha256, md5 = hashlib.sha256(), hashlib.md5()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            sha256.update(chunk)
+            md5.update(chunk)
+    return sha256.hexdigest(), md5.digest()
+
+def extract_members(archive: str, members: list, prefix: str, destination: str) -> list:
+    """Extracts files and directories, returns the `(path, link target)` of the symlinks left to create."""
+    links = []
+    with zipfile.ZipFile(archive) as z:
+        for info in members:
+            name = info.filename[len(prefix):] if info.filename.startswith(prefix) else info.filename
+            if not name or ".." in name.split("/"):
+                continue
+            target = os.path.join(destination, *name.split("/"))
+            mode = info.external_attr >> 16
+
+            if info.is_dir():
+                os.makedirs(target, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if stat.S_ISLNK(mode):
+                links.append((target, z.read(info).decode()))
+                continue
+            with z.open(info) as source, open(target, "wb") as out:
+                shutil.copyfileobj(source, out, CHUNK_SIZE)
+            if mode & 0o777:
+                os.chmod(target, mode & 0o777)
+    return links
+
+def create_links(links: list, destination: str):
+    """Creates the archive's symlinks, refusing absolute targets and targets outside the install."""
+    root = os.path.realpath(destination)
+    for path, link in links:
+        resolved = os.path.realpath(os.path.join(os.path.dirname(path), link))
+        if os.path.isabs(link) or link.startswith(("/", "\\")) or os.path.commonpath([root, resolved]) != root:
+            raise ValueError(f"The archive links {path} outside of the install directory ({link})")
+        os.symlink(link, path)
+
+def extract(archive: str, prefix: str, destination: str, workers: int = 8):
+    """
+    Extracts the archive straight into its final layout, stripping the top-level
+    directory and keeping the executable bits, members are inflated in parallel and
+    symlinks created last, once everything they may point into exists.
+    """
+    with zipfile.ZipFile(archive) as z:
+        members = sorted(z.infolist(), key=lambda info: -info.file_size)
+
+    # Largest members first, dealt round-robin so the workers finish together.
+    batches = [members[i::workers] for i in range(workers)]
+    links = []
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        for future in [executor.submit(extract_members, archive, batch, prefix + "/", destination) for batch in batches]:
+            links += future.result()
+    create_links(sorted(links), destination)
+
+def executable_name(platform: str) -> str:
+    if platform == "win64":
+        return "chrome.exe"
+    if platform.startswith("mac"):
+        return os.path.join("Chromium.app", "Contents", "MacOS", "Chromium")
+    return "chrome"
+
+def is_complete(build: str) -> bool:
+    return os.path.exists(os.path.join(build, ".complete"))
+
+def read_marker(build: str) -> str:
+    with open(os.path.join(build, ".complete")) as f:
+        return f.read()
+
+def link_build(build: str, platform: str):
+    """
+    Points the default install location at a cached build, atomically: a symlink on
+    POSIX, a copy moved into place on Windows.
+    """
+    target = os.path.join(build_dir(), "build")
+    temp = f"{target}.{secrets.token_hex(4)}.tmp"
+    if os.name == "posix":
+        if os.path.islink(target) and os.readlink(target) == build:
+            return
+        if os.path.isdir(target) and not os.path.islink(target):
+            shutil.rmtree(target)
+        os.symlink(build, temp)
+        os.replace(temp, target)
+        return
+
+    if is_complete(target) and read_marker(target) == read_marker(build):
+        return
+    shutil.copytree(build, temp, symlinks=True)
+    if os.path.exists(target):
+        shutil.rmtree(target)
+    os.rename(temp, target)
+
+def install_chromium(
+        revision: str = DEFAULT_REVISION,
+        platform: str = None,
+        workers: int = 8,
+        sha256: str = None,
+        force: bool = False
+    ) -> str:
+    """
+    Installs a Chromium snapshot and returns the path of its executable.
+
+    Builds live in a content-addressed cache, `builds/<sha256 of the archive>`, and
+    `refs/<platform>-<revision>` names the build of each revision, so a build already
+    present is reused without touching the network. Builds are extracted to a
+    temporary directory and renamed into place, a half-finished install is never used.
+    """
+    platform = platform or current_platform()
+    if platform not in PLATFORMS:
+        raise ValueError("platform must be one of {}".format(", ".join(PLATFORMS)))
+
+    cache = cache_dir()
+    for folder in ("archives", "builds", "refs", "locks"):
+        os.makedirs(os.path.join(cache, folder), exist_ok=True)
+    name = f"{platform}-{revision}"
+    ref = os.path.join(cache, "refs", name)
+
+    if not force and (build := cached_build(cache, ref)) is not None:
+        link_build(build, platform)
+        return os.path.join(build_dir(), "build", executable_name(platform))
+
+    with locked(os.path.join(cache, "locks", name + ".lock")):
+        # Another installer may have finished the build while we waited for the lock.
+        if not force and (build := cached_build(cache, ref)) is not None:
+            link_build(build, platform)
+            return os.path.join(build_dir(), "build", executable_name(platform))
+
+        archive = os.path.join(cache, "archives", name + ".zip")
+        with httpx.Client(follow_redirects=True, timeout=60) as client:
+            download = Download(client, snapshot_url(platform, revision), archive, workers)
+            download.run()
+
+        digest, md5 = file_digests(archive)
+        expected_md5 = download.expected_md5()
+        if (sha256 is not None and digest != sha256.lower()) or (expected_md5 is not None and md5 != expected_md5):
+            os.remove(archive)
+            raise ValueError(f"The download of {name} is corrupt, its checksum does not match")
+
+        build = os.path.join(cache, "builds", digest)
+        if not is_complete(build):
+            temp = f"{build}.{secrets.token_hex(4)}.tmp"
+            extract(archive, PLATFORMS[platform][2], temp, workers)
+            write_atomic(os.path.join(temp, ".complete"), json.dumps({"platform": platform, "revision": revision, "sha256": digest}))
+            if os.path.exists(build):
+                shutil.rmtree(build)
+            os.rename(temp, build)
+
+        write_atomic(ref, digest)
+        os.remove(archive)
+
+    link_build(build, platform)
+    return os.path.join(build_dir(), "build", executable_name(platform))
+
+def cached_build(cache: str, ref: str) -> str | None:
+    """The complete cached build a ref names, if any."""
+    try:
+        with open(ref) as f:
+            build = os.path.join(cache, "builds", f.read().strip())
+    except FileNotFoundError:
+        return None
+    return build if is_complete(build) else None
 
 def main():
     parser = argparse.ArgumentParser(description="Navium CLI")
     subparser = parser.add_subparsers(dest="command")
 
     install_parser = subparser.add_parser('install', help="Installs the necessary files required to run navium.")
+    install_parser.add_argument("--revision", default=DEFAULT_REVISION, help="The Chromium snapshot revision.")
+    install_parser.add_argument("--platform", choices=list(PLATFORMS), help="Defaults to the current platform.")
+    install_parser.add_argument("--workers", type=int, default=8, help="Parallel range requests and extraction threads.")
+    install_parser.add_argument("--sha256", help="The expected SHA-256 of the archive.")
+    install_parser.add_argument("--force", action="store_true", help="Downloads the build again even if cached.")
     args = parser.parse_args()
 
     if args.command == "install":
-        install_chromium()
+        path = install_chromium(args.revision, args.platform, args.workers, args.sha256, args.force)
+        print("Chromium {} is installed at <{}>".format(args.revision, path))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,326 @@
+import logging
+import multiprocessing
+import pickle
+import queue
+import signal
+import threading
+import time
+from collections import deque
+
+from scripts.exceptions import JobError, LaunchError
+from scripts.process import kill_orphan, remove_profile
+from .browser import Browser
+
+logger = logging.getLogger("navium")
+
+def exit_on_sigterm(signum, frame):
+    raise SystemExit(0)
+
+def run_worker(worker_id, fn, tasks, results, tabs_per_worker, browser_kwargs, navigate, wait_until, timeout):
+    """
+    Body of a worker process: owns one browser, drives `tabs_per_worker` tabs from threads
+    and reports every finished chunk as `("done", worker_id, chunk_id, [(index, ok, value)])`.
+    """
+    # Terminating a worker still closes its browser, whose process group outlives ours otherwise.
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
+
+    try:
+        browser = Browser(**browser_kwargs)
+        browser.start()
+    except Exception as er:
+        results.put(("failed", worker_id, None, "{}: {}".format(type(er).__name__, er)))
+        return
+
+    jobs = queue.Queue()
+    lock = threading.Lock()
+    chunks = {}
+
+    def finish(chunk_id, index, ok, value):
+        # The queue pickles on its feeder thread and drops what fails, so check here.
+        try:
+            pickle.dumps(value)
+        except Exception as er:
+            ok, value = False, "Unpicklable result: {}: {}".format(type(er).__name__, er)
+        with lock:
+            done = chunks[chunk_id]
+            done.append((index, ok, value))
+            if len(done) < done.size:
+                return
+            del chunks[chunk_id]
+        results.put(("done", worker_id, chunk_id, list(done)))
+
+    def tab(page):
+        while (job := jobs.get()) is not None:
+            chunk_id, index, item = job
+            try:
+                if navigate:
+                    page.goto(item, wait_until, timeout)
+                finish(chunk_id, index, True, fn(page, item))
+            except Exception as er:
+                finish(chunk_id, index, False, "{}: {}".format(type(er).__name__, er))
+
+    try:
+        pages = [browser.new_page() for _ in range(tabs_per_worker)]
+        threads = [threading.Thread(target=tab, args=(page,), daemon=True) for page in pages]
+        for thread in threads:
+            thread.start()
+        results.put(("ready", worker_id, None, (browser.pid, browser.temp_dir)))
+
+        while (message := tasks.get()) is not None:
+            chunk_id, items = message
+            with lock:
+                chunks[chunk_id] = Chunk(items)
+            for index, item in items:
+                jobs.put((chunk_id, index, item))
+
+        for _ in threads:
+            jobs.put(None)
+        for thread in threads:
+            thread.join()
+    finally:
+        browser.close()
+
+
+class Chunk(list):
+    """The results of a chunk being processed by a worker, complete once it holds `size` of them."""
+
+    def __init__(self, items):
+        super().__init__()
+        self.size = len(items)
+
+
+class Worker:
+    """The parent's view of a worker process and the chunks it has in flight."""
+
+    def __init__(self, worker_id: int, process, tasks) -> None:
+        self.id = worker_id
+        self.process = process
+        self.tasks = tasks
+        self.inflight = {}
+        self.deadlines = {}
+        self.ready = False
+        self.browser = None
+        self.completed = 0
+
+    def alive(self) -> bool:
+        return self.process.exitcode is None
+
+
+class ParallelMap:
+    """
+        Maps a function over inputs with a pool of worker processes, each owning a browser.
+
+        Every worker runs its own `Browser` with `tabs_per_worker` tabs, so JSON decoding,
+        the reader threads and `fn` run on all cores instead of under one GIL. Inputs are
+        consumed lazily and sent to the workers in chunks of `chunk_size`, at most `prefetch`
+        chunks per worker at a time, results come back a chunk at a time.
+
+        `fn(page, item)` runs in a worker, after `page.goto(item)` unless `navigate` is False,
+        and must be picklable (defined at module level), as must its results. A failing
+        call yields a `JobError` in place of its result. The chunks of a worker that crashes
+        are requeued on the others, up to `max_retries` times per item, and the worker is
+        replaced, as is a worker holding a chunk for more than `chunk_timeout` seconds after
+        it was sent, e.g. because `fn` hangs. `stats` reports the aggregate throughput.
+
+        Usage:
+            def title(page, url):
+                return page.execute_script("document.title")
+
+            if __name__ == "__main__":
+                for result in ParallelMap(title, workers=8, tabs_per_worker=4).run(urls):
+                    print(result)
+    """
+
+    def __init__(
+            self,
+            fn,
+            workers: int = None,
+            tabs_per_worker: int = 4,
+            ordered: bool = True,
+            chunk_size: int = 8,
+            prefetch: int = 2,
+            max_retries: int = 2,
+            navigate: bool = True,
+            wait_until: str = "load",
+            timeout: float = 30,
+            chunk_timeout: float = 600,
+            browser_kwargs: dict = None
+        ) -> None:
+        self.fn = fn
+        self.workers = workers or multiprocessing.cpu_count()
+        self.tabs_per_worker = tabs_per_worker
+        self.ordered = ordered
+        self.chunk_size = chunk_size
+        self.prefetch = prefetch
+        self.max_retries = max_retries
+        self.navigate = navigate
+        self.wait_until = wait_until
+        self.timeout = timeout
+        self.chunk_timeout = chunk_timeout
+        self.browser_kwargs = dict(browser_kwargs or {})
+        self.context = multiprocessing.get_context("spawn")
+        self.pool = {}
+        self.ids = 0
+        self.chunk_ids = 0
+        self.started = None
+        self.startup_failures = 0
+        self.last_failure = None
+        self.counts = {"completed": 0, "failed": 0, "requeued": 0, "crashes": 0}
+
+    def spawn(self, results) -> Worker:
+        """Starts a worker process."""
+        self.ids += 1
+        tasks = self.context.Queue()
+        process = self.context.Process(
+            target=run_worker,
+            args=(self.ids, self.fn, tasks, results, self.tabs_per_worker, self.browser_kwargs,
+                  self.navigate, self.wait_until, self.timeout),
+            daemon=True
+        )
+        process.start()
+        worker = self.pool[self.ids] = Worker(self.ids, process, tasks)
+        return worker
+
+    def stats(self) -> dict:
+        """Aggregate progress and throughput of the run."""
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        return dict(
+            self.counts,
+            workers=sum(worker.ready for worker in self.pool.values()),
+            elapsed=elapsed,
+            items_per_sec=self.counts["completed"] / elapsed if elapsed else 0.0,
+            per_worker={worker.id: worker.completed for worker in self.pool.values()}
+        )
+
+    def run(self, inputs):
+        """Yields the result of every input, in input order when `ordered`, as they finish otherwise."""
+        self.started = time.perf_counter()
+        results = self.context.Queue()
+        source = enumerate(inputs)
+        exhausted = False
+        retry = deque()
+        attempts = {}
+        finished = {}
+        next_index = 0
+
+        for _ in range(self.workers):
+            self.spawn(results)
+
+        try:
+            while True:
+                # Hand chunks to every worker with room for them, requeued items first.
+                for worker in list(self.pool.values()):
+                    while worker.ready and len(worker.inflight) < self.prefetch:
+                        items = []
+                        while len(items) < self.chunk_size and retry:
+                            items.append(retry.popleft())
+                        while len(items) < self.chunk_size and not exhausted:
+                            try:
+                                items.append(next(source))
+                            except StopIteration:
+                                exhausted = True
+                        if not items:
+                            break
+                        self.chunk_ids += 1
+                        worker.inflight[self.chunk_ids] = items
+                        worker.deadlines[self.chunk_ids] = time.perf_counter() + self.chunk_timeout
+                        worker.tasks.put((self.chunk_ids, items))
+
+                if exhausted and not retry and not any(worker.inflight for worker in self.pool.values()):
+                    break
+
+                try:
+                    kind, worker_id, chunk_id, payload = results.get(timeout=0.2)
+                except queue.Empty:
+                    kind = None
+
+                outputs = []
+                if kind == "ready":
+                    self.pool[worker_id].ready = True
+                    self.pool[worker_id].browser = payload
+                elif kind == "failed":
+                    # The worker exits next and is replaced like a crashed one.
+                    self.last_failure = payload
+                elif kind == "done" and worker_id in self.pool:
+                    worker = self.pool[worker_id]
+                    worker.inflight.pop(chunk_id, None)
+                    worker.deadlines.pop(chunk_id, None)
+                    worker.completed += len(payload)
+                    for index, ok, value in payload:
+                        outputs.append((index, value if ok else JobError(value)))
+                        self.counts["completed" if ok else "failed"] += 1
+
+                now = time.perf_counter()
+                for worker in [worker for worker in self.pool.values() if worker.alive() and any(deadline < now for deadline in worker.deadlines.values())]:
+                    logger.warning("Worker %s timed out on a chunk, terminating it", worker.id)
+                    worker.process.terminate()
+                    worker.process.join(5)
+                    if worker.alive():
+                        worker.process.kill()
+                        worker.process.join()
+
+                for worker in [worker for worker in self.pool.values() if not worker.alive()]:
+                    outputs.extend(self.on_crash(worker, results, retry, attempts))
+
+                for index, value in outputs:
+                    if not self.ordered:
+                        yield value
+                        continue
+                    finished[index] = value
+                    while next_index in finished:
+                        yield finished.pop(next_index)
+                        next_index += 1
+        finally:
+            self.shutdown()
+
+    def on_crash(self, worker: Worker, results, retry: deque, attempts: dict) -> list:
+        """Requeues the chunks of a dead worker, fails items out of retries and replaces it."""
+        self.counts["crashes"] += 1
+        del self.pool[worker.id]
+        if not worker.ready:
+            self.startup_failures += 1
+            if self.startup_failures > self.workers:
+                raise LaunchError("Workers failed to start: {}".format(self.last_failure or "exit code {}".format(worker.process.exitcode)))
+        logger.warning("Worker %s exited with code %s, requeueing %s chunks", worker.id, worker.process.exitcode, len(worker.inflight))
+        if worker.browser is not None:
+            pid, profile = worker.browser
+            kill_orphan(pid, profile)
+            try:
+                remove_profile(profile, attempts=1)
+            except OSError:
+                pass
+
+        failed = []
+        for items in worker.inflight.values():
+            for index, item in items:
+                attempts[index] = attempts.get(index, 0) + 1
+                if attempts[index] > self.max_retries:
+                    failed.append((index, JobError("The worker crashed {} times on this item".format(attempts[index]))))
+                    self.counts["failed"] += 1
+                else:
+                    retry.append((index, item))
+                    self.counts["requeued"] += 1
+
+        self.spawn(results)
+        return failed
+
+    def shutdown(self, timeout: float = 10):
+        """Stops every worker, terminating the ones that do not exit in time."""
+        for worker in self.pool.values():
+            if worker.alive():
+                worker.tasks.put(None)
+        deadline = time.perf_counter() + timeout
+        for worker in self.pool.values():
+            worker.process.join(max(0, deadline - time.perf_counter()))
+            if worker.alive():
+                worker.process.terminate()
+                worker.process.join()
+
+
+def map(fn, inputs, workers: int = None, tabs_per_worker: int = 4, ordered: bool = True, **kwargs):
+    """
+    Maps `fn(page, item)` over the inputs (URLs, unless `navigate=False`) with worker
+    processes each owning a browser, see `ParallelMap`. Yields the results.
+    """
+    return ParallelMap(fn, workers, tabs_per_worker, ordered, **kwargs).run(inputs)
+
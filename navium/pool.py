@@ -0,0 +1,178 @@
+import threading
+from contextlib import contextmanager
+
+from scripts.exceptions import PoolError
+from .browser import Browser
+
+class BrowserPool:
+    """
+        A pool of pre-launched Chromium instances handed out for reuse.
+
+        Keeps at least `min_size` browsers warm and launches up to `max_size` on
+        demand. Browsers are reset when released (cookies, cache, storage and extra
+        tabs cleared, main page back to `about:blank`) and recycled after `max_uses`
+        jobs or as soon as they stop being healthy, their replacements launch in the background.
+
+        Usage:
+            with BrowserPool(min_size=2, max_size=8, headless=True) as pool:
+                with pool.browser() as browser:
+                    page = browser.goto("https://example.com/")
+    """
+
+    def __init__(
+            self,
+            min_size: int = 1,
+            max_size: int = 4,
+            max_uses: int = 100,
+            **browser_kwargs
+        ) -> None:
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Expected 0 <= min_size <= max_size and max_size >= 1")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.browser_kwargs = browser_kwargs
+        self.idle = []
+        self.uses = {}
+        self.launching = 0
+        self.failure = None
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def size(self) -> int:
+        """The number of browsers owned by the pool, including the ones being launched."""
+        return len(self.uses) + self.launching
+
+    def launch(self) -> Browser:
+        """Launches a new browser owned by the pool."""
+        try:
+            browser = Browser(**self.browser_kwargs)
+            browser.start()
+        except Exception:
+            with self.condition:
+                self.launching -= 1
+                self.condition.notify()
+            raise
+
+        with self.condition:
+            self.launching -= 1
+            self.uses[browser] = 0
+        return browser
+
+    def fill(self):
+        """Launches browsers in parallel until the pool holds `min_size` of them."""
+        with self.condition:
+            missing = max(self.min_size - self.size, 0)
+            self.launching += missing
+
+        def warm():
+            try:
+                browser = self.launch()
+            except Exception as er:
+                # Kept for the next `acquire`, which would otherwise wait for a browser in vain.
+                with self.condition:
+                    self.failure = er
+                    self.condition.notify_all()
+                return
+            with self.condition:
+                self.idle.append(browser)
+                self.condition.notify()
+
+        threads = [threading.Thread(target=warm, daemon=True) for _ in range(missing)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def raise_failure(self):
+        """Raises the last failure of a background launch, once. Called with the condition held."""
+        failure, self.failure = self.failure, None
+        if failure is not None:
+            raise failure
+
+    def start(self):
+        """Warms up the pool, raising if a browser failed to launch and none is ready."""
+        self.fill()
+        with self.condition:
+            if not self.idle:
+                self.raise_failure()
+
+    def acquire(self, timeout: float = None) -> Browser:
+        """Takes a browser out of the pool, launching one if none is idle and the pool isn't full."""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.closed or self.idle or self.failure or self.size < self.max_size, timeout):
+                raise PoolError("No browser became available in time")
+            if self.closed:
+                raise PoolError("The pool is closed")
+            if not self.idle:
+                self.raise_failure()
+
+            if self.idle:
+                return self.idle.pop()
+            self.launching += 1
+
+        return self.launch()
+
+    def release(self, browser: Browser):
+        """Returns a browser to the pool, resetting or recycling it."""
+        with self.condition:
+            self.uses[browser] += 1
+            worn = self.uses[browser] >= self.max_uses
+
+        if not self.closed and not worn:
+            try:
+                healthy = browser.is_alive()
+                if healthy:
+                    browser.reset()
+            except Exception:
+                # Whatever went wrong, the browser is retired rather than lost to the pool.
+                healthy = False
+            if healthy:
+                with self.condition:
+                    self.idle.append(browser)
+                    self.condition.notify()
+                return
+
+        self.retire(browser)
+        if not self.closed:
+            # The releasing caller does not wait for the replacement to launch.
+            threading.Thread(target=self.fill, daemon=True).start()
+
+    def retire(self, browser: Browser):
+        """Closes a browser and removes it from the pool."""
+        with self.condition:
+            self.uses.pop(browser, None)
+            self.condition.notify()
+
+        try:
+            browser.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def browser(self, timeout: float = None):
+        """Context manager acquiring a browser and releasing it on exit."""
+        browser = self.acquire(timeout)
+        try:
+            yield browser
+        finally:
+            self.release(browser)
+
+    def close(self):
+        """Closes every idle browser, browsers still in use are closed when released."""
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.condition.notify_all()
+
+        for browser in idle:
+            self.retire(browser)
@@ -0,0 +1,7 @@
+"""
+Browser-free doubles for load-testing and benchmarking Navium itself: a fake DevTools
+endpoint, and recording / replay of real sessions.
+"""
+
+from scripts.fake_cdp import FakeCDPServer, FakeError
+from scripts.recording import Recorder, ReplayTransport
@@ -1,12 +1,28 @@
 import httpx
 
 class HTTPClient(object):
+    """
+    Talks to the DevTools HTTP endpoints, reusing one connection across requests.
+    """
     def __init__(self, port: int) -> None:
         self.host = "http://localhost"
         self.port = port
+        self.client = None
 
     def exec_request(self, endpoint):
-        with httpx.Client() as client:
-            response = client.request("GET", "{}:{}{}".format(self.host, self.port, endpoint))
+        if self.client is None:
+            self.client = httpx.Client()
+        response = self.client.request("GET", "{}:{}{}".format(self.host, self.port, endpoint))
+        response.raise_for_status()
+        return response.json()
+
+    async def exec_request_async(self, endpoint):
+        async with httpx.AsyncClient() as client:
+            response = await client.request("GET", "{}:{}{}".format(self.host, self.port, endpoint))
             response.raise_for_status()
-            return response.json()
\ No newline at end of file
+            return response.json()
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
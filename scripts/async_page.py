@@ -0,0 +1,254 @@
+import asyncio
+import io
+import time
+from PIL import Image
+from .cache import ResponseCache
+from .batch import AsyncBatch
+from .element import AsyncElementHandle
+from .exceptions import ProtocolError, ScriptError
+from .network import AsyncRouter, Rule
+from .screencast import AsyncScreencast
+from .stream import AsyncStream, open_output, pdf_params, read_stream_async
+from .watch import SELECTOR_PREDICATE, SELECTOR_STATES, AsyncWatch, context_lost, wait_command, wait_result
+from .page import PageCommands, full_page_clip, save_image, screenshot_params, write_output
+
+class AsyncPage(PageCommands):
+    """
+    asyncio counterpart of `Page`, every command is a coroutine.
+    """
+    handle_class = AsyncElementHandle
+    router_class = AsyncRouter
+    batch_class = AsyncBatch
+    stream_class = AsyncStream
+
+    async def goto(self, url, wait_until: str = "load", timeout: float = 30):
+        """
+        Navigates this page to the desired URL and waits until `wait_until` is reached:
+        `commit`, `domcontentloaded`, `load` or `networkidle`.
+        """
+        await self.session.goto(url, wait_until, timeout)
+        return self
+
+    async def close(self):
+        """Closes this page."""
+        await self.runtime.close_session(self.session)
+
+    async def route(self, url_pattern: str, handler, resource_types: list = None):
+        """
+        Calls `handler(route)` for every request matching the URL pattern (`*` and `?`
+        wildcards) and resource types, the handler continues, fulfills or aborts the
+        `Route`, requests it leaves alone are continued. Other requests never leave the browser.
+        """
+        self.router.add(Rule(url_pattern, resource_types, handler))
+        await self.session.execute_command(cdp_obj=self.router.command())
+
+    async def unroute(self, url_pattern: str):
+        """Removes the routes and blocks set up for the URL pattern."""
+        self.router.remove(url_pattern)
+        await self.session.execute_command(cdp_obj=self.router.command())
+
+    async def block(self, resource_types: list = None, url_patterns: list = None):
+        """
+        Aborts requests of the given resource types (e.g. `image`, `font`, `media`,
+        `stylesheet`) and requests whose URL matches any of the patterns.
+        """
+        if resource_types:
+            self.router.add(Rule("*", resource_types))
+        for url_pattern in url_patterns or ():
+            self.router.add(Rule(url_pattern))
+        await self.session.execute_command(cdp_obj=self.router.command())
+
+    async def use_cache(self, cache: ResponseCache):
+        """Answers this page's requests from a shared `ResponseCache`, storing what it misses."""
+        self.router.cache = cache
+        await self.session.execute_command(cdp_obj=self.router.command())
+
+    async def execute_script(self, expression: str, returnValue: bool = True, awaitPromise: bool = True):
+        """Executes a JS script in the browser environment."""
+        results = await self.session.execute_command(cdp_obj=self.evaluate_command(expression, returnValue, awaitPromise))
+        return results.get("result", {}).get("value", "")
+
+    async def call_function(self, declaration: str, *args, returnValue: bool = True, awaitPromise: bool = True):
+        """
+        Calls a JS function in the page's main frame with JSON-serialisable arguments or element
+        handles, which are passed as values rather than interpolated into the source.
+        """
+        results = await self.session.execute_command(
+            cdp_obj=self.function_command(declaration, args, returnValue, awaitPromise)
+        )
+        return results.get("result", {}).get("value", "")
+
+    async def query(self, css_selector: str, cached: bool = True):
+        """
+        Returns a handle to the first element matching the selector, or None.
+
+        Handles are cached per selector until the page navigates, pass `cached=False`
+        to match the selector again after the DOM changed.
+        """
+        key = ("query", css_selector)
+        if cached and key in self.session.handles:
+            return self.session.handles[key]
+
+        handle = self.to_handle(await self.session.execute_command(cdp_obj=self.query_command(css_selector)))
+        if handle is not None:
+            self.session.handles[key] = handle
+        return handle
+
+    async def query_handles(self, css_selector: str, cached: bool = True) -> list:
+        """Returns handles to every element matching the selector, cached like `query`."""
+        key = ("query_all", css_selector)
+        if cached and key in self.session.handles:
+            return self.session.handles[key]
+
+        results = await self.session.execute_command(cdp_obj=self.query_command(css_selector, all=True))
+        command = self.properties_command(results)
+        if command is None:
+            return []
+
+        handles = self.to_handles(await self.session.execute_command(cdp_obj=command))
+        self.session.handles[key] = handles
+        return handles
+
+    async def release_handles(self):
+        """Releases every remote object held by this page and empties the handle cache."""
+        await self.session.execute_command(cdp_obj=self.release_command())
+
+    async def get_texts(self, css_selectors: list) -> list:
+        """Retrieves the text content of many elements in one round trip, a `ScriptError` stands in for missing ones."""
+        batch = self.batch()
+        for css_selector in css_selectors:
+            batch.text(css_selector)
+        return await batch.run()
+
+    async def query_all(self, css_selector: str, fields: list = None) -> list:
+        """
+        Returns handles to every element matching the selector, or, when `fields` are given,
+        reads them from every element in one round trip as one dict per element.
+        Fields are element properties, or attributes when prefixed with `@`.
+        """
+        if fields is None:
+            return await self.query_handles(css_selector)
+
+        result, = await self.batch().query_all(css_selector, fields).run()
+        if isinstance(result, ScriptError):
+            raise result
+        return result
+
+    async def click(self, selector):
+        """Clicks on an element identified by its css-selector."""
+        return await self.call_function("function (s) { document.querySelector(s).click(); }", selector, returnValue=False)
+
+    async def fill_text(self, css_selector, text):
+        """Fills text in input fields."""
+        return await self.call_function("function (s, text) { document.querySelector(s).value = text; }", css_selector, text, returnValue=False)
+
+    async def get_text(self, css_selector: str) -> str:
+        """Retrieves the text content of an element identified by its CSS selector."""
+        return await self.call_function("function (s) { return document.querySelector(s).textContent; }", css_selector)
+
+    async def get_input_value(self, css_selector: str) -> str:
+        """Retrieves the current value of an input field."""
+        return await self.call_function("function (s) { return document.querySelector(s).value; }", css_selector)
+
+    async def scroll_to(self, css_selector: str):
+        """Scrolls to an element identified by its CSS selector."""
+        await self.call_function("function (s) { document.querySelector(s).scrollIntoView(); }", css_selector, returnValue=False)
+
+    async def clear_input(self, css_selector: str):
+        """Clears the value of an input field identified by its CSS selector."""
+        await self.fill_text(css_selector, "")
+
+    async def get_page_url(self):
+        return await self.execute_script("document.URL")
+
+    async def metrics(self) -> dict:
+        """Returns the page's `Performance.getMetrics` snapshot as a name to value dict."""
+        if not self.session.performance:
+            await self.session.execute_command(cdp_obj={"method": "Performance.enable"})
+            self.session.performance = True
+
+        result = await self.session.execute_command(cdp_obj={"method": "Performance.getMetrics"})
+        return {metric["name"]: metric["value"] for metric in result.get("metrics", [])}
+
+    async def screenshot(
+            self,
+            format: str = "png",
+            quality: int = None,
+            clip: dict = None,
+            full_page: bool = False,
+            path: str = None
+        ) -> bytes:
+        """Captures the page and returns the encoded image bytes, see `Page.screenshot` for the options."""
+        params = screenshot_params(format, quality, clip)
+        if full_page and clip is None:
+            full_page_clip(params, await self.session.execute_command(cdp_obj={"method": "Page.getLayoutMetrics"}))
+
+        result = await self.session.execute_command(cdp_obj={
+            "method": "Page.captureScreenshot",
+            "params": params
+        })
+        return save_image(result, path)
+
+    async def take_screenshot(self, *args, **kwargs) -> Image.Image:
+        """Takes a screenshot of the current page as a PIL image, see `screenshot` for the options."""
+        return Image.open(io.BytesIO(await self.screenshot(*args, **kwargs)))
+
+    async def watch(self, fields, debounce: int = 50) -> AsyncWatch:
+        """Watches selectors and yields only the fields that changed, see `Page.watch`."""
+        return await AsyncWatch(self, fields, debounce).start()
+
+    async def wait_for_function(self, source: str, *args, timeout: float = 30, polling="raf"):
+        """Waits until a JS function returns a truthy value and returns it, see `Page.wait_for_function`."""
+        deadline = time.perf_counter() + timeout
+        while (remaining := deadline - time.perf_counter()) > 0:
+            try:
+                results = await self.session.execute_command(
+                    cdp_obj=wait_command(self, source, args, polling, remaining),
+                    timeout=remaining + 5
+                )
+            except ProtocolError as er:
+                if not context_lost(str(er)):
+                    raise
+                results = None
+            done, value = wait_result(results)
+            if done:
+                return value
+            await asyncio.sleep(0.05)
+        raise TimeoutError("The condition was not met in time")
+
+    async def wait_for_selector(self, css_selector: str, state: str = "visible", timeout: float = 30):
+        """Waits until an element matching the selector is in the given state, see `Page.wait_for_selector`."""
+        if state not in SELECTOR_STATES:
+            raise ValueError("state must be one of {}".format(", ".join(SELECTOR_STATES)))
+
+        await self.wait_for_function(SELECTOR_PREDICATE, css_selector, state, timeout=timeout, polling=SELECTOR_STATES[state])
+        if state in ("attached", "visible"):
+            return await self.query(css_selector, cached=False)
+
+    async def pdf(self, output=None, chunk_size: int = 1 << 20, **options):
+        """Prints the page to PDF, streamed to `output` or returned as bytes, see `Page.pdf`."""
+        file, owned = open_output(output)
+        try:
+            result = await self.session.execute_command(cdp_obj={"method": "Page.printToPDF", "params": pdf_params(options)}, timeout=120)
+            await read_stream_async(self.session, result["stream"], file, chunk_size)
+        finally:
+            if owned:
+                file.close()
+        return file.getvalue() if output is None else None
+
+    async def snapshot_mhtml(self, output=None):
+        """Captures the page as an MHTML archive, written to `output` or returned as bytes."""
+        result = await self.session.execute_command(cdp_obj={"method": "Page.captureSnapshot", "params": {"format": "mhtml"}}, timeout=120)
+        return write_output(result["data"].encode(), output)
+
+    async def screencast(
+            self,
+            format: str = "jpeg",
+            quality: int = 80,
+            max_width: int = None,
+            max_height: int = None,
+            every_nth_frame: int = 1,
+            buffer_size: int = 2
+        ) -> AsyncScreencast:
+        """Starts streaming frames of the page, see `AsyncScreencast`."""
+        return await AsyncScreencast(self, format, quality, max_width, max_height, every_nth_frame, buffer_size).start()
@@ -0,0 +1,161 @@
+import asyncio
+from .events import AsyncEventBus
+from .runtime import Runtime
+from .session import Session
+from .sockets import AsyncWebSocket
+
+class AsyncSession(Session):
+    """
+    asyncio counterpart of `Session`.
+    """
+
+    async def execute_command(self, cdp_obj, timeout: float = 15):
+        """
+        Sends a command on this session and waits for its result.
+        """
+        try:
+            await asyncio.wait_for(self.attach_ready.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            raise TimeoutError("Attach Failed")
+
+        future = self.send_command(cdp_obj)
+        return await self.runtime.retrieve_command_results(future.command_id, future, timeout)
+
+    async def goto(self, url: str, wait_until: str = "load", timeout: float = 30):
+        """
+        Navigates the page and waits until the navigation reaches `wait_until`:
+        `commit`, `domcontentloaded`, `load` or `networkidle`.
+        """
+        try:
+            await asyncio.wait_for(self.attach_ready.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            raise TimeoutError("Attach Failed")
+
+        future, milestone = self.navigate(url, wait_until)
+        result = await self.runtime.retrieve_command_results(future.command_id, future, timeout)
+        event = self.on_navigated(result, milestone)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError("Navigation to {} did not reach {} in time".format(url, wait_until))
+
+
+class AsyncRuntime(Runtime):
+    """
+    asyncio counterpart of `Runtime`.
+
+    Shares the command correlation and message routing of `Runtime`, but reads
+    and writes on the running event loop instead of a daemon thread, so many
+    sessions can be driven from one loop without a thread per blocked caller.
+    Must be created and used from within the event loop.
+
+    Parameters:
+    ----------
+    ws : str
+        The WebSocket URL for the Chromium browser.
+    page_id : str, optional
+        The ID of the page to interact with, the browser's first page when omitted.
+    """
+    session_class = AsyncSession
+    event_type = asyncio.Event
+    event_bus_class = AsyncEventBus
+
+    def __init__(
+            self,
+            ws: str,
+            page_id: str = None,
+            event_queue_size: int = 10000,
+            event_policy: str = "drop_oldest",
+            codec: str = None,
+            instrumentation=None
+        ):
+        self.ws = AsyncWebSocket(
+            url=ws,
+            runtime=self
+        )
+        self.init_state(event_queue_size, event_policy, codec, instrumentation)
+        self.page_id = page_id
+        self.main = None
+
+    async def connect(self):
+        """
+        Opens the WebSocket connection and attaches to the page.
+        """
+        await self.ws.connect()
+        self.main = self.session_class(self, self.page_id or await self.find_page())
+        self.attach(self.main)
+
+    async def find_page(self, timeout: float = 15) -> str:
+        """
+        Returns the target ID of the browser's first page, opening one if there is none.
+        """
+        future = self.send_command({"method": "Target.getTargets"}, session_id=None)
+        for target in (await self.retrieve_command_results(future.command_id, future, timeout))["targetInfos"]:
+            if target["type"] == "page":
+                return target["targetId"]
+
+        future = self.send_command({
+            "method": "Target.createTarget",
+            "params": {
+                "url": "about:blank"
+            }
+        }, session_id=None)
+        return (await self.retrieve_command_results(future.command_id, future, timeout))["targetId"]
+
+    async def retrieve_command_results(self, command_id, future, timeout: float = 15):
+        """
+        Waits for the results of a command with the given command ID.
+        """
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.discard_command(command_id)
+            raise TimeoutError("results Timed out")
+
+    async def execute_command(self, cdp_obj, timeout: float = 15):
+        """
+        Sends a DevTools Protocol command to the main page and waits for its result.
+        """
+        return await self.main.execute_command(cdp_obj, timeout)
+
+    async def new_session(self, url: str = "about:blank", timeout: float = 15) -> AsyncSession:
+        """
+        Opens a new page in the browser and attaches a session to it.
+        """
+        future = self.send_command({
+            "method": "Target.createTarget",
+            "params": {
+                "url": url
+            }
+        }, session_id=None)
+        result = await self.retrieve_command_results(future.command_id, future, timeout)
+
+        session = self.session_class(self, result["targetId"])
+        self.attach(session)
+        try:
+            await asyncio.wait_for(session.attach_ready.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            raise TimeoutError("Attach Failed")
+
+        session.loaded.set()
+        return session
+
+    async def close_session(self, session: AsyncSession, timeout: float = 15):
+        """
+        Closes the page of the given session.
+        """
+        future = self.send_command({
+            "method": "Target.closeTarget",
+            "params": {
+                "targetId": session.target_id
+            }
+        }, session_id=None)
+        await self.retrieve_command_results(future.command_id, future, timeout)
+        self.forget(session)
+
+    async def close(self):
+        """
+        Closes the WebSocket connection.
+        """
+        await self.ws.close()
@@ -0,0 +1,125 @@
+from .exceptions import ScriptError
+
+BATCH_FUNCTION = """function (ops) {
+    const find = (selector) => {
+        const el = document.querySelector(selector);
+        if (el === null) throw new Error("No element matches selector " + selector);
+        return el;
+    };
+    const read = (el, field) => field.startsWith("@") ? el.getAttribute(field.slice(1)) : el[field];
+    const run = {
+        text: (op) => find(op.selector).textContent,
+        value: (op) => find(op.selector).value,
+        html: (op) => find(op.selector).innerHTML,
+        attribute: (op) => find(op.selector).getAttribute(op.name),
+        exists: (op) => document.querySelector(op.selector) !== null,
+        count: (op) => document.querySelectorAll(op.selector).length,
+        click: (op) => { find(op.selector).click(); return null; },
+        fill: (op) => { find(op.selector).value = op.text; return null; },
+        scroll: (op) => { find(op.selector).scrollIntoView(); return null; },
+        query_all: (op) => Array.from(document.querySelectorAll(op.selector), (el) => {
+            const row = {};
+            for (const field of op.fields) row[field] = read(el, field);
+            return row;
+        })
+    };
+    return ops.map((op) => {
+        try {
+            return [true, run[op.op](op)];
+        } catch (e) {
+            return [false, String(e && e.message || e)];
+        }
+    });
+}"""
+
+class Batch:
+    """
+    Collects DOM operations and runs them all in one round trip.
+
+    Operations are compiled to JSON and handed to a single in-page function through
+    `Runtime.callFunctionOn`, selectors and values are passed as arguments and never
+    interpolated into JavaScript. `run` returns one entry per operation in order, a
+    failing operation yields a `ScriptError` in its slot instead of failing the batch.
+
+    Usage:
+        batch = page.batch()
+        batch.text("h1").attribute("a.next", "href").count("li")
+        title, next_url, items = batch.run()
+    """
+
+    def __init__(self, page) -> None:
+        self.page = page
+        self.ops = []
+
+    def __len__(self):
+        return len(self.ops)
+
+    def add(self, op: str, selector: str, **params):
+        self.ops.append(dict(params, op=op, selector=selector))
+        return self
+
+    def text(self, css_selector: str):
+        """Reads the text content of an element."""
+        return self.add("text", css_selector)
+
+    def value(self, css_selector: str):
+        """Reads the current value of an input field."""
+        return self.add("value", css_selector)
+
+    def html(self, css_selector: str):
+        """Reads the inner HTML of an element."""
+        return self.add("html", css_selector)
+
+    def attribute(self, css_selector: str, name: str):
+        """Reads an attribute of an element."""
+        return self.add("attribute", css_selector, name=name)
+
+    def exists(self, css_selector: str):
+        """Checks whether an element matches the selector."""
+        return self.add("exists", css_selector)
+
+    def count(self, css_selector: str):
+        """Counts the elements matching the selector."""
+        return self.add("count", css_selector)
+
+    def click(self, css_selector: str):
+        """Clicks on an element."""
+        return self.add("click", css_selector)
+
+    def fill(self, css_selector: str, text: str):
+        """Fills text in an input field."""
+        return self.add("fill", css_selector, text=text)
+
+    def scroll_to(self, css_selector: str):
+        """Scrolls to an element."""
+        return self.add("scroll", css_selector)
+
+    def query_all(self, css_selector: str, fields: list = ("textContent",)):
+        """
+        Reads fields of every element matching the selector, as one dict per element.
+        Fields are element properties, or attributes when prefixed with `@` (e.g. `@href`).
+        """
+        return self.add("query_all", css_selector, fields=list(fields))
+
+    def parse(self, results) -> list:
+        if not isinstance(results, list):
+            raise ScriptError("The batch failed to run in the page")
+        return [value if ok else ScriptError(value) for ok, value in results]
+
+    def run(self) -> list:
+        """Runs every collected operation in a single round trip."""
+        if not self.ops:
+            return []
+        return self.parse(self.page.call_function(BATCH_FUNCTION, self.ops))
+
+
+class AsyncBatch(Batch):
+    """
+    asyncio counterpart of `Batch`.
+    """
+
+    async def run(self) -> list:
+        """Runs every collected operation in a single round trip."""
+        if not self.ops:
+            return []
+        return self.parse(await self.page.call_function(BATCH_FUNCTION, self.ops))
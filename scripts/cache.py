@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from .network import resource_type
+
+MAX_AGE = re.compile(r"max-age\s*=\s*(\d+)")
+PRIVATE = re.compile(r"\b(no-store|no-cache|private)\b")
+# Never replayed: cookies belong to the session that received them.
+STRIPPED_HEADERS = frozenset(("content-encoding", "content-length", "transfer-encoding", "set-cookie"))
+
+def vary_names(headers: dict) -> list:
+    """The request headers a response varies on, from its `Vary` header (lowercase keys)."""
+    return sorted({name.strip().lower() for name in headers.get("vary", "").split(",") if name.strip()})
+
+def variant(request: dict, names: list) -> dict:
+    """The values of the given headers in a request."""
+    headers = {name.lower(): value for name, value in request.get("headers", {}).items()}
+    return {name: headers.get(name, "") for name in names}
+
+def freshness(headers: dict, default_ttl: float) -> float | None:
+    """
+    Returns for how many seconds a response may be served from the cache according to its
+    `Cache-Control` and `Expires` headers, or None when it must not be stored. The cache is
+    shared, so `private` responses and responses setting cookies are never stored.
+    """
+    cache_control = headers.get("cache-control", "").lower()
+    if PRIVATE.search(cache_control) or "set-cookie" in headers or "*" in vary_names(headers):
+        return None
+
+    match = MAX_AGE.search(cache_control)
+    if match:
+        ttl = int(match.group(1))
+    elif "expires" in headers:
+        try:
+            ttl = parsedate_to_datetime(headers["expires"]).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    else:
+        ttl = default_ttl
+
+    return ttl if ttl > 0 else None
+
+
+class CacheEntry:
+    """A cached response."""
+
+    def __init__(self, status: int, headers: dict, body: bytes) -> None:
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class ResponseCache:
+    """
+    An on-disk HTTP response cache shared by every browser, session and process using the
+    same directory, answering requests through `Fetch.fulfillRequest`.
+
+    Bodies are stored content-addressed under `blobs/` so identical assets served from
+    different URLs are kept once, the index lives in a SQLite database which makes the
+    cache safe to share between processes. Entries are keyed by method, URL and the
+    `vary_headers` of the request and only answer requests matching the headers named by
+    the response's `Vary`, they honour `Cache-Control`/`Expires` and the least
+    recently used ones are evicted past `max_size` bytes. Responses that are `private`,
+    set cookies or answer requests carrying `Authorization` are never stored.
+
+    Parameters:
+    ----------
+    path : str
+        The cache directory, created if missing.
+    max_size : int
+        The size cap of the stored bodies in bytes.
+    resource_types : list
+        The resource types served from and stored in the cache.
+    default_ttl : float
+        How long responses without freshness information are kept, 0 not to store them.
+    vary_headers : list
+        The request headers that are part of the key.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            max_size: int = 1 << 30,
+            resource_types: list = ("script", "stylesheet", "font", "image"),
+            default_ttl: float = 0,
+            vary_headers: list = ("accept", "accept-language")
+        ) -> None:
+        self.path = path
+        self.blobs = os.path.join(path, "blobs")
+        os.makedirs(self.blobs, exist_ok=True)
+
+        self.max_size = max_size
+        self.resource_types = [resource_type(name) for name in resource_types]
+        self.default_ttl = default_ttl
+        self.vary_headers = [name.lower() for name in vary_headers]
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "bytes_served": 0}
+
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(path, "index.sqlite"), timeout=30, check_same_thread=False)
+        with self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, digest TEXT NOT NULL, size INTEGER NOT NULL, status INTEGER NOT NULL, "
+                "headers TEXT NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL, vary TEXT NOT NULL DEFAULT '{}')"
+            )
+            if "vary" not in [column[1] for column in self.db.execute("PRAGMA table_info(entries)")]:
+                self.db.execute("ALTER TABLE entries ADD COLUMN vary TEXT NOT NULL DEFAULT '{}'")
+            self.db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def patterns(self) -> list:
+        """The `Fetch.RequestPattern`s pausing the requests the cache may answer."""
+        return [{"urlPattern": "*", "resourceType": name, "requestStage": "Request"} for name in self.resource_types]
+
+    def shareable(self, request: dict) -> bool:
+        """Whether a request may be answered from or stored in a shared cache, never with credentials."""
+        return request["method"] == "GET" and not any(name.lower() == "authorization" for name in request.get("headers", {}))
+
+    def key(self, request: dict) -> str:
+        headers = {name.lower(): value for name, value in request.get("headers", {}).items()}
+        parts = [request["method"], request["url"]] + [headers.get(name, "") for name in self.vary_headers]
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blobs, digest[:2], digest)
+
+    def lookup(self, request: dict) -> CacheEntry | None:
+        """Returns the fresh cached response to the request, if any."""
+        if not self.shareable(request):
+            return None
+
+        key = self.key(request)
+        now = time.time()
+        with self._lock:
+            row = self.db.execute(
+                "SELECT digest, status, headers, expires, vary FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[3] < now or (stored := json.loads(row[4])) != variant(request, list(stored)):
+                self.stats["misses"] += 1
+                return None
+            with self.db:
+                self.db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+
+        try:
+            with open(self.blob_path(row[0]), "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        with self._lock:
+            self.stats["hits"] += 1
+            self.stats["bytes_served"] += len(body)
+        return CacheEntry(row[1], json.loads(row[2]), body)
+
+    def cacheable(self, request: dict, status: int, headers: dict) -> float | None:
+        """Returns the freshness lifetime of a response worth storing, None otherwise."""
+        if not self.shareable(request) or status != 200:
+            return None
+        return freshness({name.lower(): value for name, value in headers.items()}, self.default_ttl)
+
+    def store(self, request: dict, status: int, headers: dict, body: bytes, ttl: float):
+        """Stores a response and evicts the least recently used ones past the size cap."""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Unique across processes, writers of the same blob never share a temporary file.
+            fd, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(body)
+                os.replace(temp, path)
+            except BaseException:
+                os.remove(temp)
+                raise
+
+        vary = variant(request, vary_names({name.lower(): value for name, value in headers.items()}))
+        headers = {name: value for name, value in headers.items() if name.lower() not in STRIPPED_HEADERS}
+        now = time.time()
+        with self._lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.key(request), digest, len(body), status, json.dumps(headers), now + ttl, now, json.dumps(vary))
+            )
+            self.stats["stores"] += 1
+            self.evict()
+
+    def evict(self):
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)").fetchone()[0]
+        if total <= self.max_size:
+            return
+
+        for key, digest, size in self.db.execute("SELECT key, digest, size FROM entries ORDER BY accessed").fetchall():
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.stats["evictions"] += 1
+            if self.db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+                try:
+                    os.remove(self.blob_path(digest))
+                except FileNotFoundError:
+                    pass
+                total -= size
+                if total <= self.max_size:
+                    break
+
+    def clear(self):
+        """Drops every entry and body."""
+        with self._lock, self.db:
+            for (digest,) in self.db.execute("SELECT DISTINCT digest FROM entries").fetchall():
+                try:
+                    os.remove(self.blob_path(digest))
+                except FileNotFoundError:
+                    pass
+            self.db.execute("DELETE FROM entries")
+
+    def close(self):
+        self.db.close()
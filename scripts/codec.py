@@ -0,0 +1,103 @@
+import json
+
+class Codec:
+    """
+    Encodes and decodes DevTools Protocol messages.
+
+    `dumps` returns text ready to be sent, `loads` accepts text or bytes.
+    """
+    name = None
+
+    def dumps(self, obj) -> str:
+        raise NotImplementedError
+
+    def loads(self, data):
+        raise NotImplementedError
+
+
+class JSONCodec(Codec):
+    """The stdlib `json` module, always available."""
+    name = "json"
+
+    def __init__(self) -> None:
+        self.encoder = json.JSONEncoder(separators=(",", ":"))
+        self.decoder = json.JSONDecoder()
+
+    def dumps(self, obj) -> str:
+        return self.encoder.encode(obj)
+
+    def loads(self, data):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data).decode()
+        return self.decoder.decode(data)
+
+
+class OrjsonCodec(Codec):
+    """`orjson`, used when installed."""
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+        self.orjson = orjson
+
+    def dumps(self, obj) -> str:
+        return self.orjson.dumps(obj).decode()
+
+    def loads(self, data):
+        return self.orjson.loads(data)
+
+
+class MsgspecCodec(Codec):
+    """`msgspec`, used when installed and `orjson` isn't."""
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+        self.encoder = msgspec.json.Encoder()
+        self.decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj) -> str:
+        return self.encoder.encode(obj).decode()
+
+    def loads(self, data):
+        return self.decoder.decode(data)
+
+
+CODECS = {codec.name: codec for codec in (OrjsonCodec, MsgspecCodec, JSONCodec)}
+
+def get_codec(name: str = None) -> Codec:
+    """
+    Returns the codec with the given name, or the fastest one installed.
+    """
+    if name is not None:
+        if name not in CODECS:
+            raise ValueError("codec must be one of {}".format(", ".join(CODECS)))
+        return CODECS[name]()
+
+    for codec in CODECS.values():
+        try:
+            return codec()
+        except ImportError:
+            continue
+
+
+EVENT_PREFIX = '{"method":"'
+EVENT_PREFIX_BYTES = EVENT_PREFIX.encode()
+
+def peek_method(message) -> str | None:
+    """
+    Reads the method of an event without decoding it.
+
+    Chromium serialises events with `method` as their first key, so the name sits right
+    at the start of the message. Returns None for responses or any other layout.
+    """
+    if isinstance(message, str):
+        if message.startswith(EVENT_PREFIX):
+            end = message.find('"', len(EVENT_PREFIX))
+            if end != -1:
+                return message[len(EVENT_PREFIX):end]
+    elif bytes(message[:len(EVENT_PREFIX_BYTES)]) == EVENT_PREFIX_BYTES:
+        end = message.find(b'"', len(EVENT_PREFIX_BYTES))
+        if end != -1:
+            return bytes(message[len(EVENT_PREFIX_BYTES):end]).decode()
+    return None
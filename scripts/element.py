@@ -0,0 +1,101 @@
+def serialize_argument(arg) -> dict:
+    """Turns a Python value or an `ElementHandle` into a `Runtime.CallArgument`."""
+    if isinstance(arg, ElementHandle):
+        return {"objectId": arg.object_id}
+    return {"value": arg}
+
+
+class ElementHandle:
+    """
+    A reference to an element living in the page, backed by its CDP `RemoteObject` ID.
+
+    Operations run through `Runtime.callFunctionOn` on the element itself, with real
+    argument passing, so repeated interactions skip selector matching and never build
+    JavaScript from strings. Handles belong to their page's object group, they become
+    invalid on navigation and are freed by `Page.release_handles`.
+    """
+
+    def __init__(self, page, object_id: str) -> None:
+        self.page = page
+        self.object_id = object_id
+
+    def __repr__(self):
+        return f"<ElementHandle {self.object_id}>"
+
+    def call_command(self, declaration: str, args, returnValue: bool, awaitPromise: bool) -> dict:
+        return {
+            "method": "Runtime.callFunctionOn",
+            "params": {
+                "functionDeclaration": declaration,
+                "objectId": self.object_id,
+                "arguments": [serialize_argument(arg) for arg in args],
+                "returnByValue": returnValue,
+                "awaitPromise": awaitPromise,
+                "objectGroup": self.page.session.object_group
+            }
+        }
+
+    def call(self, declaration: str, *args, returnValue: bool = True, awaitPromise: bool = True):
+        """Calls a JS function with the element as `this`."""
+        results = self.page.session.execute_command(
+            cdp_obj=self.call_command(declaration, args, returnValue, awaitPromise)
+        )
+        return results.get("result", {}).get("value", "")
+
+    def text(self) -> str:
+        """Retrieves the text content of the element."""
+        return self.call("function () { return this.textContent; }")
+
+    def value(self) -> str:
+        """Retrieves the current value of the element."""
+        return self.call("function () { return this.value; }")
+
+    def get_attribute(self, name: str) -> str:
+        """Retrieves an attribute of the element."""
+        return self.call("function (name) { return this.getAttribute(name); }", name)
+
+    def get_property(self, name: str):
+        """Retrieves a JSON-serialisable property of the element."""
+        return self.call("function (name) { return this[name]; }", name)
+
+    def click(self):
+        """Clicks on the element."""
+        return self.call("function () { this.click(); }", returnValue=False)
+
+    def fill_text(self, text: str):
+        """Fills text in the element."""
+        return self.call("function (text) { this.value = text; }", text, returnValue=False)
+
+    def scroll_into_view(self):
+        """Scrolls to the element."""
+        return self.call("function () { this.scrollIntoView(); }", returnValue=False)
+
+    def query(self, css_selector: str):
+        """Returns a handle to the first descendant matching the selector, or None."""
+        results = self.page.session.execute_command(
+            cdp_obj=self.call_command("function (s) { return this.querySelector(s); }", (css_selector,), False, True)
+        )
+        return self.page.to_handle(results)
+
+
+class AsyncElementHandle(ElementHandle):
+    """
+    asyncio counterpart of `ElementHandle`, every operation is a coroutine.
+    """
+
+    def __repr__(self):
+        return f"<AsyncElementHandle {self.object_id}>"
+
+    async def call(self, declaration: str, *args, returnValue: bool = True, awaitPromise: bool = True):
+        """Calls a JS function with the element as `this`."""
+        results = await self.page.session.execute_command(
+            cdp_obj=self.call_command(declaration, args, returnValue, awaitPromise)
+        )
+        return results.get("result", {}).get("value", "")
+
+    async def query(self, css_selector: str):
+        """Returns a handle to the first descendant matching the selector, or None."""
+        results = await self.page.session.execute_command(
+            cdp_obj=self.call_command("function (s) { return this.querySelector(s); }", (css_selector,), False, True)
+        )
+        return self.page.to_handle(results)
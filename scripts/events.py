@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger("navium")
+
+POLICIES = ("drop_oldest", "drop_newest", "block")
+
+class EventQueue:
+    """
+    A bounded queue of event params, consumed by iterating over it.
+
+    When full, `policy` decides what happens to a new event: `drop_oldest` evicts the
+    oldest one, `drop_newest` discards the new one and `block` makes the producer wait,
+    which stalls the connection's reader until the consumer catches up. `dropped`
+    counts the discarded events.
+    """
+
+    def __init__(self, maxsize: int = 1000, policy: str = "drop_oldest") -> None:
+        if policy not in POLICIES:
+            raise ValueError("policy must be one of {}".format(", ".join(POLICIES)))
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.items = deque()
+        self.dropped = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, item):
+        with self.condition:
+            if self.closed:
+                return
+            if len(self.items) >= self.maxsize:
+                if self.policy == "drop_newest":
+                    self.dropped += 1
+                    return
+                if self.policy == "drop_oldest":
+                    self.items.popleft()
+                    self.dropped += 1
+                else:
+                    self.condition.wait_for(lambda: self.closed or len(self.items) < self.maxsize)
+                    if self.closed:
+                        return
+            self.items.append(item)
+            self.condition.notify_all()
+
+    def get(self, timeout: float = None):
+        """Takes the next event, raises `TimeoutError` after `timeout` and `StopIteration` once closed."""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.items or self.closed, timeout):
+                raise TimeoutError("No event received in time")
+            if not self.items:
+                raise StopIteration
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    def close(self):
+        """Stops the queue, events already queued can still be consumed."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.get()
+
+
+class AsyncEventQueue:
+    """
+    asyncio counterpart of `EventQueue`, consumed with `async for`.
+    The `block` policy is not available since the producer is the event loop itself.
+    """
+
+    def __init__(self, maxsize: int = 1000, policy: str = "drop_oldest") -> None:
+        if policy not in ("drop_oldest", "drop_newest"):
+            raise ValueError("policy must be either drop_oldest or drop_newest")
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.items = deque()
+        self.dropped = 0
+        self.closed = False
+        self.ready = asyncio.Event()
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, item):
+        if self.closed:
+            return
+        if len(self.items) >= self.maxsize:
+            self.dropped += 1
+            if self.policy == "drop_newest":
+                return
+            self.items.popleft()
+        self.items.append(item)
+        self.ready.set()
+
+    async def get(self):
+        """Takes the next event, raises `StopAsyncIteration` once closed."""
+        while True:
+            self.ready.clear()
+            if self.items:
+                return self.items.popleft()
+            if self.closed:
+                raise StopAsyncIteration
+            await self.ready.wait()
+
+    def close(self):
+        """Stops the queue, events already queued can still be consumed."""
+        self.closed = True
+        self.ready.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+
+class Subscription:
+    """
+    A subscription to one event method, optionally limited to one session.
+    Events go either to `callback` or to `queue`.
+    """
+
+    def __init__(self, method: str, session_id: str = None, callback=None, queue=None) -> None:
+        self.method = method
+        self.session_id = session_id
+        self.callback = callback
+        self.queue = queue
+
+    def __iter__(self):
+        return iter(self.queue)
+
+    def __aiter__(self):
+        return self.queue.__aiter__()
+
+    def matches(self, response) -> bool:
+        return self.session_id is None or self.session_id == response.get("sessionId")
+
+
+class EventBus:
+    """
+    Routes browser events to subscribers by method.
+
+    Publishing happens on the connection's reader thread and never runs user code there:
+    queue subscribers get the params pushed into their own bounded queue, callbacks are
+    handed to a dispatcher thread through a shared bounded queue with the given policy,
+    so a slow consumer cannot hold back command responses unless `block` is chosen.
+    """
+
+    def __init__(self, maxsize: int = 10000, policy: str = "drop_oldest") -> None:
+        self.subscriptions = {}
+        self.pending = EventQueue(maxsize, policy)
+        self.dispatcher = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, method: str) -> bool:
+        return method in self.subscriptions
+
+    def add(self, subscription: Subscription) -> Subscription:
+        with self._lock:
+            subscriptions = self.subscriptions.get(subscription.method, [])
+            self.subscriptions[subscription.method] = subscriptions + [subscription]
+        return subscription
+
+    def remove(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = [s for s in self.subscriptions.get(subscription.method, []) if s is not subscription]
+            if subscriptions:
+                self.subscriptions[subscription.method] = subscriptions
+            else:
+                self.subscriptions.pop(subscription.method, None)
+
+        if subscription.queue is not None:
+            subscription.queue.close()
+
+    def subscribe(self, method: str, callback, session_id: str = None) -> Subscription:
+        """Calls `callback(params)` off the reader thread for every `method` event."""
+        self.start()
+        return self.add(Subscription(method, session_id, callback=callback))
+
+    def queue(self, method: str, maxsize: int = 1000, policy: str = "drop_oldest", session_id: str = None) -> Subscription:
+        """Collects the params of every `method` event into a bounded `EventQueue`."""
+        return self.add(Subscription(method, session_id, queue=EventQueue(maxsize, policy)))
+
+    def publish(self, response):
+        """Hands an event to its subscribers, called on the reader thread."""
+        for subscription in self.subscriptions.get(response["method"], ()):
+            if not subscription.matches(response):
+                continue
+            if subscription.queue is not None:
+                subscription.queue.put(response.get("params", {}))
+            else:
+                self.dispatch(subscription.callback, response.get("params", {}))
+
+    def dispatch(self, callback, params):
+        self.pending.put((callback, params))
+
+    def start(self):
+        """Starts the dispatcher thread running callbacks, once."""
+        with self._lock:
+            if self.dispatcher is None:
+                self.dispatcher = threading.Thread(target=self.run, daemon=True)
+                self.dispatcher.start()
+
+    def run(self):
+        for callback, params in self.pending:
+            try:
+                callback(params)
+            except Exception:
+                logger.exception("Event callback %r failed", callback)
+
+    def close(self):
+        """Stops the dispatcher once queued callbacks ran and closes every queue."""
+        self.pending.close()
+        for subscriptions in list(self.subscriptions.values()):
+            for subscription in subscriptions:
+                if subscription.queue is not None:
+                    subscription.queue.close()
+
+
+class AsyncEventBus(EventBus):
+    """
+    asyncio counterpart of `EventBus`, callbacks are scheduled on the event loop
+    (coroutine functions as tasks) instead of running inside the reader task.
+    """
+
+    def __init__(self, maxsize: int = 10000, policy: str = "drop_oldest") -> None:
+        super().__init__(maxsize, policy)
+        self.tasks = set()
+
+    def queue(self, method: str, maxsize: int = 1000, policy: str = "drop_oldest", session_id: str = None) -> Subscription:
+        """Collects the params of every `method` event into a bounded `AsyncEventQueue`."""
+        return self.add(Subscription(method, session_id, queue=AsyncEventQueue(maxsize, policy)))
+
+    def start(self):
+        pass
+
+    def dispatch(self, callback, params):
+        asyncio.get_running_loop().call_soon(self.run_callback, callback, params)
+
+    def run_callback(self, callback, params):
+        try:
+            result = callback(params)
+            if asyncio.iscoroutine(result):
+                task = asyncio.ensure_future(result)
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+        except Exception:
+            logger.exception("Event callback %r failed", callback)
+
+    def close(self):
+        for subscriptions in list(self.subscriptions.values()):
+            for subscription in subscriptions:
+                if subscription.queue is not None:
+                    subscription.queue.close()
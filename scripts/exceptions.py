@@ -17,3 +17,27 @@ class WebSocketError(NaviumException):
 class CloseError(NaviumException):
     """Raised when an error occurs when closing the browser instance."""
     pass
+
+class ProtocolError(NaviumException):
+    """Raised when the browser answers a command with a protocol error."""
+
+    def __init__(self, error: dict) -> None:
+        self.code = error.get("code")
+        self.data = error.get("data")
+        super().__init__(error.get("message", "Protocol error"))
+
+class PoolError(NaviumException):
+    """Raised when a browser cannot be acquired from a pool."""
+    pass
+
+class NavigationError(NaviumException):
+    """Raised when the browser fails to navigate to a URL."""
+    pass
+
+class ScriptError(NaviumException):
+    """Raised when a script fails in the page."""
+    pass
+
+class JobError(NaviumException):
+    """Returned in place of the result of a job that failed in a worker process."""
+    pass
@@ -0,0 +1,397 @@
+import base64
+import collections
+import hashlib
+import heapq
+import http.server
+import itertools
+import json
+import socket
+import struct
+import threading
+import time
+from urllib.parse import urlsplit
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+class FakeError(Exception):
+    """Raised by a scripted response to answer the command with a protocol error."""
+
+    def __init__(self, message: str, code: int = -32000):
+        super().__init__(message)
+        self.code = code
+
+
+class Connection:
+    """
+    One WebSocket client of a `FakeCDPServer`.
+
+    Frames are written by a sender thread from a queue ordered by due time, so the
+    server's latency delays every message without reordering them.
+    """
+
+    def __init__(self, server, sock):
+        self.server = server
+        self.sock = sock
+        self.queue = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.sender = threading.Thread(target=self.run_sender, daemon=True)
+        self.sender.start()
+
+    def send(self, message: dict, delay: float = 0.0):
+        """
+        Queues a message, sent after `delay` seconds. Compact separators make events
+        start the way Chromium's do, so `peek_method` recognises them.
+        """
+        data = json.dumps(message, separators=(",", ":")).encode()
+        with self.condition:
+            heapq.heappush(self.queue, (time.perf_counter() + delay, next(self.sequence), data))
+            self.condition.notify()
+
+    def event(self, method: str, params: dict = None, session_id: str = None, delay: float = 0.0):
+        """Queues an event, on a session when `session_id` is given."""
+        message = {"method": method, "params": params or {}}
+        if session_id is not None:
+            message["sessionId"] = session_id
+        self.send(message, delay)
+
+    def run_sender(self):
+        while True:
+            with self.condition:
+                while not self.closed and (not self.queue or self.queue[0][0] > time.perf_counter()):
+                    self.condition.wait(None if not self.queue else self.queue[0][0] - time.perf_counter())
+                if self.closed:
+                    return
+                _, _, data = heapq.heappop(self.queue)
+
+            try:
+                self.sock.sendall(encode_frame(data))
+            except OSError:
+                self.close()
+                return
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+
+def encode_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    """Encodes an unmasked, unfragmented server frame."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack(">BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack(">BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack(">BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+def read_frame(rfile):
+    """Reads one client frame, returns `(fin, opcode, payload)` or None once the socket closes."""
+    head = rfile.read(2)
+    if len(head) < 2:
+        return None
+
+    fin, opcode = head[0] & 0x80, head[0] & 0x0F
+    masked, length = head[1] & 0x80, head[1] & 0x7F
+    if length == 126:
+        length, = struct.unpack(">H", rfile.read(2))
+    elif length == 127:
+        length, = struct.unpack(">Q", rfile.read(8))
+
+    mask = rfile.read(4) if masked else None
+    payload = rfile.read(length)
+    if len(payload) < length:
+        return None
+    if mask is not None and length:
+        key = (mask * (length // 4 + 1))[:length]
+        payload = (int.from_bytes(payload, "little") ^ int.from_bytes(key, "little")).to_bytes(length, "little")
+    return fin, opcode, payload
+
+
+class FakeCDPServer:
+    """
+    An in-process stand-in for Chromium's DevTools endpoint, with no browser behind it.
+
+    It speaks the surface `Runtime` and `HTTPClient` use: a WebSocket at `ws_url` and the
+    `/json/version` and `/json/list` endpoints. Targets, sessions and navigations are
+    simulated, `Target.attachToTarget` emits `Target.attachedToTarget` and `Page.navigate`
+    walks the page through its lifecycle events, every other command answers `{}` unless
+    scripted. Used to measure the library's own overhead and load-test it without Chromium.
+
+    Parameters:
+    ----------
+    responses : dict, optional
+        Maps methods to a result dict, or to `handler(params, session_id, connection)`
+        returning the result (or raising `FakeError`) and free to emit events first.
+    recording : str, optional
+        A session recorded by `Recorder`, its results answer the methods not simulated,
+        in the order they were recorded (the last one repeats).
+    latency : float
+        Seconds every response and event is delayed by.
+
+    Usage:
+        with FakeCDPServer(responses={"Runtime.evaluate": {"result": {"type": "number", "value": 2}}}) as server:
+            runtime = Runtime(server.ws_url)
+            server.flood("Network.dataReceived", 100000, rate=10000)
+    """
+
+    def __init__(self, responses: dict = None, recording: str = None, latency: float = 0.0, host: str = "127.0.0.1"):
+        self.responses = dict(responses or {})
+        self.recorded = {}
+        self.latency = latency
+        self.connections = []
+        self.targets = collections.OrderedDict()
+        self.sessions = {}
+        self.commands = collections.Counter()
+        self.ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.builtins = {
+            "Target.getTargets": self.get_targets,
+            "Target.attachToTarget": self.attach_to_target,
+            "Target.createTarget": self.create_target,
+            "Target.closeTarget": self.close_target,
+            "Page.navigate": self.navigate
+        }
+        self.create_page("about:blank")
+        if recording is not None:
+            self.load_recording(recording)
+
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            # WebSocket clients such as `websockets` refuse an HTTP/1.0 upgrade.
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if self.headers.get("Upgrade", "").lower() == "websocket":
+                    server.serve_websocket(self)
+                    return
+
+                body = server.http_endpoint(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.http = http.server.ThreadingHTTPServer((host, 0), Handler)
+        self.http.daemon_threads = True
+        self.thread = threading.Thread(target=self.http.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def port(self) -> int:
+        return self.http.server_address[1]
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/devtools/browser/fake"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def close(self):
+        """Stops serving and drops every connection."""
+        self.http.shutdown()
+        for connection in list(self.connections):
+            connection.close()
+            try:
+                # The handler's file objects keep the socket open, shut it down for the client to notice.
+                connection.sock.shutdown(socket.SHUT_RDWR)
+                connection.sock.close()
+            except OSError:
+                pass
+        self.http.server_close()
+
+    def http_endpoint(self, path: str):
+        path = path.split("?")[0].rstrip("/")
+        if path == "/json/version":
+            return {
+                "Browser": "Navium/FakeCDP",
+                "Protocol-Version": "1.3",
+                "webSocketDebuggerUrl": self.ws_url
+            }
+        if path in ("/json", "/json/list"):
+            return [dict(target, webSocketDebuggerUrl=f"ws://127.0.0.1:{self.port}/devtools/page/{target['targetId']}", id=target["targetId"])
+                    for target in self.targets.values()]
+        return None
+
+    def serve_websocket(self, handler):
+        """Completes the WebSocket handshake and serves the connection until it closes."""
+        accept = base64.b64encode(hashlib.sha1((handler.headers["Sec-WebSocket-Key"] + WEBSOCKET_GUID).encode()).digest())
+        handler.send_response(101, "Switching Protocols")
+        handler.send_header("Upgrade", "websocket")
+        handler.send_header("Connection", "Upgrade")
+        handler.send_header("Sec-WebSocket-Accept", accept.decode())
+        handler.end_headers()
+        handler.wfile.flush()
+        # The socket is the WebSocket's now, never read as a kept-alive HTTP connection afterwards.
+        handler.close_connection = True
+
+        connection = Connection(self, handler.connection)
+        self.connections.append(connection)
+        fragments = []
+        try:
+            while (frame := read_frame(handler.rfile)) is not None:
+                fin, opcode, payload = frame
+                if opcode == 0x8:
+                    handler.connection.sendall(encode_frame(payload[:2], 0x8))
+                    break
+                if opcode == 0x9:
+                    handler.connection.sendall(encode_frame(payload, 0xA))
+                    continue
+                if opcode in (0x0, 0x1, 0x2):
+                    fragments.append(payload)
+                    if fin:
+                        self.on_command(connection, json.loads(b"".join(fragments)))
+                        fragments = []
+        except OSError:
+            pass
+        finally:
+            connection.close()
+            self.connections.remove(connection)
+
+    def on_command(self, connection: Connection, message: dict):
+        method = message["method"]
+        params = message.get("params", {})
+        session_id = message.get("sessionId")
+        self.commands[method] += 1
+
+        response = {"id": message["id"]}
+        if session_id is not None:
+            response["sessionId"] = session_id
+        try:
+            response["result"] = self.respond(method, params, session_id, connection)
+        except FakeError as er:
+            response["error"] = {"code": er.code, "message": str(er)}
+        connection.send(response, self.latency)
+
+    def respond(self, method: str, params: dict, session_id: str, connection: Connection) -> dict:
+        scripted = self.responses.get(method)
+        if scripted is not None:
+            return scripted(params, session_id, connection) if callable(scripted) else scripted
+
+        builtin = self.builtins.get(method)
+        if builtin is not None:
+            return builtin(params, session_id, connection)
+
+        recorded = self.recorded.get(method)
+        if recorded:
+            result = recorded[0] if len(recorded) == 1 else recorded.popleft()
+            if "error" in result:
+                raise FakeError(result["error"].get("message", ""), result["error"].get("code", -32000))
+            return result.get("result", {})
+        return {}
+
+    def load_recording(self, path: str):
+        """Queues the results of a recorded session, per method."""
+        methods = {}
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                message = json.loads(entry["message"])
+                if entry["direction"] == "send":
+                    methods[message["id"]] = message["method"]
+                elif "id" in message and message["id"] in methods:
+                    self.recorded.setdefault(methods[message["id"]], collections.deque()).append(message)
+
+    def create_page(self, url: str) -> str:
+        target_id = "FAKE{:028X}".format(next(self.ids))
+        self.targets[target_id] = {"targetId": target_id, "type": "page", "title": url, "url": url, "attached": False}
+        return target_id
+
+    def get_targets(self, params, session_id, connection):
+        return {"targetInfos": list(self.targets.values())}
+
+    def attach_to_target(self, params, session_id, connection):
+        target = self.targets.get(params["targetId"])
+        if target is None:
+            raise FakeError("No target with given id found")
+
+        new_session = "{:032X}".format(next(self.ids))
+        with self._lock:
+            self.sessions[new_session] = params["targetId"]
+        target["attached"] = True
+        connection.event("Target.attachedToTarget", {
+            "sessionId": new_session,
+            "targetInfo": target,
+            "waitingForDebugger": False
+        }, delay=self.latency)
+        return {"sessionId": new_session}
+
+    def create_target(self, params, session_id, connection):
+        return {"targetId": self.create_page(params.get("url", "about:blank"))}
+
+    def close_target(self, params, session_id, connection):
+        target_id = params["targetId"]
+        if self.targets.pop(target_id, None) is None:
+            raise FakeError("No target with given id found")
+
+        with self._lock:
+            closed = [s for s, t in self.sessions.items() if t == target_id]
+            for closed_session in closed:
+                del self.sessions[closed_session]
+        for closed_session in closed:
+            connection.event("Target.detachedFromTarget", {"sessionId": closed_session, "targetId": target_id}, delay=self.latency)
+        return {"success": True}
+
+    def navigate(self, params, session_id, connection):
+        """Commits the navigation at once and runs the page through its lifecycle."""
+        frame_id = self.sessions.get(session_id)
+        if frame_id is None:
+            raise FakeError("Navigation requires a page session")
+
+        loader_id = "LOADER{:026X}".format(next(self.ids))
+        self.targets[frame_id]["url"] = params["url"]
+        parts = urlsplit(params["url"])
+        origin = f"{parts.scheme}://{parts.netloc}" if parts.netloc else "://"
+        connection.event("Page.frameNavigated", {
+            "frame": {"id": frame_id, "loaderId": loader_id, "url": params["url"], "securityOrigin": origin}
+        }, session_id, self.latency)
+        for name in ("init", "DOMContentLoaded", "load", "networkIdle"):
+            connection.event("Page.lifecycleEvent", {
+                "frameId": frame_id,
+                "loaderId": loader_id,
+                "name": name,
+                "timestamp": time.time()
+            }, session_id, self.latency)
+        return {"frameId": frame_id, "loaderId": loader_id}
+
+    def emit(self, method: str, params: dict = None, session_id: str = None):
+        """Sends an event to every client."""
+        for connection in list(self.connections):
+            connection.event(method, params, session_id, self.latency)
+
+    def flood(self, method: str, count: int, params: dict = None, rate: float = None, session_id: str = None) -> float:
+        """
+        Sends `count` events to every client, at `rate` events per second or as fast as
+        possible, returns the seconds it took. The events carry a sequence number in `seq`.
+        """
+        params = params or {}
+        started = time.perf_counter()
+        for sequence in range(count):
+            if rate is not None:
+                delay = started + sequence / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self.emit(method, dict(params, seq=sequence), session_id)
+        return time.perf_counter() - started
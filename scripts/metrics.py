@@ -0,0 +1,204 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+class Histogram:
+    """
+    A latency histogram in milliseconds over fixed logarithmic buckets.
+    """
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, fraction: float) -> float | None:
+        """Estimates a percentile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(BUCKETS[index], self.max) if index < len(BUCKETS) else self.max
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else None,
+            "min_ms": self.min,
+            "p50_ms": self.percentile(0.5),
+            "p90_ms": self.percentile(0.9),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max
+        }
+
+
+def byte_length(message) -> int:
+    """The UTF-8 size of a message, without encoding the (usual) ASCII ones."""
+    if isinstance(message, (bytes, bytearray)) or message.isascii():
+        return len(message)
+    return len(message.encode())
+
+
+class Instrumentation:
+    """
+    Measures a `Runtime`: per-method command counts, errors and latency histograms,
+    bytes sent and received, events received, and any duration recorded with `timing`
+    (the browser's launch, attach and teardown). `snapshot` also reports the commands in
+    flight and the depth of the event dispatchers' queues, summed over the connected runtimes.
+
+    Hooks registered with `add_hook("send", fn)` are called with every outgoing command
+    and `add_hook("receive", fn)` with every raw incoming message. `trace` streams a span
+    per completed command to a Chrome trace (`chrome://tracing`, Perfetto) or JSON lines,
+    finished by `close`. One instrumentation may measure several browsers, closing them
+    never closes it, whoever created it does.
+
+    Runtimes without instrumentation skip all of this behind a single `None` check.
+    """
+
+    def __init__(self) -> None:
+        self.runtimes = set()
+        self.skipped = 0
+        self.methods = {}
+        self.errors = {}
+        self.timings = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.messages_received = 0
+        self.hooks = {"send": [], "receive": []}
+        self.trace_file = None
+        self.trace_format = None
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def bind(self, runtime):
+        """Adds a runtime to the ones measured."""
+        with self._lock:
+            self.runtimes.add(runtime)
+
+    def unbind(self, runtime):
+        """Stops counting a disconnected runtime as in flight, keeping the events it skipped."""
+        with self._lock:
+            if runtime in self.runtimes:
+                self.runtimes.discard(runtime)
+                self.skipped += runtime.skipped
+
+    def add_hook(self, kind: str, hook):
+        """Calls `hook(message)` on every `send` or `receive`, on the thread doing it."""
+        self.hooks[kind] = self.hooks[kind] + [hook]
+
+    def remove_hook(self, kind: str, hook):
+        self.hooks[kind] = [h for h in self.hooks[kind] if h is not hook]
+
+    def trace(self, path: str, format: str = "chrome"):
+        """Starts writing command spans to `path`, as a Chrome trace or as JSON lines (`jsonl`)."""
+        if format not in ("chrome", "jsonl"):
+            raise ValueError("format must be either chrome or jsonl")
+
+        with self._lock:
+            self.trace_file = open(path, "w")
+            self.trace_format = format
+            if format == "chrome":
+                self.trace_file.write("[\n")
+
+    def close(self):
+        """Stops tracing and flushes the trace file."""
+        with self._lock:
+            if self.trace_file is not None:
+                if self.trace_format == "chrome":
+                    self.trace_file.write("{}]\n")
+                self.trace_file.close()
+                self.trace_file = None
+
+    def on_send(self, future, message: dict, data):
+        future.method = message["method"]
+        future.session_id = message.get("sessionId")
+        future.sent_at = time.perf_counter()
+        with self._lock:
+            self.bytes_sent += byte_length(data)
+        for hook in self.hooks["send"]:
+            hook(message)
+
+    def on_receive(self, message):
+        with self._lock:
+            self.bytes_received += byte_length(message)
+            self.messages_received += 1
+        for hook in self.hooks["receive"]:
+            hook(message)
+
+    def on_response(self, future, response: dict):
+        """Records the latency of the command a response answers."""
+        sent_at = getattr(future, "sent_at", None)
+        if sent_at is None:
+            return
+
+        finished = time.perf_counter()
+        method = future.method
+        with self._lock:
+            histogram = self.methods.get(method)
+            if histogram is None:
+                histogram = self.methods[method] = Histogram()
+            histogram.record((finished - sent_at) * 1000)
+            if "error" in response:
+                self.errors[method] = self.errors.get(method, 0) + 1
+
+            if self.trace_file is not None:
+                self.write_span(method, future, sent_at, finished, "error" in response)
+
+    def write_span(self, method: str, future, started: float, finished: float, failed: bool):
+        span = {
+            "name": method,
+            "cat": "cdp",
+            "ph": "X",
+            "ts": (started - self.origin) * 1e6,
+            "dur": (finished - started) * 1e6,
+            "pid": os.getpid(),
+            "tid": future.session_id or "browser",
+            "args": {"id": future.command_id, "error": failed}
+        }
+        self.trace_file.write(json.dumps(span) + (",\n" if self.trace_format == "chrome" else "\n"))
+
+    def timing(self, name: str, seconds: float):
+        """Records a duration, such as `browser.launch`, in its own histogram."""
+        with self._lock:
+            histogram = self.timings.get(name)
+            if histogram is None:
+                histogram = self.timings[name] = Histogram()
+            histogram.record(seconds * 1000)
+
+    def snapshot(self) -> dict:
+        """Returns every measurement as plain data."""
+        with self._lock:
+            snapshot = {
+                "commands": {
+                    method: dict(histogram.summary(), errors=self.errors.get(method, 0))
+                    for method, histogram in self.methods.items()
+                },
+                "timings": {name: histogram.summary() for name, histogram in self.timings.items()},
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+                "messages_received": self.messages_received
+            }
+            runtimes = list(self.runtimes)
+            skipped = self.skipped
+
+        snapshot["in_flight"] = sum(len(runtime.pending) for runtime in runtimes)
+        snapshot["events_skipped"] = skipped + sum(runtime.skipped for runtime in runtimes)
+        snapshot["queue_depth"] = sum(len(runtime.events.pending) for runtime in runtimes)
+        return snapshot
@@ -0,0 +1,313 @@
+import asyncio
+import base64
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("navium")
+
+RESOURCE_TYPES = {
+    "document": "Document",
+    "stylesheet": "Stylesheet",
+    "image": "Image",
+    "media": "Media",
+    "font": "Font",
+    "script": "Script",
+    "texttrack": "TextTrack",
+    "xhr": "XHR",
+    "fetch": "Fetch",
+    "prefetch": "Prefetch",
+    "eventsource": "EventSource",
+    "websocket": "WebSocket",
+    "manifest": "Manifest",
+    "ping": "Ping",
+    "other": "Other"
+}
+
+def compile_pattern(pattern: str) -> re.Pattern:
+    """
+    Compiles a DevTools URL pattern, where `*` matches any characters, `?` one character
+    and a backslash escapes the next one, into the equivalent regular expression.
+    """
+    parts = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            parts.append(re.escape(char))
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "*":
+            parts.append(".*")
+        elif char == "?":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.DOTALL)
+
+def resource_type(name: str) -> str:
+    """Maps a resource type name like `image` to its DevTools spelling."""
+    try:
+        return RESOURCE_TYPES[name.lower()]
+    except KeyError:
+        raise ValueError("Unknown resource type {}, expected one of {}".format(name, ", ".join(RESOURCE_TYPES)))
+
+
+class Route:
+    """
+    A request paused by the browser, to be continued, fulfilled or aborted exactly once.
+    """
+
+    def __init__(self, session, params: dict) -> None:
+        self.session = session
+        self.params = params
+        self.request_id = params["requestId"]
+        self.request = params["request"]
+        self.handled = False
+
+    @property
+    def url(self) -> str:
+        return self.request["url"]
+
+    @property
+    def method(self) -> str:
+        return self.request["method"]
+
+    @property
+    def headers(self) -> dict:
+        return self.request.get("headers", {})
+
+    @property
+    def resource_type(self) -> str:
+        return self.params.get("resourceType")
+
+    def resolve(self, method: str, params: dict):
+        if self.handled:
+            return
+        self.handled = True
+        self.session.send_command({
+            "method": method,
+            "params": dict(params, requestId=self.request_id)
+        })
+
+    @property
+    def response_stage(self) -> bool:
+        """Whether the request is paused on its response rather than before being sent."""
+        return "responseStatusCode" in self.params or "responseErrorReason" in self.params
+
+    def continue_(
+            self,
+            url: str = None,
+            method: str = None,
+            headers: dict = None,
+            post_data: bytes = None,
+            intercept_response: bool = False
+        ):
+        """
+        Lets the request through, optionally overriding parts of it, and pausing it
+        again once the response arrived with `intercept_response`.
+        """
+        params = {}
+        if intercept_response:
+            params["interceptResponse"] = True
+        if url is not None:
+            params["url"] = url
+        if method is not None:
+            params["method"] = method
+        if headers is not None:
+            params["headers"] = [{"name": name, "value": value} for name, value in headers.items()]
+        if post_data is not None:
+            params["postData"] = base64.b64encode(post_data).decode()
+        self.resolve("Fetch.continueRequest", params)
+
+    def fulfill(self, status: int = 200, headers: dict = None, body: bytes | str = b""):
+        """Answers the request without it reaching the network."""
+        if isinstance(body, str):
+            body = body.encode()
+        self.resolve("Fetch.fulfillRequest", {
+            "responseCode": status,
+            "responseHeaders": [{"name": name, "value": value} for name, value in (headers or {}).items()],
+            "body": base64.b64encode(body).decode()
+        })
+
+    def abort(self, reason: str = "BlockedByClient"):
+        """Fails the request with the given network error reason."""
+        self.resolve("Fetch.failRequest", {"errorReason": reason})
+
+
+class Rule:
+    """
+    A URL pattern and resource types with the action taken on the requests they match:
+    a handler called with a `Route`, or None to abort them.
+    """
+
+    def __init__(self, url_pattern: str = "*", resource_types: list = None, handler=None) -> None:
+        self.url_pattern = url_pattern
+        self.matcher = compile_pattern(url_pattern)
+        self.resource_types = frozenset(resource_type(name) for name in resource_types) if resource_types else None
+        self.handler = handler
+
+    def patterns(self) -> list:
+        """The `Fetch.RequestPattern`s making the browser pause the requests of this rule."""
+        if self.resource_types is None:
+            return [{"urlPattern": self.url_pattern, "requestStage": "Request"}]
+        return [
+            {"urlPattern": self.url_pattern, "resourceType": name, "requestStage": "Request"}
+            for name in sorted(self.resource_types)
+        ]
+
+    def matches(self, params: dict) -> bool:
+        if self.resource_types is not None and params.get("resourceType") not in self.resource_types:
+            return False
+        return self.matcher.fullmatch(params["request"]["url"]) is not None
+
+
+class Router:
+    """
+    Intercepts the requests of one page with `Fetch`.
+
+    Rule patterns are pushed down to `Fetch.enable`, so requests no rule covers are never
+    paused and cost nothing. Paused requests are matched against the rules in the order
+    they were added, blocked ones are aborted right on the reader thread, handlers run on
+    a small thread pool so they may take their time. Requests no rule matched are then
+    answered from the `ResponseCache` when one is set, misses are stored on their way back.
+    """
+    workers = 4
+
+    def __init__(self, session) -> None:
+        self.session = session
+        self.rules = []
+        self.cache = None
+        self.executor = None
+        self.closed = False
+        self.session.add_listener("Fetch.requestPaused", self.on_paused)
+
+    def add(self, rule: Rule) -> Rule:
+        self.rules = self.rules + [rule]
+        return rule
+
+    def remove(self, url_pattern: str):
+        self.rules = [rule for rule in self.rules if rule.url_pattern != url_pattern]
+
+    def command(self) -> dict:
+        """The command applying the current rules to the browser."""
+        patterns = [pattern for rule in self.rules for pattern in rule.patterns()]
+        if self.cache is not None:
+            patterns += self.cache.patterns()
+        if not patterns:
+            return {"method": "Fetch.disable"}
+        return {
+            "method": "Fetch.enable",
+            "params": {
+                "patterns": patterns
+            }
+        }
+
+    def on_paused(self, params: dict):
+        route = Route(self.session, params)
+        if route.response_stage:
+            return self.on_response(route)
+
+        for rule in self.rules:
+            if rule.matches(params):
+                if rule.handler is None:
+                    route.abort()
+                else:
+                    self.dispatch(rule.handler, route)
+                return
+
+        if self.cache is not None and params.get("resourceType") in self.cache.resource_types:
+            return self.run(self.serve, route)
+        route.continue_()
+
+    def serve(self, route: Route):
+        """Answers a request from the cache, or lets it through and pauses on its response."""
+        entry = self.cache.lookup(route.request)
+        if entry is None:
+            route.continue_(intercept_response=True)
+        else:
+            route.fulfill(entry.status, entry.headers, entry.body)
+
+    def on_response(self, route: Route):
+        """Fetches the body of a cacheable response before letting it through."""
+        status = route.params.get("responseStatusCode")
+        headers = {header["name"]: header["value"] for header in route.params.get("responseHeaders", [])}
+        ttl = None
+        if self.cache is not None and status is not None:
+            ttl = self.cache.cacheable(route.request, status, headers)
+        if ttl is None:
+            return route.continue_()
+
+        future = self.session.send_command({
+            "method": "Fetch.getResponseBody",
+            "params": {
+                "requestId": route.request_id
+            }
+        })
+        future.add_done_callback(lambda future: self.on_body(route, status, headers, ttl, future))
+
+    def on_body(self, route: Route, status: int, headers: dict, ttl: float, future):
+        route.continue_()
+        if future.cancelled() or future.exception() is not None or not future.result():
+            return
+
+        result = future.result()
+        body = base64.b64decode(result["body"]) if result.get("base64Encoded") else result["body"].encode()
+        self.run(self.cache.store, route.request, status, headers, body, ttl)
+
+    def close(self):
+        """Stops intercepting and lets the handler threads go, called when the session goes away."""
+        self.closed = True
+        self.session.remove_listener("Fetch.requestPaused", self.on_paused)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def run(self, function, *args):
+        """Runs a function on the router's thread pool, logging its failures."""
+        if self.closed:
+            return
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="navium-route")
+        self.executor.submit(self.guard, function, *args)
+
+    def guard(self, function, *args):
+        try:
+            function(*args)
+        except Exception:
+            logger.exception("%r failed", function)
+
+    def dispatch(self, handler, route: Route):
+        self.run(self.run_handler, handler, route)
+
+    def run_handler(self, handler, route: Route):
+        try:
+            handler(route)
+        except Exception:
+            logger.exception("Route handler %r failed", handler)
+        finally:
+            route.continue_()
+
+
+class AsyncRouter(Router):
+    """
+    asyncio counterpart of `Router`, handlers (plain functions or coroutine functions)
+    run on the event loop instead of a thread pool, cache I/O in the loop's executor.
+    """
+
+    def run(self, function, *args):
+        """Runs a blocking function in the event loop's default executor, logging its failures."""
+        asyncio.get_running_loop().run_in_executor(None, self.guard, function, *args)
+
+    def dispatch(self, handler, route: Route):
+        asyncio.ensure_future(self.run_handler(handler, route))
+
+    async def run_handler(self, handler, route: Route):
+        try:
+            result = handler(route)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception:
+            logger.exception("Route handler %r failed", handler)
+        finally:
+            route.continue_()
@@ -1,51 +1,324 @@
 import base64
-import os, secrets
+import io
+import json
+import time
 from PIL import Image
+from .cache import ResponseCache
+from .batch import Batch
+from .element import ElementHandle, serialize_argument
+from .exceptions import ProtocolError, ScriptError
+from .network import Router, Rule
+from .screencast import Screencast
+from .stream import Stream, open_output, pdf_params, read_stream
+from .watch import SELECTOR_PREDICATE, SELECTOR_STATES, Watch, context_lost, wait_command, wait_result
 from .runtime import Runtime
 
-class Page:
+def screenshot_params(format: str, quality: int, clip) -> dict:
+    """Builds the `Page.captureScreenshot` params, validating the format and clip."""
+    format = "jpeg" if format == "jpg" else format
+    if format not in ("png", "jpeg", "webp"):
+        raise ValueError("format must be one of png, jpeg or webp")
+
+    params = {"format": format, "fromSurface": True}
+    if quality is not None and format != "png":
+        params["quality"] = quality
+    if clip is not None:
+        params["clip"] = dict({"scale": 1}, **clip)
+    return params
+
+def full_page_clip(params: dict, metrics: dict) -> dict:
+    """Extends screenshot params to the whole scrollable page from `Page.getLayoutMetrics`."""
+    size = metrics.get("cssContentSize") or metrics["contentSize"]
+    params["clip"] = {"x": 0, "y": 0, "width": size["width"], "height": size["height"], "scale": 1}
+    params["captureBeyondViewport"] = True
+    return params
+
+def save_image(result: dict, path: str = None) -> bytes:
+    """Decodes a `Page.captureScreenshot` result, also writing it to `path` when given."""
+    image_data = base64.b64decode(result.get("data", ""))
+    if path is not None:
+        with open(path, "wb") as image_file:
+            image_file.write(image_data)
+    return image_data
+
+def write_output(data: bytes, output):
+    """Writes bytes to `output` (a path or a binary file), returns them when there is none."""
+    file, owned = open_output(output)
+    try:
+        file.write(data)
+    finally:
+        if owned:
+            file.close()
+    return data if output is None else None
+
+class PageCommands:
     """
-    Provides high-level commands for communicating with the browser via WebSockets,
-    enabling interaction with and control over individual browser pages.
+    The parts of a page shared by `Page` and `AsyncPage`: everything that builds commands
+    or reads their results without sending anything, so only the I/O differs between them.
     """
+    handle_class = ElementHandle
+    router_class = Router
+    batch_class = Batch
+    stream_class = Stream
 
-    def __init__(self, runtime: Runtime, temp_dir: str) -> None:
+    def __init__(self, runtime: Runtime, temp_dir: str, session=None) -> None:
         self.runtime = runtime
         self.temp_dir = temp_dir
+        self.session = session if session is not None else runtime.main
 
-    def execute_script(self, expression: str, returnValue: bool = True, awaitPromise: bool = True):
-        """Executes a JS script in the browser environment."""
-        results = self.runtime.execute_command(
-            cdp_obj={
+    def on(self, method: str, callback):
+        """Calls `callback(params)` for every `method` event of this page, off the reader thread."""
+        return self.runtime.on(method, callback, self.session.session_id)
+
+    def subscribe(self, method: str, maxsize: int = 1000, policy: str = "drop_oldest"):
+        """Collects the params of every `method` event of this page into a bounded queue."""
+        return self.runtime.subscribe(method, maxsize, policy, self.session.session_id)
+
+    @property
+    def router(self) -> Router:
+        """The request interceptor of this page, created on first use."""
+        if self.session.router is None:
+            self.session.router = self.router_class(self.session)
+        return self.session.router
+
+    def evaluate_command(self, expression: str, returnValue: bool, awaitPromise: bool) -> dict:
+        return {
+            "method": "Runtime.evaluate",
+            "params": {
+                "expression": expression,
+                "returnByValue": returnValue,
+                "awaitPromise": awaitPromise
+            }
+        }
+
+    def function_command(self, declaration: str, args, returnValue: bool, awaitPromise: bool) -> dict:
+        """
+        Builds the command calling a JS function in the main frame with the given arguments,
+        falling back to `Runtime.evaluate` with JSON-encoded arguments until its context is known.
+        Element handles can't be encoded, passing one before then raises `ValueError`.
+        """
+        context_id = self.session.contexts.get(self.session.target_id)
+        if context_id is None:
+            if any(isinstance(arg, ElementHandle) for arg in args):
+                raise ValueError("Element handles can only be passed once the page's execution context is known, "
+                                 "handles queried before the last navigation are no longer valid")
+            return {
                 "method": "Runtime.evaluate",
                 "params": {
-                    "expression": expression,
+                    "expression": "({})(...{})".format(declaration, json.dumps(list(args))),
                     "returnByValue": returnValue,
-                    "awaitPromise": awaitPromise
+                    "awaitPromise": awaitPromise,
+                    "objectGroup": self.session.object_group
                 }
             }
+
+        return {
+            "method": "Runtime.callFunctionOn",
+            "params": {
+                "functionDeclaration": declaration,
+                "arguments": [serialize_argument(arg) for arg in args],
+                "executionContextId": context_id,
+                "returnByValue": returnValue,
+                "awaitPromise": awaitPromise,
+                "objectGroup": self.session.object_group
+            }
+        }
+
+    def query_command(self, css_selector: str, all: bool = False) -> dict:
+        if all:
+            return self.function_command("function (s) { return Array.from(document.querySelectorAll(s)); }", (css_selector,), False, True)
+        return self.function_command("function (s) { return document.querySelector(s); }", (css_selector,), False, True)
+
+    def properties_command(self, results):
+        """Builds the command listing the elements of an array a query returned, None if it returned none."""
+        remote = (results or {}).get("result", {})
+        if "objectId" not in remote:
+            return None
+        return {
+            "method": "Runtime.getProperties",
+            "params": {
+                "objectId": remote["objectId"],
+                "ownProperties": True
+            }
+        }
+
+    def to_handle(self, results):
+        """Wraps the element a command returned into a handle, None if it returned no element."""
+        remote = (results or {}).get("result", {})
+        if "objectId" not in remote or remote.get("subtype") == "null":
+            return None
+        return self.handle_class(self, remote["objectId"])
+
+    def to_handles(self, properties) -> list:
+        """Wraps the elements of an array's properties into handles, in index order."""
+        items = sorted(
+            (int(item["name"]), item["value"]["objectId"])
+            for item in (properties or {}).get("result", [])
+            if item["name"].isdigit() and "objectId" in item.get("value", {})
         )
+        return [self.handle_class(self, object_id) for _, object_id in items]
+
+    def release_command(self) -> dict:
+        """Builds the command releasing the page's remote objects, emptying the handle cache."""
+        group = self.session.object_group
+        self.session.reset_handles()
+        return {
+            "method": "Runtime.releaseObjectGroup",
+            "params": {
+                "objectGroup": group
+            }
+        }
+
+    def batch(self) -> Batch:
+        """Starts a batch of DOM operations run in a single round trip, see `Batch`."""
+        return self.batch_class(self)
+
+    def stream(self, source: str, *args, chunk_size: int = 1000, window: int = 4, timeout: float = 30) -> Stream:
+        """
+        Streams the items yielded by a JS (async) generator function in chunks of `chunk_size`,
+        see `Stream`. Iterate over the result to receive lists of items.
+        """
+        return self.stream_class(self, source, args, chunk_size, window, timeout)
+
+
+class Page(PageCommands):
+    """
+    Provides high-level commands for communicating with the browser via WebSockets,
+    enabling interaction with and control over individual browser pages.
+    """
+
+    def goto(self, url, wait_until: str = "load", timeout: float = 30):
+        """
+        Navigates this page to the desired URL and waits until `wait_until` is reached:
+        `commit`, `domcontentloaded`, `load` or `networkidle`.
+        """
+        self.session.goto(url, wait_until, timeout)
+        return self
+
+    def close(self):
+        """Closes this page."""
+        self.runtime.close_session(self.session)
+
+    def route(self, url_pattern: str, handler, resource_types: list = None):
+        """
+        Calls `handler(route)` for every request matching the URL pattern (`*` and `?`
+        wildcards) and resource types, the handler continues, fulfills or aborts the
+        `Route`, requests it leaves alone are continued. Other requests never leave the browser.
+        """
+        self.router.add(Rule(url_pattern, resource_types, handler))
+        self.session.execute_command(cdp_obj=self.router.command())
+
+    def unroute(self, url_pattern: str):
+        """Removes the routes and blocks set up for the URL pattern."""
+        self.router.remove(url_pattern)
+        self.session.execute_command(cdp_obj=self.router.command())
+
+    def block(self, resource_types: list = None, url_patterns: list = None):
+        """
+        Aborts requests of the given resource types (e.g. `image`, `font`, `media`,
+        `stylesheet`) and requests whose URL matches any of the patterns.
+        """
+        if resource_types:
+            self.router.add(Rule("*", resource_types))
+        for url_pattern in url_patterns or ():
+            self.router.add(Rule(url_pattern))
+        self.session.execute_command(cdp_obj=self.router.command())
+
+    def use_cache(self, cache: ResponseCache):
+        """Answers this page's requests from a shared `ResponseCache`, storing what it misses."""
+        self.router.cache = cache
+        self.session.execute_command(cdp_obj=self.router.command())
+
+    def execute_script(self, expression: str, returnValue: bool = True, awaitPromise: bool = True):
+        """Executes a JS script in the browser environment."""
+        results = self.session.execute_command(cdp_obj=self.evaluate_command(expression, returnValue, awaitPromise))
         return results.get("result", {}).get("value", "")
 
+    def call_function(self, declaration: str, *args, returnValue: bool = True, awaitPromise: bool = True):
+        """
+        Calls a JS function in the page's main frame with JSON-serialisable arguments or element
+        handles, which are passed as values rather than interpolated into the source.
+        """
+        results = self.session.execute_command(
+            cdp_obj=self.function_command(declaration, args, returnValue, awaitPromise)
+        )
+        return results.get("result", {}).get("value", "")
+
+    def query(self, css_selector: str, cached: bool = True):
+        """
+        Returns a handle to the first element matching the selector, or None.
+
+        Handles are cached per selector until the page navigates, pass `cached=False`
+        to match the selector again after the DOM changed.
+        """
+        key = ("query", css_selector)
+        if cached and key in self.session.handles:
+            return self.session.handles[key]
+
+        handle = self.to_handle(self.session.execute_command(cdp_obj=self.query_command(css_selector)))
+        if handle is not None:
+            self.session.handles[key] = handle
+        return handle
+
+    def query_handles(self, css_selector: str, cached: bool = True) -> list:
+        """Returns handles to every element matching the selector, cached like `query`."""
+        key = ("query_all", css_selector)
+        if cached and key in self.session.handles:
+            return self.session.handles[key]
+
+        results = self.session.execute_command(cdp_obj=self.query_command(css_selector, all=True))
+        command = self.properties_command(results)
+        if command is None:
+            return []
+
+        handles = self.to_handles(self.session.execute_command(cdp_obj=command))
+        self.session.handles[key] = handles
+        return handles
+
+    def release_handles(self):
+        """Releases every remote object held by this page and empties the handle cache."""
+        self.session.execute_command(cdp_obj=self.release_command())
+
+    def get_texts(self, css_selectors: list) -> list:
+        """Retrieves the text content of many elements in one round trip, a `ScriptError` stands in for missing ones."""
+        batch = self.batch()
+        for css_selector in css_selectors:
+            batch.text(css_selector)
+        return batch.run()
+
+    def query_all(self, css_selector: str, fields: list = None) -> list:
+        """
+        Returns handles to every element matching the selector, or, when `fields` are given,
+        reads them from every element in one round trip as one dict per element.
+        Fields are element properties, or attributes when prefixed with `@`.
+        """
+        if fields is None:
+            return self.query_handles(css_selector)
+
+        result, = self.batch().query_all(css_selector, fields).run()
+        if isinstance(result, ScriptError):
+            raise result
+        return result
+
     def click(self, selector):
         """Clicks on an element identified by its css-selector."""
-        return self.execute_script(f"document.querySelector('{selector}').click()", False)
+        return self.call_function("function (s) { document.querySelector(s).click(); }", selector, returnValue=False)
 
     def fill_text(self, css_selector, text):
         """Fills text in input fields."""
-        return self.execute_script(f"document.querySelector('{css_selector}').value = '{text}'", False)
+        return self.call_function("function (s, text) { document.querySelector(s).value = text; }", css_selector, text, returnValue=False)
 
     def get_text(self, css_selector: str) -> str:
         """Retrieves the text content of an element identified by its CSS selector."""
-        return self.execute_script(f"document.querySelector('{css_selector}').textContent")
+        return self.call_function("function (s) { return document.querySelector(s).textContent; }", css_selector)
 
     def get_input_value(self, css_selector: str) -> str:
         """Retrieves the current value of an input field."""
-        return self.execute_script(f"document.querySelector('{css_selector}').value")
+        return self.call_function("function (s) { return document.querySelector(s).value; }", css_selector)
 
     def scroll_to(self, css_selector: str):
         """Scrolls to an element identified by its CSS selector."""
-        self.execute_script(f"document.querySelector('{css_selector}').scrollIntoView()", False)
+        self.call_function("function (s) { document.querySelector(s).scrollIntoView(); }", css_selector, returnValue=False)
 
     def clear_input(self, css_selector: str):
         """Clears the value of an input field identified by its CSS selector."""
@@ -54,26 +327,120 @@ class Page:
     def get_page_url(self):
         return self.execute_script("document.URL")
 
-    def take_screenshot(self):
-        """Takes a screenshot of the current page."""
-        command = {
+    def metrics(self) -> dict:
+        """
+        Returns the page's `Performance.getMetrics` snapshot as a name to value dict
+        (`JSHeapUsedSize`, `Nodes`, `LayoutCount`, `TaskDuration`, ...).
+        """
+        if not self.session.performance:
+            self.session.execute_command(cdp_obj={"method": "Performance.enable"})
+            self.session.performance = True
+
+        result = self.session.execute_command(cdp_obj={"method": "Performance.getMetrics"})
+        return {metric["name"]: metric["value"] for metric in result.get("metrics", [])}
+
+    def screenshot(
+            self,
+            format: str = "png",
+            quality: int = None,
+            clip: dict = None,
+            full_page: bool = False,
+            path: str = None
+        ) -> bytes:
+        """
+        Captures the page and returns the encoded image bytes, without touching the disk.
+
+        `format` is `png`, `jpeg` or `webp`, `quality` (0-100) only applies to the lossy ones.
+        `clip` is a `{x, y, width, height[, scale]}` region in CSS pixels, `full_page` captures
+        the whole scrollable page. The bytes are also written to `path` when given.
+        """
+        params = screenshot_params(format, quality, clip)
+        if full_page and clip is None:
+            full_page_clip(params, self.session.execute_command(cdp_obj={"method": "Page.getLayoutMetrics"}))
+
+        result = self.session.execute_command(cdp_obj={
             "method": "Page.captureScreenshot",
-            "params": {
-                "format": "png",
-                "quality": 100,
-                "fromSurface": True
-            }
-        }
-        result = self.runtime.execute_command(cdp_obj=command)
-        base64_image = result.get("data", "")
-        image_data = base64.b64decode(base64_image)
+            "params": params
+        })
+        return save_image(result, path)
 
-        temp_path = os.path.join(self.temp_dir, "screenshots")
-        if not os.path.exists(temp_path):
-            os.mkdir(temp_path)
+    def take_screenshot(self, *args, **kwargs) -> Image.Image:
+        """Takes a screenshot of the current page as a PIL image, see `screenshot` for the options."""
+        return Image.open(io.BytesIO(self.screenshot(*args, **kwargs)))
 
-        temp_screenshot_path = os.path.join(self.temp_dir, "screenshots", f"screenshot_{secrets.token_hex(16)}.png")
-        with open(temp_screenshot_path, 'wb') as image_file:
-            image_file.write(image_data)
+    def watch(self, fields, debounce: int = 50) -> Watch:
+        """
+        Watches selectors (a list, or a dict of names to selectors or `{selector, field, all}`)
+        and yields only the fields that changed, pushed from a `MutationObserver`, see `Watch`.
+        """
+        return Watch(self, fields, debounce).start()
+
+    def wait_for_function(self, source: str, *args, timeout: float = 30, polling="raf"):
+        """
+        Waits until a JS function returns a truthy value and returns it. It is checked in the
+        page on every animation frame (`raf`), on DOM mutations (`mutation`) or every `polling`
+        milliseconds, never polled over the connection, and checked again after navigations.
+        """
+        deadline = time.perf_counter() + timeout
+        while (remaining := deadline - time.perf_counter()) > 0:
+            try:
+                results = self.session.execute_command(
+                    cdp_obj=wait_command(self, source, args, polling, remaining),
+                    timeout=remaining + 5
+                )
+            except ProtocolError as er:
+                if not context_lost(str(er)):
+                    raise
+                results = None
+            done, value = wait_result(results)
+            if done:
+                return value
+            time.sleep(0.05)
+        raise TimeoutError("The condition was not met in time")
+
+    def wait_for_selector(self, css_selector: str, state: str = "visible", timeout: float = 30):
+        """
+        Waits until an element matching the selector is `attached`, `visible`, `hidden` or
+        `detached`, returns its handle for the first two.
+        """
+        if state not in SELECTOR_STATES:
+            raise ValueError("state must be one of {}".format(", ".join(SELECTOR_STATES)))
+
+        self.wait_for_function(SELECTOR_PREDICATE, css_selector, state, timeout=timeout, polling=SELECTOR_STATES[state])
+        if state in ("attached", "visible"):
+            return self.query(css_selector, cached=False)
+
+    def pdf(self, output=None, chunk_size: int = 1 << 20, **options):
+        """
+        Prints the page to PDF, streamed to `output` (a path or a binary file) chunk by chunk,
+        the bytes are returned when no output is given. `options` are `Page.printToPDF`
+        parameters in snake_case, e.g. `landscape=True, print_background=True`.
+        """
+        file, owned = open_output(output)
+        try:
+            result = self.session.execute_command(cdp_obj={"method": "Page.printToPDF", "params": pdf_params(options)}, timeout=120)
+            read_stream(self.session, result["stream"], file, chunk_size)
+        finally:
+            if owned:
+                file.close()
+        return file.getvalue() if output is None else None
+
+    def snapshot_mhtml(self, output=None):
+        """
+        Captures the page as an MHTML archive, written to `output` (a path or a binary file)
+        or returned as bytes. `Page.captureSnapshot` cannot stream, the archive arrives whole.
+        """
+        result = self.session.execute_command(cdp_obj={"method": "Page.captureSnapshot", "params": {"format": "mhtml"}}, timeout=120)
+        return write_output(result["data"].encode(), output)
 
-        return Image.open(temp_screenshot_path)
\ No newline at end of file
+    def screencast(
+            self,
+            format: str = "jpeg",
+            quality: int = 80,
+            max_width: int = None,
+            max_height: int = None,
+            every_nth_frame: int = 1,
+            buffer_size: int = 2
+        ) -> Screencast:
+        """Starts streaming frames of the page, see `Screencast`."""
+        return Screencast(self, format, quality, max_width, max_height, every_nth_frame, buffer_size).start()
@@ -0,0 +1,261 @@
+import csv
+import glob
+import os
+import shutil
+import socket
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROFILE_PREFIX = "navium_"
+OWNER_FILE = "navium.owner"
+
+LIMITS = {
+    "memory": "RLIMIT_DATA",
+    "address_space": "RLIMIT_AS",
+    "cpu": "RLIMIT_CPU",
+    "open_files": "RLIMIT_NOFILE",
+    "processes": "RLIMIT_NPROC",
+    "core": "RLIMIT_CORE"
+}
+
+KILL = getattr(signal, "SIGKILL", None)
+
+_swept = False
+_sweep_lock = threading.Lock()
+
+def build_dir() -> str:
+    """Where `navium install` puts Chromium: `%APPDATA%` on Windows, `$XDG_DATA_HOME` elsewhere."""
+    if os.name == "nt":
+        base = os.getenv("APPDATA")
+    else:
+        base = os.getenv("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "navium_build")
+
+def default_executable() -> str:
+    """The installed Chromium binary of this platform."""
+    build = os.path.join(build_dir(), "build")
+    if os.name == "nt":
+        return os.path.join(build, "chrome.exe")
+    if sys.platform == "darwin":
+        return os.path.join(build, "Chromium.app", "Contents", "MacOS", "Chromium")
+    return os.path.join(build, "chrome")
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process with the PID exists."""
+    if os.name == "nt":
+        result = subprocess.run(["tasklist", "/fi", f"PID eq {pid}", "/nh", "/fo", "csv"], capture_output=True, text=True)
+        # The PID is the second column, matched exactly so PID 12 doesn't match 123.
+        return any(len(row) > 1 and row[1] == str(pid) for row in csv.reader(result.stdout.splitlines()))
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def limits_preexec(limits: dict):
+    """
+    Returns a `preexec_fn` applying resource limits to the browser, e.g. `{"memory": 2 << 30,
+    "open_files": 4096}` or raw `resource` names such as `RLIMIT_NPROC`. Limits are inherited,
+    so they apply to every renderer on its own. `memory` caps the data segment (`RLIMIT_DATA`),
+    Chromium reserves far more address space than it uses so `address_space` rarely fits.
+    """
+    import resource
+
+    settings = []
+    for name, value in limits.items():
+        limit = getattr(resource, LIMITS.get(name, name))
+        soft, hard = value if isinstance(value, tuple) else (value, value)
+        settings.append((limit, (soft, hard)))
+
+    def preexec():
+        for limit, values in settings:
+            resource.setrlimit(limit, values)
+
+    return preexec
+
+def boot_id() -> str:
+    """Identifies the current boot of this machine, PIDs only mean something within one. `-` when unknown."""
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            return f.read().strip() or "-"
+    except OSError:
+        return "-"
+
+def write_owner(profile_dir: str, browser_pid: int = None):
+    """
+    Records which process of which machine and boot owns the profile, so stale ones can be
+    told apart from live ones, even in a temporary directory shared between hosts.
+    """
+    with open(os.path.join(profile_dir, OWNER_FILE), "w") as f:
+        f.write(f"{os.getpid()} {browser_pid or 0} {socket.gethostname()} {boot_id()}")
+
+def read_owner(profile_dir: str):
+    """Returns `(pid, browser_pid, hostname, boot_id)`, the last two None in files predating them."""
+    try:
+        with open(os.path.join(profile_dir, OWNER_FILE)) as f:
+            fields = f.read().split()
+        if len(fields) == 2:
+            return int(fields[0]), int(fields[1]), None, None
+        owner, browser, host, boot = fields
+        return int(owner), int(browser), host, boot
+    except (OSError, ValueError):
+        return None
+
+def remove_profile(profile_dir: str, attempts: int = 20):
+    """Deletes a profile, retrying while the exiting browser still holds files (Windows)."""
+    for attempt in range(attempts):
+        try:
+            shutil.rmtree(profile_dir)
+            return
+        except FileNotFoundError:
+            return
+        except OSError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.05)
+
+def sweep_stale_profiles(root: str = None, max_age: float = 3600) -> list:
+    """
+    Removes the profiles left behind by crashed runs and kills their orphaned browsers.
+
+    Only profiles created on this host are considered, their PIDs mean nothing elsewhere.
+    A profile is stale once the process that created it is gone or the machine rebooted
+    since, profiles without a complete owner file are stale once untouched for `max_age`
+    seconds. Returns the removed directories.
+    """
+    removed = []
+    host, boot = socket.gethostname(), boot_id()
+    for profile_dir in glob.glob(os.path.join(root or tempfile.gettempdir(), PROFILE_PREFIX + "*")):
+        if not os.path.isdir(profile_dir):
+            continue
+
+        owner = read_owner(profile_dir)
+        if owner is not None and owner[2] is not None and owner[2] != host:
+            continue
+        if owner is None or owner[2] is None:
+            try:
+                stale = time.time() - os.path.getmtime(profile_dir) > max_age
+            except OSError:
+                continue
+        elif owner[3] != boot:
+            stale = True
+        else:
+            stale = not pid_alive(owner[0])
+            if stale and owner[1]:
+                kill_orphan(owner[1], profile_dir)
+
+        if stale:
+            try:
+                remove_profile(profile_dir, attempts=1)
+                removed.append(profile_dir)
+            except OSError:
+                pass
+    return removed
+
+def sweep_once(root: str = None):
+    """Sweeps the stale profiles the first time a browser is created in this process."""
+    global _swept
+    with _sweep_lock:
+        if _swept:
+            return
+        _swept = True
+    sweep_stale_profiles(root)
+
+def kill_orphan(pid: int, profile_dir: str):
+    """Kills the process group of a browser outliving its owner, if the PID still is that browser."""
+    if os.name != "posix":
+        return
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            if profile_dir.encode() not in f.read():
+                return
+        os.killpg(pid, KILL)
+    except (OSError, ProcessLookupError):
+        pass
+
+
+class BrowserProcess:
+    """
+    A Chromium process and every process it spawns.
+
+    On POSIX the browser leads its own process group, so its renderers, GPU and zygote
+    processes are signalled and reaped together and none outlive it. `shutdown` waits for
+    the browser to exit on its own (after `Browser.close` over the protocol), then
+    escalates to SIGTERM and SIGKILL with bounded waits.
+
+    Parameters:
+    ----------
+    cmd : list
+        The command line.
+    pass_fds : tuple
+        File descriptors the browser inherits (the DevTools pipes).
+    preexec : callable, optional
+        Runs in the child before exec, after the process group and limits are set up.
+    limits : dict, optional
+        Resource limits, see `limits_preexec`.
+    """
+
+    def __init__(self, cmd: list, pass_fds: tuple = (), preexec=None, limits: dict = None) -> None:
+        kwargs = {"pass_fds": pass_fds}
+        if os.name == "posix":
+            steps = [step for step in (limits_preexec(limits) if limits else None, preexec) if step is not None]
+            kwargs["start_new_session"] = True
+            if steps:
+                kwargs["preexec_fn"] = lambda: [step() for step in steps]
+        elif limits:
+            raise OSError("Resource limits are only supported on POSIX systems")
+
+        self.popen = subprocess.Popen(cmd, **kwargs)
+        self.pid = self.popen.pid
+
+    @property
+    def returncode(self):
+        return self.popen.returncode
+
+    def poll(self):
+        return self.popen.poll()
+
+    def wait(self, timeout: float = None):
+        return self.popen.wait(timeout)
+
+    def signal_group(self, sig):
+        """Signals the browser's whole process group, on Windows SIGTERM terminates and anything else kills the tree."""
+        if os.name == "posix":
+            try:
+                os.killpg(self.pid, sig)
+            except (ProcessLookupError, PermissionError):
+                pass
+        elif sig == signal.SIGTERM:
+            self.popen.terminate()
+        else:
+            subprocess.run(["taskkill", "/pid", str(self.pid), "/t", "/f"], capture_output=True)
+
+    def shutdown(self, grace: float = 5, term_timeout: float = 2) -> int:
+        """
+        Stops the browser: waits up to `grace` seconds for it to exit, sends SIGTERM and
+        waits up to `term_timeout`, then SIGKILLs the group. Returns the exit code.
+        """
+        for sig, timeout in ((None, grace), (signal.SIGTERM, term_timeout), (KILL, None)):
+            if sig is not None:
+                self.signal_group(sig)
+            try:
+                self.popen.wait(timeout)
+                break
+            except subprocess.TimeoutExpired:
+                continue
+
+        # Helpers still running once the browser itself is gone would be orphaned.
+        if os.name == "posix":
+            self.signal_group(KILL)
+        return self.popen.returncode
+
+    def kill(self):
+        """Kills the browser and its group at once."""
+        self.signal_group(KILL)
+        self.popen.wait()
@@ -0,0 +1,223 @@
+import errno
+import fnmatch
+import os
+import secrets
+import shutil
+import sys
+from .process import build_dir, remove_profile
+
+# Files tied to the running browser, never part of a template.
+EXCLUDED = ("SingletonLock", "SingletonSocket", "SingletonCookie", "DevToolsActivePort", "navium.owner",
+            "lockfile", "LOCK", "*.tmp", "Crashpad", "BrowserMetrics*", "ShaderCache", "GrShaderCache")
+
+# Directories whose files Chromium never rewrites in place, safe to share as hard links.
+IMMUTABLE = ("Extensions",)
+
+FICLONE = 0x40049409
+
+def templates_dir() -> str:
+    return os.getenv("NAVIUM_PROFILES_DIR") or os.path.join(build_dir(), "profiles")
+
+def excluded(name: str) -> bool:
+    return any(fnmatch.fnmatch(name, pattern) for pattern in EXCLUDED)
+
+def reflink(source: str, destination: str) -> bool:
+    """Clones a file sharing its blocks (btrfs, XFS, APFS...), returns False where unsupported."""
+    if sys.platform == "darwin":
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        return libc.clonefile(source.encode(), destination.encode(), 0) == 0
+    if not sys.platform.startswith("linux"):
+        return False
+
+    import fcntl
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError as er:
+            if er.errno in (errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY, errno.EPERM):
+                dst.close()
+                os.remove(destination)
+                return False
+            raise
+    shutil.copystat(source, destination)
+    return True
+
+
+class Cloner:
+    """
+    Copies a directory tree as cheaply as the filesystem allows: reflinks where supported,
+    hard links for the files Chromium never modifies, plain copies otherwise.
+    `stats` counts the files copied each way.
+    """
+
+    def __init__(self, hardlinks: bool = True) -> None:
+        self.hardlinks = hardlinks
+        self.reflinks = True
+        self.stats = {"reflink": 0, "hardlink": 0, "copy": 0}
+
+    def copy_file(self, source: str, destination: str, immutable: bool):
+        if self.reflinks:
+            if reflink(source, destination):
+                self.stats["reflink"] += 1
+                return
+            # The first refusal holds for the whole tree, stop trying.
+            self.reflinks = False
+
+        if immutable and self.hardlinks:
+            try:
+                os.link(source, destination)
+                self.stats["hardlink"] += 1
+                return
+            except OSError:
+                self.hardlinks = False
+
+        shutil.copy2(source, destination)
+        self.stats["copy"] += 1
+
+    def copy_tree(self, source: str, destination: str, filtered: bool = False):
+        """Copies `source` into `destination`, skipping excluded files when `filtered`."""
+        os.makedirs(destination, exist_ok=True)
+        for root, dirs, files in os.walk(source):
+            relative = os.path.relpath(root, source)
+            target_root = os.path.join(destination, relative) if relative != "." else destination
+            immutable = any(part in IMMUTABLE for part in relative.split(os.sep))
+            if filtered:
+                dirs[:] = [d for d in dirs if not excluded(d)]
+
+            for name in dirs:
+                os.makedirs(os.path.join(target_root, name), exist_ok=True)
+            for name in files:
+                path = os.path.join(root, name)
+                if (filtered and excluded(name)) or os.path.islink(path) and not os.path.exists(path):
+                    continue
+                try:
+                    self.copy_file(path, os.path.join(target_root, name), immutable)
+                except FileNotFoundError:
+                    # A live browser deletes temporary files while they are captured.
+                    pass
+        return self.stats
+
+
+class ProfileTemplate:
+    """
+    A named, pre-seeded Chromium user-data-dir launches start from.
+
+    A template is captured once from a `Browser` set up with the cookies, consent state,
+    extensions or warmed cache it should carry, then every `Browser(profile=...)` gets
+    its own copy, materialised with reflinks or hard links where the filesystem allows.
+    Sessions never write to the template, their changes are discarded on close.
+
+    Parameters:
+    ----------
+    name : str
+        The template's name, a directory under `templates_dir()` (`NAVIUM_PROFILES_DIR`).
+    root : str, optional
+        Where templates are stored instead.
+
+    Usage:
+        with Browser() as browser:
+            browser.goto("https://example.com/")  # accept the consent banner, log in...
+            browser.capture_template("example")
+        with Browser(profile="example") as browser:
+            ...
+    """
+
+    def __init__(self, name: str, root: str = None) -> None:
+        if not name or os.sep in name or name.startswith("."):
+            raise ValueError("Invalid template name {!r}".format(name))
+        self.name = name
+        self.root = root or templates_dir()
+        self.path = os.path.join(self.root, name)
+
+    def __repr__(self):
+        return f"ProfileTemplate({self.name!r})"
+
+    @classmethod
+    def list(cls, root: str = None) -> list:
+        """The templates stored in `root`."""
+        root = root or templates_dir()
+        if not os.path.isdir(root):
+            return []
+        return [cls(name, root) for name in sorted(os.listdir(root)) if not name.startswith(".")]
+
+    @property
+    def exists(self) -> bool:
+        return os.path.isdir(self.path)
+
+    def capture(self, profile_dir: str) -> dict:
+        """
+        Saves a user-data-dir as this template, replacing the previous version atomically.
+        Returns how the files were copied.
+
+        Every version is a hidden directory and the template's path a symlink to the current
+        one, swapped with a rename, so a concurrent `materialize` always finds a template.
+        The previous version is kept until the next capture for copies still reading it.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        version = os.path.join(self.root, f".{self.name}.{secrets.token_hex(4)}")
+        stats = Cloner(hardlinks=False).copy_tree(profile_dir, version, filtered=True)
+
+        previous = os.path.realpath(self.path) if os.path.islink(self.path) else None
+        try:
+            link = version + ".link"
+            os.symlink(os.path.basename(version), link, target_is_directory=True)
+        except OSError:
+            # No symlinks (Windows without the privilege), the template is briefly missing.
+            self.replace(version)
+            return stats
+
+        if os.path.isdir(self.path) and not os.path.islink(self.path):
+            # A template captured before versions, moved away once.
+            self.retire(self.path)
+        os.replace(link, self.path)
+        keep = (os.path.realpath(version), previous)
+        for old in self.versions():
+            if os.path.realpath(old) not in keep:
+                self.retire(old)
+        return stats
+
+    def versions(self) -> list:
+        """The version directories of this template."""
+        prefix = f".{self.name}."
+        return [
+            os.path.join(self.root, entry) for entry in os.listdir(self.root)
+            if entry.startswith(prefix) and "." not in entry[len(prefix):]
+            and os.path.isdir(os.path.join(self.root, entry))
+        ]
+
+    def replace(self, version: str):
+        if self.exists:
+            self.retire(os.path.realpath(self.path) if os.path.islink(self.path) else self.path)
+            if os.path.islink(self.path):
+                os.remove(self.path)
+        os.rename(version, self.path)
+
+    def retire(self, path: str):
+        """Removes an old version, renamed first so readers still copying it notice it left."""
+        old = f"{path}.{secrets.token_hex(4)}.old"
+        os.rename(path, old)
+        remove_profile(old)
+
+    def materialize(self, profile_dir: str, hardlinks: bool = True) -> dict:
+        """
+        Copies the template into a fresh user-data-dir, returns how the files were copied.
+        A copy overtaken by a new capture is started again from the new version.
+        """
+        for _ in range(3):
+            if not self.exists:
+                raise FileNotFoundError("The profile template {!r} does not exist".format(self.name))
+            version = os.path.realpath(self.path)
+            stats = Cloner(hardlinks).copy_tree(version, profile_dir)
+            if os.path.isdir(version):
+                return stats
+            remove_profile(profile_dir)
+        raise FileNotFoundError("The profile template {!r} kept changing while being copied".format(self.name))
+
+    def delete(self):
+        if os.path.islink(self.path):
+            os.remove(self.path)
+        else:
+            remove_profile(self.path)
+        for version in self.versions():
+            remove_profile(version)
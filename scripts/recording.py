@@ -0,0 +1,161 @@
+import collections
+import json
+import threading
+import time
+from .transports import Transport
+
+class Recorder:
+    """
+    Records the DevTools Protocol traffic of a session to a JSON lines file.
+
+    Every line is `{"direction": "send" | "receive", "time": seconds, "message": text}`,
+    the format `ReplayTransport`, `FakeCDPServer` and the codec benchmark read. The
+    recorder hooks into an `Instrumentation`, so recording costs nothing when off.
+
+    Usage:
+        metrics = Instrumentation()
+        with Recorder("session.jsonl").attach(metrics):
+            with Browser(instrumentation=metrics) as browser:
+                browser.goto("https://example.com/")
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file = open(path, "w")
+        self.origin = time.perf_counter()
+        self.instrumentation = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def attach(self, instrumentation):
+        """Starts recording what the instrumented runtime sends and receives."""
+        self.instrumentation = instrumentation
+        instrumentation.add_hook("send", self.on_send)
+        instrumentation.add_hook("receive", self.on_receive)
+        return self
+
+    def on_send(self, message: dict):
+        self.write("send", json.dumps(message))
+
+    def on_receive(self, message):
+        self.write("receive", message.decode() if isinstance(message, bytes) else message)
+
+    def write(self, direction: str, message: str):
+        line = json.dumps({"direction": direction, "time": time.perf_counter() - self.origin, "message": message})
+        with self._lock:
+            if self.file is not None:
+                self.file.write(line + "\n")
+
+    def close(self):
+        """Stops recording and closes the file."""
+        if self.instrumentation is not None:
+            self.instrumentation.remove_hook("send", self.on_send)
+            self.instrumentation.remove_hook("receive", self.on_receive)
+            self.instrumentation = None
+        with self._lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class ReplayTransport(Transport):
+    """
+    Plays a session recorded by `Recorder` back to a `Runtime`, with no browser.
+
+    Received messages are delivered in their recorded order, each one once the runtime
+    has sent as many commands as had been sent when it was recorded. A recorded response
+    also waits for the command it answers, matched by method in send order, and is
+    delivered with the ID the command was sent with. Commands the recording has no
+    answer for get a protocol error.
+
+    Parameters:
+    ----------
+    path : str
+        The recording.
+    speed : float, optional
+        Replays with the recorded timing sped up by this factor, as fast as possible by default.
+    timeout : float
+        Seconds a recorded response waits for its command before it is skipped.
+    """
+
+    def __init__(self, path: str, speed: float = None, timeout: float = 10) -> None:
+        self.speed = speed
+        self.timeout = timeout
+        self.expected = {}
+        self.received = []
+        self.ids = {}
+        self.sent = 0
+        self.unmatched = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+        sent = 0
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                message = json.loads(entry["message"])
+                if entry["direction"] == "send":
+                    self.expected.setdefault(message["method"], collections.deque()).append(message["id"])
+                    sent += 1
+                else:
+                    self.received.append((entry.get("time", 0.0), entry["message"], message.get("id"), sent))
+
+    def run_forever(self):
+        """Delivers the recorded messages, then idles until closed."""
+        self.runtime.connection_ready.set()
+        try:
+            started = time.perf_counter()
+            origin = self.received[0][0] if self.received else 0.0
+            for recorded_at, message, recorded_id, sent in self.received:
+                if self.speed:
+                    delay = started + (recorded_at - origin) / self.speed - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                with self.condition:
+                    self.condition.wait_for(lambda: self.sent >= sent or self.closed, self.timeout)
+                    if recorded_id is not None:
+                        self.condition.wait_for(lambda: recorded_id in self.ids or self.closed, self.timeout)
+                    if self.closed:
+                        return
+                    command_id = self.ids.pop(recorded_id, None)
+
+                if recorded_id is not None:
+                    if command_id is None:
+                        continue
+                    message = json.dumps(dict(json.loads(message), id=command_id))
+
+                self.runtime.on_message(self, message)
+
+            with self.condition:
+                self.condition.wait_for(lambda: self.closed)
+        finally:
+            self.runtime.disconnected()
+
+    def send(self, data):
+        message = json.loads(data)
+        with self.condition:
+            self.sent += 1
+            self.condition.notify_all()
+            expected = self.expected.get(message["method"])
+            if expected:
+                self.ids[expected.popleft()] = message["id"]
+                return
+            self.unmatched += 1
+
+        error = {"id": message["id"], "error": {"code": -32601, "message": f"{message['method']} is not in the recording"}}
+        if "sessionId" in message:
+            error["sessionId"] = message["sessionId"]
+        self.runtime.on_message(self, json.dumps(error))
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
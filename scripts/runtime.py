@@ -1,48 +1,82 @@
-import json
-import random
+import itertools
 import threading
+from concurrent.futures import Future, CancelledError, InvalidStateError, TimeoutError as FutureTimeoutError
+from .codec import get_codec, peek_method
+from .events import EventBus, Subscription
+from .exceptions import ProtocolError
+from .metrics import Instrumentation
+from .session import Session
 from .sockets import WebSocket
+from .transports import Transport
 
 class Runtime:
     """
     Manages WebSocket communication and command execution for interacting with the Chromium browser.
 
+    Commands are correlated with their responses through monotonic IDs, each in-flight
+    command owns a `Future` which is resolved directly from `on_message`, so any number
+    of threads may have commands pending on the same connection at once.
+
+    One connection serves every page of the browser: each attached target gets its own
+    `Session`, and messages are routed to it by their `sessionId`.
+
     Parameters:
     ----------
     ws : str
-        The WebSocket URL for the Chromium browser.
-    page_id : str
-        The ID of the page to interact with.
+        The WebSocket URL for the Chromium browser, unused when a transport is given.
+    page_id : str, optional
+        The ID of the page to interact with, the browser's first page when omitted.
+    transport : Transport, optional
+        The channel to speak the protocol over, a WebSocket to `ws` by default.
+    event_queue_size : int
+        How many events may wait for the callback dispatcher.
+    event_policy : str
+        What to do when the dispatcher falls behind: `drop_oldest`, `drop_newest` or `block`.
+    codec : str, optional
+        The JSON codec to use, `orjson`, `msgspec` or `json`, the fastest installed by default.
+    instrumentation : Instrumentation, optional
+        Collects command latencies, traffic and traces, nothing is measured without it.
 
     Attributes:
     ----------
-    ws : WebSocket
-        The WebSocket connection instance.
-    results : dict
-        Stores command results keyed by their command ID.
-    result_events : dict
-        Stores threading events for each command ID to signal when results are ready.
+    ws : Transport
+        The connection instance.
+    pending : dict
+        Maps the ID of every in-flight command to its `Future`.
     connection_ready : threading.Event
         Event that signals when the WebSocket connection is established.
-    attach_ready : threading.Event
-        Event that signals when the browser is ready for command execution.
-    loaded : threading.Event
-        Event that signals when the page has loaded.
-    session_id : str
-        The session ID for the browser's DevTools protocol.
-    page : str
-        The ID of the current page.
+    main : Session
+        The session of the page the browser was started with.
+    sessions : dict
+        Maps the session ID of every attached page to its `Session`.
+    targets : dict
+        Maps the target ID of every attached or attaching page to its `Session`.
+    events : EventBus
+        Delivers events to the subscribers registered with `on` and `subscribe`.
     """
-    def __init__(self, ws: str, page_id: str):
-        self.ws = WebSocket(
-            url=ws,
-            runtime=self
-        )
-        self.results = {}
-        self.result_events = {}
-        self.connection_ready = threading.Event()
-        self.attach_ready = threading.Event()
-        self.loaded = threading.Event()
+    session_class = Session
+    event_type = threading.Event
+    event_bus_class = EventBus
+
+    def __init__(
+            self,
+            ws: str = None,
+            page_id: str = None,
+            transport: Transport = None,
+            event_queue_size: int = 10000,
+            event_policy: str = "drop_oldest",
+            codec: str = None,
+            instrumentation: Instrumentation = None
+        ):
+        if transport is not None:
+            transport.bind(self)
+            self.ws = transport
+        else:
+            self.ws = WebSocket(
+                url=ws,
+                runtime=self
+            )
+        self.init_state(event_queue_size, event_policy, codec, instrumentation)
         self.open_thread = threading.Thread(
             target=self.ws.run_forever,
             daemon=True
@@ -52,109 +86,331 @@ class Runtime:
         if not self.connection_ready.wait(timeout=10):
             raise TimeoutError("WebSocket connection was not established in time")
 
-        self.session_id = None
-        self.page = page_id
-        self.attach_to_target(self.page)
+        self.main = self.session_class(self, page_id or self.find_page())
+        self.attach(self.main)
+
+    def init_state(self, event_queue_size: int, event_policy: str, codec: str, instrumentation: Instrumentation):
+        """
+        Sets up the command, session and event state, whatever the connection is driven by.
+        """
+        self.pending = {}
+        self.sessions = {}
+        self.targets = {}
+        self.origins = set()
+        self.events = self.event_bus_class(event_queue_size, event_policy)
+        self.codec = get_codec(codec)
+        self.skipped = 0
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.bind(self)
+        self.handlers = {
+            "Target.attachedToTarget": self.on_attached,
+            "Target.detachedFromTarget": self.on_detached
+        }
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.connection_ready = self.event_type()
+
+    @property
+    def page(self):
+        """The target ID of the main page."""
+        return self.main.target_id
+
+    @property
+    def session_id(self):
+        """The session ID of the main page."""
+        return self.main.session_id
+
+    @property
+    def attach_ready(self):
+        """Event that signals when the main page is ready for command execution."""
+        return self.main.attach_ready
+
+    @property
+    def loaded(self):
+        """Event that signals when the main page has loaded."""
+        return self.main.loaded
 
     def get_command_id(self):
         """
-        Generates a unique command ID for each DevTools Protocol command.
+        Generates a unique, monotonically increasing ID for each DevTools Protocol command.
+        """
+        with self._lock:
+            return next(self._ids)
+
+    def insert_command(self, command_id, command_result, error: Exception = None):
+        """
+        Resolves the future of the command with the given command ID, failing it with `error`.
+        """
+        with self._lock:
+            future = self.pending.pop(command_id, None)
+
+        if future is None:
+            return
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(command_result)
+        except InvalidStateError:
+            # Cancelled by its caller while the response was on its way.
+            pass
+
+    def discard_command(self, command_id):
+        """
+        Forgets an in-flight command, its response will be ignored when it arrives.
         """
-        return random.randint(1, 1000000)
+        with self._lock:
+            future = self.pending.pop(command_id, None)
+
+        if future is not None:
+            future.cancel()
 
-    def insert_command(self, command_id, command_result):
+    def _on_command_done(self, future: Future):
         """
-        Stores the result of a command for the given command ID.
+        Drops cancelled commands from the pending table, whoever cancelled them.
         """
-        self.results[command_id] = command_result
-        if command_id in self.result_events:
-            self.result_events[command_id].set()
+        if future.cancelled():
+            with self._lock:
+                self.pending.pop(future.command_id, None)
 
-    def retrieve_command_results(self, command_id):
+    def retrieve_command_results(self, command_id, future: Future, timeout: float = 15):
         """
         Waits for the results of a command with the given command ID.
         """
-        event = self.result_events.get(command_id, threading.Event())
-        if not event.wait(timeout=15):
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.discard_command(command_id)
             raise TimeoutError("results Timed out")
+        except CancelledError:
+            self.discard_command(command_id)
+            raise
 
-        return self.results.pop(int(command_id), None)
+    def attach(self, session):
+        """
+        Attaches the given session to its target.
+        """
+        self.targets[session.target_id] = session
+        return self.attach_to_target(session.target_id)
 
     def attach_to_target(self, target_id):
         """
         Sends a request to attach to the specified browser target (e.g., a page or frame).
         """
-        attach_message = {
-            "id": self.get_command_id(),
+        return self.send_command({
             "method": "Target.attachToTarget",
             "params": {
                 "targetId": target_id,
                 "flatten": True
             }
-        }
-        self.ws.send(json.dumps(attach_message))
+        }, session_id=None)
+
+    def send_command(self, cdp_obj, session_id=False) -> Future:
+        """
+        Sends a DevTools Protocol command without waiting for its response.
+
+        Returns the `Future` resolved with the command result, `future.command_id`
+        holds the ID the command was sent with. The session defaults to the main page.
+        """
+        command_id = self.get_command_id()
+        future = Future()
+        future.command_id = command_id
+        future.add_done_callback(self._on_command_done)
 
-    def execute_command(self, cdp_obj) -> None|str:
+        message = dict(cdp_obj, id=command_id)
+        session_id = self.session_id if session_id is False else session_id
+        if session_id is not None:
+            message["sessionId"] = session_id
+
+        with self._lock:
+            self.pending[command_id] = future
+
+        try:
+            data = self.codec.dumps(message)
+            if self.instrumentation is not None:
+                self.instrumentation.on_send(future, message, data)
+            self.ws.send(data)
+        except Exception as er:
+            with self._lock:
+                self.pending.pop(command_id, None)
+            future.set_exception(er)
+
+        return future
+
+    def execute_command(self, cdp_obj, timeout: float = 15) -> None|str:
+        """
+        Sends a DevTools Protocol command to the main page and waits for its result.
         """
-        Sends a DevTools Protocol command to the browser.
+        return self.main.execute_command(cdp_obj, timeout)
+
+    def find_page(self, timeout: float = 15) -> str:
+        """
+        Returns the target ID of the browser's first page, opening one if there is none.
         """
-        if not self.attach_ready.wait(timeout=10):
+        future = self.send_command({"method": "Target.getTargets"}, session_id=None)
+        for target in self.retrieve_command_results(future.command_id, future, timeout)["targetInfos"]:
+            if target["type"] == "page":
+                return target["targetId"]
+
+        future = self.send_command({
+            "method": "Target.createTarget",
+            "params": {
+                "url": "about:blank"
+            }
+        }, session_id=None)
+        return self.retrieve_command_results(future.command_id, future, timeout)["targetId"]
+
+    def new_session(self, url: str = "about:blank", timeout: float = 15) -> Session:
+        """
+        Opens a new page in the browser and attaches a session to it.
+        """
+        future = self.send_command({
+            "method": "Target.createTarget",
+            "params": {
+                "url": url
+            }
+        }, session_id=None)
+        result = self.retrieve_command_results(future.command_id, future, timeout)
+
+        session = self.session_class(self, result["targetId"])
+        self.attach(session)
+        if not session.attach_ready.wait(timeout=10):
             raise TimeoutError("Attach Failed")
-        
-        if cdp_obj["method"] != "Page.navigate":
-            if not self.loaded.wait(timeout=30):
-                raise TimeoutError("Page failed to load")
 
-        command_id = self.get_command_id()
+        session.loaded.set()
+        return session
+
+    def close_session(self, session: Session, timeout: float = 15):
+        """
+        Closes the page of the given session.
+        """
+        future = self.send_command({
+            "method": "Target.closeTarget",
+            "params": {
+                "targetId": session.target_id
+            }
+        }, session_id=None)
+        self.retrieve_command_results(future.command_id, future, timeout)
+        self.forget(session)
 
-        event = threading.Event()
-        self.result_events[command_id] = event
+    def forget(self, session: Session):
+        """
+        Drops a detached session from the routing tables.
+        """
+        self.sessions.pop(session.session_id, None)
+        self.targets.pop(session.target_id, None)
+        session.detach()
 
-        cdp_obj["id"] = command_id
-        cdp_obj["sessionId"] = self.session_id
-        self.ws.send(json.dumps(cdp_obj))
+    def on(self, method: str, callback, session_id: str = None) -> Subscription:
+        """
+        Calls `callback(params)` for every `method` event, optionally of one session only.
+        Callbacks run on a dispatcher thread, never on the connection's reader.
+        """
+        return self.events.subscribe(method, callback, session_id)
 
-        result = self.retrieve_command_results(command_id)
-        return result
+    def subscribe(self, method: str, maxsize: int = 1000, policy: str = "drop_oldest", session_id: str = None) -> Subscription:
+        """
+        Collects the params of every `method` event into a bounded queue, the returned
+        subscription is iterated over to consume them. See `EventQueue` for the policies.
+        """
+        return self.events.queue(method, maxsize, policy, session_id)
 
-    def attach_new_frame(self, response):
+    def off(self, subscription: Subscription):
         """
-        Attaches to a new frame based on the response from the browser.
+        Cancels a subscription made with `on` or `subscribe`.
         """
-        command_id = response["id"]
-        new_target_id = response["result"]["frameId"]
-        self.insert_command(command_id, response["result"])
-        self.attach_to_target(new_target_id)
-        self.loaded.set()
+        self.events.remove(subscription)
+
+    def disconnected(self):
+        """
+        Called by the transport once the connection is gone.
+        """
+        self.cancel_all()
+        for session in list(self.sessions.values()):
+            session.detach()
+        self.events.close()
+        if self.instrumentation is not None:
+            self.instrumentation.unbind(self)
+
+    def cancel_all(self):
+        """
+        Cancels every in-flight command, used when the connection goes away.
+        """
+        with self._lock:
+            pending, self.pending = self.pending, {}
+
+        for future in pending.values():
+            future.cancel()
 
     def handle_commands(self, response):
         """
         Handles the results of commands received from the WebSocket.
         """
-        command_id = response["id"]
-        if "undefined" not in response:
-            if "result" in response and "value" or "data" in response:
-                self.insert_command(command_id, response["result"])
-            else:
-                self.insert_command(command_id, None)
+        if "error" in response:
+            self.insert_command(response["id"], None, ProtocolError(response["error"]))
         else:
-            self.insert_command(command_id, None)
+            self.insert_command(response["id"], response.get("result"))
+
+    def on_attached(self, params):
+        """
+        Binds the session ID the browser assigned to the session attaching to the target.
+        """
+        session = self.targets.get(params["targetInfo"]["targetId"])
+        if session is None or session.session_id is not None:
+            return
+
+        self.sessions[params["sessionId"]] = session
+        session.on_attached(params["sessionId"])
+
+    def on_detached(self, params):
+        """
+        Drops a session the browser detached, e.g. because its page was closed.
+        """
+        session = self.sessions.get(params["sessionId"])
+        if session is not None:
+            self.forget(session)
+
+    def wants(self, method: str) -> bool:
+        """
+        Whether anything handles or subscribed to the given event method.
+        """
+        if method in self.handlers or method in self.session_class.handled_methods or method in self.events:
+            return True
+        return any(method in session.listeners for session in list(self.sessions.values()))
 
     def on_message(self, ws, message):
         """
         Called when a message is received from the WebSocket.
+
+        Responses resolve their command, events are routed by method to the runtime's own
+        handlers, to the session named by their `sessionId` and to the event bus. Events
+        nobody listens to are recognised from their first bytes and never decoded.
         """
-        response = json.loads(message)
+        if self.instrumentation is not None:
+            self.instrumentation.on_receive(message)
+
+        method = peek_method(message)
+        if method is not None and not self.wants(method):
+            self.skipped += 1
+            return
+
+        response = self.codec.loads(message)
 
-        if response.get("method") == "Target.attachedToTarget":
-            self.attach_ready.set()
-            self.session_id = response["params"]["sessionId"]
+        if "id" in response:
+            if self.instrumentation is not None:
+                self.instrumentation.on_response(self.pending.get(response["id"]), response)
+            self.handle_commands(response)
+            return
 
-        if response.get("method") == "Page.loadEventFired":
-            self.loaded.set()
+        method = response.get("method")
+        handler = self.handlers.get(method)
+        if handler is not None:
+            handler(response["params"])
 
-        if "frameId" in message:
-            self.attach_new_frame(response)
+        session = self.sessions.get(response.get("sessionId"))
+        if session is not None:
+            session.on_event(response)
 
-        if "method" not in message:
-            self.handle_commands(response)
\ No newline at end of file
+        if method in self.events:
+            self.events.publish(response)
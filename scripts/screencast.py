@@ -0,0 +1,183 @@
+import base64
+import io
+import threading
+from collections import deque
+from PIL import Image
+
+class ScreencastFrame:
+    """
+    One frame of a screencast, decoded lazily so dropped frames cost nothing.
+    """
+
+    def __init__(self, data: str, metadata: dict) -> None:
+        self.encoded = data
+        self.metadata = metadata
+
+    @property
+    def data(self) -> bytes:
+        """The encoded image bytes."""
+        return base64.b64decode(self.encoded)
+
+    def image(self) -> Image.Image:
+        """The frame as a PIL image."""
+        return Image.open(io.BytesIO(self.data))
+
+
+class Screencast:
+    """
+    Streams frames of a page through `Page.startScreencast`.
+
+    Chromium sends no new frame until the last one is acknowledged, so frames are only
+    acknowledged while fewer than `buffer_size` are buffered, otherwise once the consumer
+    takes one. A consumer falling behind slows the capture down instead of having frames
+    captured, sent and decoded for nothing. `dropped` counts the frames still discarded
+    because one was already on its way when the buffer filled up. Iteration ends once
+    the screencast is stopped or its page detached, after the buffered frames.
+
+    Usage:
+        with page.screencast(quality=60, max_width=1280) as frames:
+            for frame in frames:
+                frame.image().save(...)
+    """
+
+    def __init__(
+            self,
+            page,
+            format: str = "jpeg",
+            quality: int = 80,
+            max_width: int = None,
+            max_height: int = None,
+            every_nth_frame: int = 1,
+            buffer_size: int = 2
+        ) -> None:
+        self.page = page
+        self.session = page.session
+        self.params = {"format": format, "quality": quality, "everyNthFrame": every_nth_frame}
+        if max_width is not None:
+            self.params["maxWidth"] = max_width
+        if max_height is not None:
+            self.params["maxHeight"] = max_height
+
+        self.frames = deque()
+        self.buffer_size = buffer_size
+        self.ready = self.session.runtime.event_type()
+        self.dropped = 0
+        self.unacked = None
+        self.running = False
+        self._lock = threading.Lock()
+
+    def ack(self, frame_id: int):
+        self.session.send_command({
+            "method": "Page.screencastFrameAck",
+            "params": {
+                "sessionId": frame_id
+            }
+        })
+
+    def on_frame(self, params):
+        with self._lock:
+            if len(self.frames) >= self.buffer_size:
+                self.frames.popleft()
+                self.dropped += 1
+            self.frames.append(ScreencastFrame(params["data"], params.get("metadata", {})))
+            if len(self.frames) < self.buffer_size:
+                frame_id = params["sessionId"]
+            else:
+                # Held until the consumer makes room, which pauses the browser meanwhile.
+                frame_id, self.unacked = None, params["sessionId"]
+        if frame_id is not None:
+            self.ack(frame_id)
+        self.ready.set()
+
+    def take(self):
+        """Pops the oldest buffered frame, acknowledging the held one now that there is room."""
+        with self._lock:
+            if not self.frames:
+                return None
+            frame = self.frames.popleft()
+            frame_id, self.unacked = self.unacked, None
+        if frame_id is not None and self.running:
+            self.ack(frame_id)
+        return frame
+
+    def start_command(self) -> dict:
+        self.running = True
+        self.session.add_listener("Page.screencastFrame", self.on_frame)
+        self.session.detach_callbacks.append(self.on_detached)
+        return {"method": "Page.startScreencast", "params": self.params}
+
+    def stop_command(self) -> dict:
+        self.running = False
+        self.session.remove_listener("Page.screencastFrame", self.on_frame)
+        if self.on_detached in self.session.detach_callbacks:
+            self.session.detach_callbacks.remove(self.on_detached)
+        self.ready.set()
+        return {"method": "Page.stopScreencast"}
+
+    def on_detached(self):
+        """No frame will come anymore, lets the consumer finish the buffered ones."""
+        self.stop_command()
+
+    def start(self):
+        """Starts streaming frames."""
+        self.session.execute_command(cdp_obj=self.start_command())
+        return self
+
+    def stop(self):
+        """Stops streaming, frames already buffered can still be consumed."""
+        command = self.stop_command()
+        if not self.session.detached:
+            self.session.execute_command(cdp_obj=command)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> ScreencastFrame:
+        while True:
+            self.ready.clear()
+            if (frame := self.take()) is not None:
+                return frame
+            if not self.running:
+                raise StopIteration
+            self.ready.wait()
+
+
+class AsyncScreencast(Screencast):
+    """
+    asyncio counterpart of `Screencast`, consumed with `async for`.
+    """
+
+    async def start(self):
+        """Starts streaming frames."""
+        await self.session.execute_command(cdp_obj=self.start_command())
+        return self
+
+    async def stop(self):
+        """Stops streaming, frames already buffered can still be consumed."""
+        command = self.stop_command()
+        if not self.session.detached:
+            await self.session.execute_command(cdp_obj=command)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> ScreencastFrame:
+        while True:
+            self.ready.clear()
+            if (frame := self.take()) is not None:
+                return frame
+            if not self.running:
+                raise StopAsyncIteration
+            await self.ready.wait()
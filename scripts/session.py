@@ -0,0 +1,333 @@
+import itertools
+import threading
+from concurrent.futures import Future
+from .exceptions import NavigationError
+
+MILESTONES = {
+    "commit": "commit",
+    "domcontentloaded": "DOMContentLoaded",
+    "load": "load",
+    "networkidle": "networkIdle"
+}
+
+class Frame:
+    """
+    Lifecycle state of one frame of a page.
+
+    Attributes:
+    ----------
+    loader_id : str
+        The loader of the document currently in the frame, new for every navigation.
+    milestones : set
+        The lifecycle events (`commit`, `DOMContentLoaded`, `load`, `networkIdle`...)
+        the current document has reached.
+    previous : list
+        The latest loaders this frame navigated away from.
+    """
+    history = 8
+
+    def __init__(self, frame_id: str):
+        self.id = frame_id
+        self.url = None
+        self.loader_id = None
+        self.milestones = set()
+        self.previous = []
+
+    def advance(self, loader_id: str, name: str):
+        """Records a lifecycle event, starting over when a new document is loading."""
+        if loader_id != self.loader_id:
+            if self.loader_id is not None:
+                self.previous = (self.previous + [self.loader_id])[-self.history:]
+            self.loader_id = loader_id
+            self.milestones = set()
+        self.milestones.add(name)
+
+    def reached(self, loader_id: str, name: str) -> bool:
+        """Whether the given navigation reached the milestone or was superseded by another one."""
+        if loader_id == self.loader_id:
+            return name in self.milestones
+        return loader_id in self.previous
+
+
+class Session:
+    """
+    Per-target state of a flattened DevTools Protocol session.
+
+    Every page attached through the browser's WebSocket owns one `Session`, the
+    `Runtime` routes events and responses carrying its `sessionId` here, so pages
+    keep independent lifecycle state and in-flight commands over the shared connection.
+    Lifecycle events are tracked per frame and per navigation, so navigations can
+    wait for exactly the milestone they need.
+
+    Parameters:
+    ----------
+    runtime : Runtime
+        The runtime owning the connection.
+    target_id : str
+        The ID of the target this session is attached to.
+
+    Attributes:
+    ----------
+    session_id : str
+        The session ID assigned by the browser once attached.
+    attach_ready : threading.Event
+        Event that signals when the session is attached.
+    loaded : threading.Event
+        Event that signals when the main frame's current document has loaded.
+    frames : dict
+        Maps frame IDs to their `Frame`, the main frame's ID is the target ID.
+    contexts : dict
+        Maps frame IDs to the ID of their default JavaScript execution context.
+    object_group : str
+        The object group remote objects of the page are created in.
+    handles : dict
+        Element handles cached by query, dropped when the main frame navigates.
+    commands : set
+        IDs of the commands this session has in flight.
+    listeners : dict
+        Maps event methods to the callbacks receiving their params on the reader thread.
+    router : Router
+        Intercepts the page's requests once a route or block is set up.
+    detached : bool
+        Whether the session is gone, with its page or the connection.
+    detach_callbacks : list
+        Called without arguments once the session is detached, by consumers waiting on its events.
+    """
+    handled_methods = frozenset((
+        "Page.lifecycleEvent",
+        "Page.frameNavigated",
+        "Page.frameDetached",
+        "Runtime.executionContextCreated",
+        "Runtime.executionContextDestroyed",
+        "Runtime.executionContextsCleared"
+    ))
+
+    def __init__(self, runtime, target_id: str):
+        self.runtime = runtime
+        self.target_id = target_id
+        self.session_id = None
+        self.attach_ready = runtime.event_type()
+        self.loaded = runtime.event_type()
+        self.frames = {}
+        self.contexts = {}
+        self.handles = {}
+        self.generation = itertools.count()
+        self.object_group = None
+        self.reset_handles()
+        self.waiters = []
+        self.commands = set()
+        self.listeners = {}
+        self.router = None
+        self.detached = False
+        self.detach_callbacks = []
+        self.performance = False
+        self.handlers = {
+            "Page.lifecycleEvent": lambda params: self.on_lifecycle(params["frameId"], params["loaderId"], params["name"]),
+            "Page.frameNavigated": self.on_frame_navigated,
+            "Page.frameDetached": self.on_frame_detached,
+            "Runtime.executionContextCreated": self.on_context_created,
+            "Runtime.executionContextDestroyed": self.on_context_destroyed,
+            "Runtime.executionContextsCleared": self.on_contexts_cleared
+        }
+        self._lock = threading.Lock()
+
+    def send_command(self, cdp_obj) -> Future:
+        """
+        Sends a command on this session without waiting for its response.
+        """
+        future = self.runtime.send_command(cdp_obj, session_id=self.session_id)
+        self.commands.add(future.command_id)
+        future.add_done_callback(self._on_command_done)
+        return future
+
+    def _on_command_done(self, future: Future):
+        self.commands.discard(future.command_id)
+
+    def execute_command(self, cdp_obj, timeout: float = 15) -> None|str:
+        """
+        Sends a command on this session and waits for its result.
+        """
+        if not self.attach_ready.wait(timeout=10):
+            raise TimeoutError("Attach Failed")
+
+        future = self.send_command(cdp_obj)
+        return self.runtime.retrieve_command_results(future.command_id, future, timeout)
+
+    def navigate(self, url: str, wait_until: str = "load"):
+        """
+        Sends `Page.navigate`, returns its future and the lifecycle event `wait_until` stands for.
+        """
+        if wait_until not in MILESTONES:
+            raise ValueError("wait_until must be one of {}".format(", ".join(MILESTONES)))
+
+        future = self.send_command({
+            "method": "Page.navigate",
+            "params": {
+                "url": url
+            }
+        })
+        return future, MILESTONES[wait_until]
+
+    def on_navigated(self, result, milestone):
+        """
+        Checks the `Page.navigate` result and returns the event set once it reaches the
+        milestone, or None for same-document navigations which have no lifecycle.
+        """
+        if result is None:
+            raise NavigationError("Navigation failed")
+        if result.get("errorText"):
+            raise NavigationError(result["errorText"])
+        if result.get("loaderId") is None:
+            return None
+
+        return self.wait_for_milestone(result["frameId"], result["loaderId"], milestone)
+
+    def goto(self, url: str, wait_until: str = "load", timeout: float = 30):
+        """
+        Navigates the page and waits until the navigation reaches `wait_until`:
+        `commit`, `domcontentloaded`, `load` or `networkidle`.
+        """
+        if not self.attach_ready.wait(timeout=10):
+            raise TimeoutError("Attach Failed")
+
+        future, milestone = self.navigate(url, wait_until)
+        result = self.runtime.retrieve_command_results(future.command_id, future, timeout)
+        event = self.on_navigated(result, milestone)
+        if event is not None and not event.wait(timeout=timeout):
+            raise TimeoutError("Navigation to {} did not reach {} in time".format(url, wait_until))
+
+    def wait_for_milestone(self, frame_id: str, loader_id: str, name: str):
+        """
+        Returns an event set once the given navigation of the frame reaches the lifecycle event.
+        """
+        event = self.runtime.event_type()
+        with self._lock:
+            self.waiters.append((frame_id, loader_id, name, event))
+        self.notify()
+        return event
+
+    def notify(self):
+        """
+        Releases the waiters whose milestone has been reached.
+        """
+        with self._lock:
+            waiting = []
+            for waiter in self.waiters:
+                frame_id, loader_id, name, event = waiter
+                frame = self.frames.get(frame_id)
+                if frame is not None and frame.reached(loader_id, name):
+                    event.set()
+                else:
+                    waiting.append(waiter)
+            self.waiters = waiting
+
+    def reset_handles(self):
+        """
+        Forgets the cached element handles and moves to a fresh object group.
+        """
+        self.handles = {}
+        self.object_group = "navium_{}".format(next(self.generation))
+
+    def on_attached(self, session_id: str):
+        """
+        Called once the browser attached the session, turns on lifecycle events.
+        """
+        self.session_id = session_id
+        self.send_command({"method": "Page.enable"})
+        self.send_command({"method": "Runtime.enable"})
+        self.send_command({
+            "method": "Page.setLifecycleEventsEnabled",
+            "params": {
+                "enabled": True
+            }
+        })
+        self.attach_ready.set()
+
+    def on_lifecycle(self, frame_id: str, loader_id: str, name: str):
+        """
+        Records a lifecycle event of one of the page's frames.
+        """
+        frame = self.frames.get(frame_id)
+        if frame is None:
+            frame = self.frames[frame_id] = Frame(frame_id)
+
+        if frame_id == self.target_id:
+            if loader_id != frame.loader_id:
+                self.loaded.clear()
+                self.reset_handles()
+            if name == "load":
+                self.loaded.set()
+
+        frame.advance(loader_id, name)
+        self.notify()
+
+    def add_listener(self, method: str, callback):
+        """
+        Calls `callback(params)` for every `method` event of this session, on the reader thread.
+        Reserved for internal consumers which never block, users subscribe through `Runtime.on`.
+        """
+        self.listeners[method] = self.listeners.get(method, []) + [callback]
+
+    def remove_listener(self, method: str, callback):
+        # Compared by equality, bound methods are new objects on every attribute access.
+        listeners = [c for c in self.listeners.get(method, []) if c != callback]
+        if listeners:
+            self.listeners[method] = listeners
+        else:
+            # Without listeners the method must stop counting for `Runtime.wants`.
+            self.listeners.pop(method, None)
+
+    def on_frame_navigated(self, params):
+        frame = params["frame"]
+        self.on_lifecycle(frame["id"], frame["loaderId"], "commit")
+        self.frames[frame["id"]].url = frame.get("url")
+        origin = frame.get("securityOrigin")
+        if origin and origin.startswith(("http://", "https://")):
+            # Remembered so `Browser.reset` can clear the storage of every origin visited.
+            self.runtime.origins.add(origin)
+
+    def on_frame_detached(self, params):
+        self.frames.pop(params["frameId"], None)
+        self.contexts.pop(params["frameId"], None)
+
+    def on_context_created(self, params):
+        aux = params["context"].get("auxData", {})
+        if aux.get("isDefault"):
+            self.contexts[aux["frameId"]] = params["context"]["id"]
+
+    def on_context_destroyed(self, params):
+        for frame_id, context_id in list(self.contexts.items()):
+            if context_id == params["executionContextId"]:
+                del self.contexts[frame_id]
+
+    def on_contexts_cleared(self, params):
+        self.contexts.clear()
+        self.reset_handles()
+
+    def on_event(self, response):
+        """
+        Called with every event the browser sends on this session.
+        """
+        method = response["method"]
+        params = response.get("params", {})
+
+        handler = self.handlers.get(method)
+        if handler is not None:
+            handler(params)
+
+        for callback in self.listeners.get(method, ()):
+            callback(params)
+
+    def detach(self):
+        """
+        Cancels the commands still in flight, closes the router and wakes up the consumers
+        of its events once the session is gone.
+        """
+        self.detached = True
+        if self.router is not None:
+            self.router.close()
+            self.router = None
+        for callback in list(self.detach_callbacks):
+            callback()
+        for command_id in list(self.commands):
+            self.runtime.discard_command(command_id)
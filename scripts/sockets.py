@@ -1,3 +1,4 @@
+import asyncio
 from websocket import WebSocketApp
 from .exceptions import WebSocketError
 
@@ -39,5 +40,88 @@ class WebSocket(WebSocketApp):
     def on_close(self, ws, code, msg):
         """
         Called when the WebSocket connection is closed.
+        Notifies the runtime, which cancels the commands still waiting for a response.
         """
-        pass
\ No newline at end of file
+        self.runtime.disconnected()
+
+class AsyncWebSocket:
+    """
+    asyncio counterpart of `WebSocket`, backed by the `websockets` package.
+
+    `send` is synchronous and only queues the frame, a writer task flushes the
+    queue in order so callers never wait on the socket. It may be called from
+    other threads, the frame is then handed over to the event loop.
+
+    Parameters:
+    ----------
+    url : str
+        The WebSocket URL of the Chromium instance.
+    runtime : AsyncRuntime
+        An instance of the AsyncRuntime class to handle WebSocket responses.
+    """
+
+    def __init__(self, url, runtime):
+        self.url = url
+        self.runtime = runtime
+        self.connection = None
+        self.outgoing = None
+        self.loop = None
+        self.tasks = []
+
+    async def connect(self):
+        """
+        Opens the connection and starts the reader and writer tasks.
+        """
+        try:
+            import websockets
+        except ImportError as er:
+            raise WebSocketError("The asyncio API requires `websockets`, install it with `pip install navium[async]`") from er
+
+        self.connection = await websockets.connect(self.url, max_size=None, ping_interval=None)
+        self.outgoing = asyncio.Queue()
+        self.loop = asyncio.get_running_loop()
+        self.tasks = [
+            asyncio.create_task(self.reader()),
+            asyncio.create_task(self.writer())
+        ]
+        self.runtime.connection_ready.set()
+
+    def send(self, data):
+        """
+        Queues a frame to be sent on the connection.
+        """
+        if self.outgoing is None:
+            raise WebSocketError("The WebSocket connection is not open")
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self.loop:
+            self.outgoing.put_nowait(data)
+        else:
+            self.loop.call_soon_threadsafe(self.outgoing.put_nowait, data)
+
+    async def reader(self):
+        try:
+            async for message in self.connection:
+                self.runtime.on_message(self, message)
+        finally:
+            self.runtime.disconnected()
+
+    async def writer(self):
+        while True:
+            data = await self.outgoing.get()
+            await self.connection.send(data)
+
+    async def close(self):
+        """
+        Closes the connection and stops the reader and writer tasks.
+        """
+        for task in self.tasks:
+            task.cancel()
+        if self.connection is not None:
+            await self.connection.close()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.runtime.disconnected()
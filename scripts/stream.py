@@ -0,0 +1,257 @@
+import asyncio
+import base64
+import io
+import itertools
+import json
+import queue
+from .exceptions import ScriptError
+
+STREAM_FUNCTION = """async function (name, chunkSize, window, args) {
+    const source = (%s);
+    const send = globalThis[name];
+    const streams = globalThis.__navium_streams = globalThis.__navium_streams || {};
+    let acked = 0, wake = null, seq = 0, chunk = [], cancelled = false;
+    const resume = () => { if (wake !== null) { const w = wake; wake = null; w(); } };
+    streams[name] = {
+        ack(n) { acked = Math.max(acked, n); resume(); },
+        cancel() { cancelled = true; resume(); }
+    };
+    const flush = async () => {
+        seq += 1;
+        send(JSON.stringify({seq: seq, items: chunk}));
+        chunk = [];
+        while (seq - acked >= window && !cancelled) await new Promise((resolve) => { wake = resolve; });
+        if (cancelled) throw null;
+    };
+    try {
+        let iterable = source(...args);
+        if (iterable && typeof iterable.then === "function") iterable = await iterable;
+        for await (const item of iterable) {
+            chunk.push(item);
+            if (chunk.length >= chunkSize) await flush();
+        }
+        if (chunk.length) await flush();
+        send(JSON.stringify({done: true}));
+    } catch (e) {
+        if (!cancelled) send(JSON.stringify({error: String(e && e.message || e)}));
+    } finally {
+        delete streams[name];
+    }
+}"""
+
+_names = itertools.count(1)
+
+def snake_to_camel(name: str) -> str:
+    head, *rest = name.split("_")
+    return head + "".join(part.title() for part in rest)
+
+def open_output(output):
+    """Returns the file to write to and whether it is ours to close, bytes go to a `BytesIO`."""
+    if output is None:
+        return io.BytesIO(), False
+    if isinstance(output, str):
+        return open(output, "wb"), True
+    return output, False
+
+
+class Stream:
+    """
+    Streams the items a JS generator yields out of the page in chunks.
+
+    The page pushes chunks of `chunk_size` items through a `Runtime.addBinding` binding,
+    and stops once `window` chunks are unacknowledged. A chunk is acknowledged when it
+    is handed to the consumer, so neither side ever holds more than `window` chunks.
+    Every chunk is a separate protocol message. The reader thread decodes its envelope,
+    the `Runtime.bindingCalled` event, but the chunk's own JSON payload is only decoded
+    on the consumer's thread, so a large extraction never lands in memory at once.
+
+    `source` is a JS function returning an iterable or async iterable, typically a
+    generator function, called with `args`.
+
+    Usage:
+        rows = page.stream("function* (s) { for (const tr of document.querySelectorAll(s)) yield tr.innerText; }", "tr")
+        for chunk in rows:
+            process(chunk)
+    """
+
+    def __init__(self, page, source: str, args: tuple = (), chunk_size: int = 1000, window: int = 4, timeout: float = 30) -> None:
+        self.page = page
+        self.session = page.session
+        self.source = source
+        self.args = args
+        self.chunk_size = chunk_size
+        self.window = window
+        self.timeout = timeout
+        self.name = "__navium_stream_{}".format(next(_names))
+        self.chunks = self.make_queue()
+        self.future = None
+        self.finished = False
+
+    def make_queue(self):
+        return queue.Queue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def on_binding(self, params):
+        if params.get("name") == self.name:
+            self.chunks.put_nowait(params["payload"])
+
+    def function_command(self) -> dict:
+        return self.page.function_command(
+            STREAM_FUNCTION % self.source,
+            (self.name, self.chunk_size, self.window, list(self.args)),
+            returnValue=True,
+            awaitPromise=True
+        )
+
+    def control_command(self, call: str) -> dict:
+        return {
+            "method": "Runtime.evaluate",
+            "params": {
+                "expression": "globalThis.__navium_streams && globalThis.__navium_streams.{0} && globalThis.__navium_streams.{0}.{1}".format(self.name, call)
+            }
+        }
+
+    def ack_command(self, seq: int) -> dict:
+        return self.control_command("ack({})".format(seq))
+
+    def on_finished(self, future):
+        """Fails the stream when the function could not run at all, e.g. on a syntax error."""
+        if future.cancelled():
+            return
+        try:
+            result = future.result() or {}
+        except Exception as er:
+            self.chunks.put_nowait(json.dumps({"error": str(er)}))
+            return
+
+        details = result.get("exceptionDetails")
+        if details is not None:
+            error = details.get("exception", {}).get("description") or details.get("text", "Script failed")
+            self.chunks.put_nowait(json.dumps({"error": error}))
+
+    def parse(self, payload: str):
+        """Returns the chunk's items, or None once the stream is done."""
+        message = json.loads(payload)
+        if "error" in message:
+            self.finished = True
+            raise ScriptError(message["error"])
+        if message.get("done"):
+            self.finished = True
+            return None
+        return message
+
+    def start(self):
+        self.session.add_listener("Runtime.bindingCalled", self.on_binding)
+        self.session.execute_command(cdp_obj={"method": "Runtime.addBinding", "params": {"name": self.name}})
+        self.future = self.session.send_command(self.function_command())
+        self.future.add_done_callback(self.on_finished)
+        return self
+
+    def __iter__(self):
+        if self.future is None:
+            self.start()
+        try:
+            while not self.finished:
+                try:
+                    payload = self.chunks.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError("The stream produced nothing for {} seconds".format(self.timeout))
+
+                message = self.parse(payload)
+                if message is None:
+                    break
+                self.session.send_command(self.ack_command(message["seq"]))
+                yield message["items"]
+        finally:
+            self.close()
+
+    def close(self):
+        """Stops listening, stops the generator if it is still running and removes the binding."""
+        self.session.remove_listener("Runtime.bindingCalled", self.on_binding)
+        if self.future is not None:
+            if not self.finished:
+                self.session.send_command(self.control_command("cancel()"))
+            self.session.send_command({"method": "Runtime.removeBinding", "params": {"name": self.name}})
+            self.future = None
+
+
+class AsyncStream(Stream):
+    """asyncio counterpart of `Stream`, iterated with `async for`."""
+
+    def make_queue(self):
+        return asyncio.Queue()
+
+    async def start(self):
+        self.session.add_listener("Runtime.bindingCalled", self.on_binding)
+        await self.session.execute_command(cdp_obj={"method": "Runtime.addBinding", "params": {"name": self.name}})
+        self.future = self.session.send_command(self.function_command())
+        self.future.add_done_callback(self.on_finished)
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        raise TypeError("AsyncStream is iterated with `async for`")
+
+    async def __aiter__(self):
+        if self.future is None:
+            await self.start()
+        try:
+            while not self.finished:
+                try:
+                    payload = await asyncio.wait_for(self.chunks.get(), self.timeout)
+                except asyncio.TimeoutError:
+                    raise TimeoutError("The stream produced nothing for {} seconds".format(self.timeout))
+
+                message = self.parse(payload)
+                if message is None:
+                    break
+                self.session.send_command(self.ack_command(message["seq"]))
+                yield message["items"]
+        finally:
+            self.close()
+
+
+def read_command(handle: str, chunk_size: int) -> dict:
+    return {"method": "IO.read", "params": {"handle": handle, "size": chunk_size}}
+
+def write_chunk(file, result: dict):
+    data = result.get("data", "")
+    file.write(base64.b64decode(data) if result.get("base64Encoded") else data.encode())
+
+def read_stream(session, handle: str, file, chunk_size: int = 1 << 20):
+    """Copies an `IO` stream to a file chunk by chunk with `IO.read`, then closes it."""
+    try:
+        while True:
+            result = session.execute_command(cdp_obj=read_command(handle, chunk_size))
+            write_chunk(file, result)
+            if result.get("eof"):
+                break
+    finally:
+        session.send_command({"method": "IO.close", "params": {"handle": handle}})
+
+async def read_stream_async(session, handle: str, file, chunk_size: int = 1 << 20):
+    """asyncio counterpart of `read_stream`."""
+    try:
+        while True:
+            result = await session.execute_command(cdp_obj=read_command(handle, chunk_size))
+            write_chunk(file, result)
+            if result.get("eof"):
+                break
+    finally:
+        session.send_command({"method": "IO.close", "params": {"handle": handle}})
+
+def pdf_params(options: dict) -> dict:
+    """Builds `Page.printToPDF` params from snake_case options, streamed rather than inlined."""
+    params = {snake_to_camel(name): value for name, value in options.items()}
+    params["transferMode"] = "ReturnAsStream"
+    return params
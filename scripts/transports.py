@@ -0,0 +1,102 @@
+import os
+import threading
+from .exceptions import WebSocketError
+
+class Transport:
+    """
+    Interface of the channels a `Runtime` speaks the DevTools Protocol over.
+
+    A transport is bound to its runtime, `run_forever` is run on the runtime's reader
+    thread and must set `runtime.connection_ready` once usable, then hand every
+    message, as text or bytes, to `runtime.on_message(transport, message)` until the channel closes.
+    `send` may be called from any thread. `WebSocket` is the default implementation.
+    """
+    runtime = None
+
+    def bind(self, runtime):
+        """Binds the transport to the runtime receiving its messages."""
+        self.runtime = runtime
+
+    def run_forever(self):
+        raise NotImplementedError
+
+    def send(self, data: str):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class PipeTransport(Transport):
+    """
+    Speaks the DevTools Protocol over the pipes of `--remote-debugging-pipe`.
+
+    Chromium reads commands from its fd 3 and writes responses to its fd 4, each
+    message being a JSON document terminated by a NUL byte.
+
+    Parameters:
+    ----------
+    read_fd : int
+        Our end of the pipe Chromium writes to (its fd 4).
+    write_fd : int
+        Our end of the pipe Chromium reads from (its fd 3).
+    """
+    chunk_size = 1 << 16
+
+    def __init__(self, read_fd: int, write_fd: int):
+        self.read_fd = read_fd
+        self.write_fd = write_fd
+        self.write_lock = threading.Lock()
+        self.closed = False
+
+    def run_forever(self):
+        """Reads NUL-delimited messages until the pipe closes."""
+        self.runtime.connection_ready.set()
+        buffer = b""
+        try:
+            while True:
+                chunk = os.read(self.read_fd, self.chunk_size)
+                if not chunk:
+                    break
+
+                *messages, buffer = (buffer + chunk).split(b"\0")
+                for message in messages:
+                    self.runtime.on_message(self, message)
+        finally:
+            os.close(self.read_fd)
+            self.runtime.disconnected()
+
+    def send(self, data: str):
+        """Writes one message to the browser."""
+        payload = memoryview((data.encode() if isinstance(data, str) else data) + b"\0")
+        with self.write_lock:
+            if self.closed:
+                raise WebSocketError("The pipe is closed")
+            while payload:
+                payload = payload[os.write(self.write_fd, payload):]
+
+    def close(self):
+        """
+        Closes our writing end, Chromium drops the debugging session when its fd 3 reaches EOF.
+        The reader stops once the browser closes its own end.
+        """
+        with self.write_lock:
+            if self.closed:
+                return
+            self.closed = True
+            os.close(self.write_fd)
+
+
+def pipe_fds_preexec(child_read: int, child_write: int):
+    """
+    Returns a `preexec_fn` placing the child's pipe ends on the fds 3 and 4 Chromium expects.
+    """
+    import fcntl
+
+    def preexec():
+        read_fd = fcntl.fcntl(child_read, fcntl.F_DUPFD, 10)
+        write_fd = fcntl.fcntl(child_write, fcntl.F_DUPFD, 10)
+        os.dup2(read_fd, 3)
+        os.dup2(write_fd, 4)
+
+    return preexec
@@ -0,0 +1,269 @@
+import asyncio
+import itertools
+import json
+import queue
+from .exceptions import ScriptError
+
+WATCH_FUNCTION = """function (name, fields, debounce) {
+    const send = globalThis[name];
+    const watches = globalThis.__navium_watches = globalThis.__navium_watches || {};
+    const read = (el, field) => field.startsWith("@") ? el.getAttribute(field.slice(1)) : el[field];
+    const extract = () => {
+        const values = {};
+        for (const [key, spec] of Object.entries(fields)) {
+            if (spec.all) {
+                values[key] = Array.from(document.querySelectorAll(spec.selector), (el) => read(el, spec.field));
+            } else {
+                const el = document.querySelector(spec.selector);
+                values[key] = el === null ? null : read(el, spec.field);
+            }
+        }
+        return values;
+    };
+    const last = {};
+    let timer = null, seq = 0;
+    const flush = () => {
+        timer = null;
+        const values = extract(), changes = {};
+        let changed = false;
+        for (const key in values) {
+            const value = JSON.stringify(values[key]);
+            if (value !== last[key]) {
+                last[key] = value;
+                changes[key] = values[key];
+                changed = true;
+            }
+        }
+        if (changed) send(JSON.stringify({seq: ++seq, changes: changes}));
+    };
+    const observer = new MutationObserver(() => {
+        if (timer === null) timer = setTimeout(flush, debounce);
+    });
+    observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    watches[name] = {
+        stop() { observer.disconnect(); clearTimeout(timer); delete watches[name]; }
+    };
+    flush();
+}"""
+
+WAIT_FUNCTION = """function (args, polling, timeout) {
+    const predicate = (%s);
+    return new Promise((resolve, reject) => {
+        let done = false, observer = null, frame = null, interval = null, timer = null;
+        const finish = (value, error) => {
+            if (done) return;
+            done = true;
+            if (observer !== null) observer.disconnect();
+            if (frame !== null) cancelAnimationFrame(frame);
+            clearInterval(interval);
+            clearTimeout(timer);
+            error ? reject(error) : resolve(value);
+        };
+        const check = () => {
+            if (done) return;
+            try {
+                const value = predicate(...args);
+                if (value) finish(value);
+            } catch (e) {
+                finish(null, e);
+            }
+        };
+        check();
+        if (done) return;
+        if (polling === "mutation") {
+            observer = new MutationObserver(check);
+            observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+        } else if (polling === "raf") {
+            const loop = () => { check(); if (!done) frame = requestAnimationFrame(loop); };
+            frame = requestAnimationFrame(loop);
+        } else {
+            interval = setInterval(check, polling);
+        }
+        timer = setTimeout(() => finish(null, new Error("navium:timeout")), timeout);
+    });
+}"""
+
+SELECTOR_PREDICATE = """function (selector, state) {
+    const el = document.querySelector(selector);
+    if (state === "attached") return el !== null;
+    if (state === "detached") return el === null;
+    const visible = el !== null && (el.offsetWidth > 0 || el.offsetHeight > 0 || el.getClientRects().length > 0)
+        && getComputedStyle(el).visibility !== "hidden";
+    return state === "visible" ? visible : !visible;
+}"""
+
+SELECTOR_STATES = {"attached": "mutation", "detached": "mutation", "visible": "raf", "hidden": "raf"}
+
+_names = itertools.count(1)
+
+def normalize_fields(fields) -> dict:
+    """
+    Accepts a list of selectors or a dict of `name: selector` or `name: {selector, field, all}`,
+    the field being an element property or an `@attribute`, `textContent` by default.
+    """
+    if isinstance(fields, (list, tuple)):
+        fields = {selector: selector for selector in fields}
+
+    normalized = {}
+    for name, spec in fields.items():
+        if isinstance(spec, str):
+            spec = {"selector": spec}
+        normalized[name] = {
+            "selector": spec["selector"],
+            "field": spec.get("field", "textContent"),
+            "all": bool(spec.get("all", False))
+        }
+    return normalized
+
+def wait_command(page, predicate: str, args, polling, timeout: float) -> dict:
+    if polling not in ("mutation", "raf") and not isinstance(polling, (int, float)):
+        raise ValueError("polling must be mutation, raf or an interval in milliseconds")
+    return page.function_command(WAIT_FUNCTION % predicate, (list(args), polling, int(timeout * 1000)), True, True)
+
+def context_lost(error: str) -> bool:
+    """Whether an error comes from the page's context going away under a navigation."""
+    error = error.lower()
+    return "context" in error and ("destroyed" in error or "cannot find" in error)
+
+def wait_result(results):
+    """
+    Returns `(done, value)` of one wait attempt. Attempts cut short by a navigation
+    (no result, or a destroyed context) are not done and are retried in the new document.
+    """
+    if not results:
+        return False, None
+
+    details = results.get("exceptionDetails")
+    if details is None:
+        return True, results.get("result", {}).get("value")
+
+    error = details.get("exception", {}).get("description") or details.get("text", "")
+    if "navium:timeout" in error:
+        raise TimeoutError("The condition was not met in time")
+    if context_lost(error):
+        return False, None
+    raise ScriptError(error)
+
+
+class Watch:
+    """
+    Watches fields of the page for changes, pushed by the page rather than polled.
+
+    A `MutationObserver` is installed once, after DOM mutations the fields are extracted
+    again in the page, at most once every `debounce` milliseconds, and only the fields
+    whose value changed are sent back through a binding. The first change holds every
+    field. `values` holds the latest value of every field.
+
+    The observer lives in the current document, watch again after a navigation.
+
+    Usage:
+        with page.watch({"price": ".price", "stock": {"selector": "#buy", "field": "@disabled"}}) as watch:
+            for changes in watch:
+                print(changes)
+    """
+
+    def __init__(self, page, fields, debounce: int = 50) -> None:
+        self.page = page
+        self.session = page.session
+        self.fields = normalize_fields(fields)
+        self.debounce = debounce
+        self.name = "__navium_watch_{}".format(next(_names))
+        self.changes = self.make_queue()
+        self.values = {}
+        self.started = False
+
+    def make_queue(self):
+        return queue.Queue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def on_binding(self, params):
+        if params.get("name") == self.name:
+            self.changes.put_nowait(params["payload"])
+
+    def install_command(self) -> dict:
+        return self.page.function_command(WATCH_FUNCTION, (self.name, self.fields, self.debounce), False, False)
+
+    def stop_command(self) -> dict:
+        return {
+            "method": "Runtime.evaluate",
+            "params": {
+                "expression": "globalThis.__navium_watches && globalThis.__navium_watches.{0} && globalThis.__navium_watches.{0}.stop()".format(self.name)
+            }
+        }
+
+    def check_installed(self, results):
+        details = (results or {}).get("exceptionDetails")
+        if details is not None:
+            raise ScriptError(details.get("exception", {}).get("description") or details.get("text", "Watch failed"))
+        self.started = True
+
+    def apply(self, payload: str) -> dict:
+        changes = json.loads(payload)["changes"]
+        self.values.update(changes)
+        return changes
+
+    def start(self):
+        self.session.add_listener("Runtime.bindingCalled", self.on_binding)
+        self.session.execute_command(cdp_obj={"method": "Runtime.addBinding", "params": {"name": self.name}})
+        self.check_installed(self.session.execute_command(cdp_obj=self.install_command()))
+        return self
+
+    def get(self, timeout: float = None) -> dict:
+        """Returns the next changes, waiting up to `timeout` seconds for them."""
+        if not self.started:
+            self.start()
+        try:
+            return self.apply(self.changes.get(timeout=timeout))
+        except queue.Empty:
+            raise TimeoutError("Nothing changed for {} seconds".format(timeout))
+
+    def __iter__(self):
+        while True:
+            yield self.get()
+
+    def close(self):
+        """Disconnects the observer and removes the binding."""
+        self.session.remove_listener("Runtime.bindingCalled", self.on_binding)
+        if self.started:
+            self.session.send_command(self.stop_command())
+            self.session.send_command({"method": "Runtime.removeBinding", "params": {"name": self.name}})
+            self.started = False
+
+
+class AsyncWatch(Watch):
+    """asyncio counterpart of `Watch`, iterated with `async for`."""
+
+    def make_queue(self):
+        return asyncio.Queue()
+
+    async def start(self):
+        self.session.add_listener("Runtime.bindingCalled", self.on_binding)
+        await self.session.execute_command(cdp_obj={"method": "Runtime.addBinding", "params": {"name": self.name}})
+        self.check_installed(await self.session.execute_command(cdp_obj=self.install_command()))
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    async def get(self, timeout: float = None) -> dict:
+        if not self.started:
+            await self.start()
+        try:
+            return self.apply(await asyncio.wait_for(self.changes.get(), timeout))
+        except asyncio.TimeoutError:
+            raise TimeoutError("Nothing changed for {} seconds".format(timeout))
+
+    def __iter__(self):
+        raise TypeError("AsyncWatch is iterated with `async for`")
+
+    async def __aiter__(self):
+        while True:
+            yield await self.get()
@@ -10,8 +10,8 @@ setup(
     long_description_content_type="text/markdown",
     author="Mohammad Hassan",
     description="Navium is a Python-based automation library that leverages Chromium to control browser behavior, execute commands, and interact with web pages via WebSockets.",
-    packages=find_packages(),
-    platforms=["windows"],
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
+    platforms=["windows", "linux"],
     license="MIT",
     keywords=[
         "browser",
@@ -29,6 +29,7 @@ setup(
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
         "Operating System :: Microsoft :: Windows",
+        "Operating System :: POSIX :: Linux",
     ],
     install_requires=[
         'cffi>=1.17.1',
@@ -38,6 +39,8 @@ setup(
     ],
     extras_require={
         'websocket': ['greenlet>=3.1.1', 'zope.event>=5.0', 'zope.interface>=7.0.3'],
+        'async': ['websockets>=12.0'],
+        'fast': ['orjson>=3.9'],
     },
     entry_points={
         "console_scripts": {
@@ -0,0 +1,42 @@
+import threading
+import time
+
+import pytest
+
+from scripts.fake_cdp import FakeCDPServer
+from scripts.runtime import Runtime
+
+
+def wait_for(predicate, timeout: float = 5.0):
+    """Polls `predicate` until it returns something truthy, fails the test after `timeout`."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(0.005)
+    pytest.fail("Condition was not met in time")
+
+
+@pytest.fixture
+def hold():
+    """An event scripted handlers wait on, so their command stays unanswered until the test ends."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+@pytest.fixture
+def server(hold):
+    with FakeCDPServer(responses={"Test.hold": lambda params, session_id, connection: hold.wait(10) and {}}) as server:
+        yield server
+
+
+@pytest.fixture
+def runtime(server, hold):
+    runtime = Runtime(server.ws_url, codec="json")
+    assert runtime.attach_ready.wait(5)
+    yield runtime
+    # The server reads nothing while a command is held, closing frames included.
+    hold.set()
+    runtime.ws.close()
@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("websockets")
+
+from navium.async_browser import AsyncBrowser
+from scripts.async_runtime import AsyncRuntime
+from scripts.events import AsyncEventBus
+
+
+def test_async_runtime_correlates_commands(server):
+    server.responses["Runtime.evaluate"] = lambda params, session_id, connection: {"value": params["n"]}
+
+    async def main():
+        runtime = AsyncRuntime(server.ws_url, codec="json")
+        assert isinstance(runtime.events, AsyncEventBus)
+        await runtime.connect()
+        await asyncio.wait_for(runtime.attach_ready.wait(), 5)
+        results = await asyncio.gather(*(runtime.execute_command({"method": "Runtime.evaluate", "params": {"n": n}}) for n in range(50)))
+        await runtime.close()
+        return results
+
+    assert asyncio.run(main()) == [{"value": n} for n in range(50)]
+
+def test_async_browser_refuses_with():
+    browser = AsyncBrowser.__new__(AsyncBrowser)
+    with pytest.raises(TypeError, match="async with"):
+        with browser:
+            pass
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from scripts.events import EventBus, EventQueue
+from conftest import wait_for
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        EventQueue(policy="drop_everything")
+
+def test_drop_oldest():
+    queue = EventQueue(3, "drop_oldest")
+    for n in range(5):
+        queue.put(n)
+    assert list(queue.items) == [2, 3, 4]
+    assert queue.dropped == 2
+
+def test_drop_newest():
+    queue = EventQueue(3, "drop_newest")
+    for n in range(5):
+        queue.put(n)
+    assert list(queue.items) == [0, 1, 2]
+    assert queue.dropped == 2
+
+def test_block_waits_for_the_consumer():
+    queue = EventQueue(2, "block")
+    queue.put(0)
+    queue.put(1)
+    producer = threading.Thread(target=queue.put, args=(2,))
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive()
+
+    assert queue.get(timeout=1) == 0
+    producer.join(1)
+    assert not producer.is_alive()
+    assert list(queue.items) == [1, 2]
+    assert queue.dropped == 0
+
+def test_close_releases_blocked_producer():
+    queue = EventQueue(1, "block")
+    queue.put(0)
+    producer = threading.Thread(target=queue.put, args=(1,))
+    producer.start()
+    queue.close()
+    producer.join(1)
+    assert not producer.is_alive()
+    assert list(queue.items) == [0]
+
+def test_get_times_out_then_stops_once_closed():
+    queue = EventQueue()
+    with pytest.raises(TimeoutError):
+        queue.get(timeout=0.01)
+    queue.put(1)
+    queue.close()
+    assert list(queue) == [1]
+
+def test_bus_routes_by_method_and_session():
+    bus = EventBus()
+    everything = bus.queue("Page.loadEventFired")
+    one_session = bus.queue("Page.loadEventFired", session_id="A")
+    bus.publish({"method": "Page.loadEventFired", "params": {"n": 1}, "sessionId": "A"})
+    bus.publish({"method": "Page.loadEventFired", "params": {"n": 2}, "sessionId": "B"})
+    bus.publish({"method": "Network.dataReceived", "params": {"n": 3}})
+    bus.close()
+
+    assert list(everything) == [{"n": 1}, {"n": 2}]
+    assert list(one_session) == [{"n": 1}]
+
+def test_callbacks_run_off_the_publishing_thread():
+    bus = EventBus()
+    threads = []
+    bus.subscribe("Page.loadEventFired", lambda params: threads.append(threading.current_thread()))
+    bus.subscribe("Page.loadEventFired", lambda params: 1 / 0)
+    bus.publish({"method": "Page.loadEventFired", "params": {}})
+
+    wait_for(lambda: threads)
+    assert threads == [bus.dispatcher]
+    bus.close()
+    bus.dispatcher.join(1)
+    assert not bus.dispatcher.is_alive()
+
+def test_remove_closes_queue():
+    bus = EventBus()
+    subscription = bus.queue("Page.loadEventFired")
+    assert "Page.loadEventFired" in bus
+    bus.remove(subscription)
+    assert "Page.loadEventFired" not in bus
+    assert subscription.queue.closed
+
+def test_slow_dispatcher_drops_callbacks_by_policy():
+    bus = EventBus(maxsize=2, policy="drop_newest")
+    release = threading.Event()
+    seen = []
+    bus.subscribe("Test.event", lambda params: release.wait(5) and seen.append(params["n"]))
+    for n in range(10):
+        bus.publish({"method": "Test.event", "params": {"n": n}})
+
+    assert bus.pending.dropped >= 7
+    release.set()
+    wait_for(lambda: len(seen) == 10 - bus.pending.dropped)
+    bus.close()
+
+def test_runtime_subscriptions_end_on_disconnect(server, runtime):
+    subscription = runtime.subscribe("Page.loadEventFired", maxsize=10)
+    server.flood("Page.loadEventFired", 3)
+    wait_for(lambda: len(subscription.queue) == 3)
+
+    server.close()
+    assert [params["seq"] for params in subscription] == [0, 1, 2]
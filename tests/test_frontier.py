@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+from navium.crawl import BloomFilter, Frontier
+
+
+def test_deduplicates_normalised_urls():
+    frontier = Frontier(delay=0)
+    assert frontier.add("https://Example.com/a")
+    assert not frontier.add("https://example.com/a")
+    assert frontier.add("https://example.com/a", force=True)
+    assert len(frontier) == 2
+
+def test_higher_priority_first_then_insertion_order():
+    frontier = Frontier(delay=0, host_concurrency=10)
+    frontier.add("https://a.com/low", priority=0)
+    frontier.add("https://a.com/high", priority=5)
+    frontier.add("https://a.com/low2", priority=0)
+    urls = [frontier.get(timeout=1).url for _ in range(3)]
+    assert [url.rsplit("/", 1)[1] for url in urls] == ["high", "low", "low2"]
+
+def test_host_concurrency():
+    frontier = Frontier(delay=0, host_concurrency=1)
+    frontier.add("https://a.com/1")
+    frontier.add("https://a.com/2")
+    frontier.add("https://b.com/1")
+
+    first = frontier.get(timeout=1)
+    second = frontier.get(timeout=1)
+    assert {first.host, second.host} == {"a.com", "b.com"}
+    with pytest.raises(TimeoutError):
+        frontier.get(timeout=0.05)
+
+    frontier.done(first if first.host == "a.com" else second)
+    assert frontier.get(timeout=1).url == "https://a.com/2"
+
+def test_host_delay():
+    frontier = Frontier(delay=0.2, host_concurrency=5)
+    frontier.add("https://a.com/1")
+    frontier.add("https://a.com/2")
+
+    started = time.monotonic()
+    frontier.get(timeout=1)
+    frontier.get(timeout=1)
+    assert time.monotonic() - started >= 0.18
+
+def test_get_returns_none_when_exhausted_or_closed():
+    frontier = Frontier(delay=0)
+    assert frontier.get(timeout=1) is None
+
+    frontier.add("https://a.com/")
+    entry = frontier.get(timeout=1)
+    frontier.close()
+    assert frontier.get() is None
+    frontier.done(entry)
+
+def test_retry_requeues_after_delay():
+    frontier = Frontier(delay=0)
+    frontier.add("https://a.com/")
+    entry = frontier.get(timeout=1)
+    frontier.retry(entry, 0.1)
+    frontier.done(entry)
+
+    started = time.monotonic()
+    again = frontier.get(timeout=1)
+    assert again is entry
+    assert again.attempts == 1
+    assert time.monotonic() - started >= 0.09
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "frontier.json")
+    frontier = Frontier(delay=0)
+    frontier.add("https://a.com/1", priority=1, depth=2)
+    frontier.add("https://a.com/2")
+    in_flight = frontier.get(timeout=1)
+    frontier.save(path)
+
+    restored = Frontier.load(path, delay=0)
+    assert len(restored) == 2
+    assert not restored.add("https://a.com/1")
+    entries = sorted((restored.get(timeout=1) for _ in range(2)), key=lambda entry: entry.url)
+    assert [entry.to_list() for entry in entries] == [["https://a.com/1", 1, 2, 0], ["https://a.com/2", 0, 0, 0]]
+    assert in_flight.url == "https://a.com/1"
+
+def test_bloom_filter_round_trip():
+    seen = BloomFilter(capacity=1000, error_rate=0.001)
+    assert seen.add("https://a.com/")
+    assert not seen.add("https://a.com/")
+    restored = BloomFilter.from_dict(seen.to_dict())
+    assert "https://a.com/" in restored
+    assert "https://b.com/" not in restored
@@ -0,0 +1,32 @@
+from scripts.metrics import Histogram, Instrumentation
+from scripts.runtime import Runtime
+from conftest import wait_for
+
+
+def test_histogram_summary():
+    histogram = Histogram()
+    for value in (0.05, 3, 7, 40):
+        histogram.record(value)
+    summary = histogram.summary()
+    assert summary["count"] == 4
+    assert summary["min_ms"] == 0.05 and summary["max_ms"] == 40
+    assert summary["p50_ms"] == 5
+    assert summary["p99_ms"] == 40
+
+def test_snapshot_sums_over_every_runtime(server, hold):
+    metrics = Instrumentation()
+    first = Runtime(server.ws_url, instrumentation=metrics)
+    second = Runtime(server.ws_url, instrumentation=metrics)
+    assert first.attach_ready.wait(5) and second.attach_ready.wait(5)
+
+    first.main.send_command({"method": "Test.hold"})
+    second.main.send_command({"method": "Test.hold"})
+    wait_for(lambda: metrics.snapshot()["in_flight"] == 2)
+    assert metrics.snapshot()["commands"]["Target.attachToTarget"]["count"] == 2
+
+    hold.set()
+    first.ws.close()
+    wait_for(lambda: first not in metrics.runtimes)
+    wait_for(lambda: metrics.snapshot()["in_flight"] == 0)
+    assert metrics.runtimes == {second}
+    second.ws.close()
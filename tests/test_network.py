@@ -0,0 +1,109 @@
+import base64
+
+import pytest
+
+from scripts.network import Router, Rule, compile_pattern
+from conftest import wait_for
+
+
+@pytest.fixture
+def calls(server):
+    """Records the `Fetch` commands the router answers paused requests with."""
+    calls = []
+    for method in ("Fetch.continueRequest", "Fetch.fulfillRequest", "Fetch.failRequest"):
+        server.responses[method] = lambda params, session_id, connection, method=method: calls.append((method, params)) or {}
+    return calls
+
+@pytest.fixture
+def router(runtime):
+    session = runtime.new_session()
+    router = Router(session)
+    yield router
+    router.close()
+
+def pause(server, router, request_id, url, resource_type="Document"):
+    server.emit("Fetch.requestPaused", {
+        "requestId": request_id,
+        "request": {"url": url, "method": "GET", "headers": {}},
+        "resourceType": resource_type
+    }, router.session.session_id)
+
+
+def test_compile_pattern():
+    assert compile_pattern("*.example.com/*").fullmatch("https://cdn.example.com/app.js")
+    assert compile_pattern("https://a.com/?").fullmatch("https://a.com/x")
+    assert not compile_pattern("https://a.com/?").fullmatch("https://a.com/xy")
+    assert compile_pattern(r"https://a.com/\*").fullmatch("https://a.com/*")
+    assert not compile_pattern(r"https://a.com/\*").fullmatch("https://a.com/x")
+
+def test_rule_patterns_per_resource_type():
+    rule = Rule("*ads*", ["image", "Font"])
+    assert rule.patterns() == [
+        {"urlPattern": "*ads*", "resourceType": "Font", "requestStage": "Request"},
+        {"urlPattern": "*ads*", "resourceType": "Image", "requestStage": "Request"}
+    ]
+    with pytest.raises(ValueError):
+        Rule("*", ["picture"])
+
+def test_command_follows_rules(router):
+    assert router.command() == {"method": "Fetch.disable"}
+    router.add(Rule("*.png"))
+    router.add(Rule("*/api/*", handler=lambda route: None))
+    assert [pattern["urlPattern"] for pattern in router.command()["params"]["patterns"]] == ["*.png", "*/api/*"]
+    router.remove("*.png")
+    assert [pattern["urlPattern"] for pattern in router.command()["params"]["patterns"]] == ["*/api/*"]
+
+def test_blocked_requests_are_aborted(server, router, calls):
+    router.add(Rule("*.png", ["image"]))
+    pause(server, router, "1", "https://example.com/logo.png", "Image")
+    pause(server, router, "2", "https://example.com/logo.png", "Document")
+
+    wait_for(lambda: len(calls) == 2)
+    assert sorted(calls) == [
+        ("Fetch.continueRequest", {"requestId": "2"}),
+        ("Fetch.failRequest", {"errorReason": "BlockedByClient", "requestId": "1"})
+    ]
+
+def test_handlers_fulfill_requests(server, router, calls):
+    router.add(Rule("*/api/*", handler=lambda route: route.fulfill(201, {"X-Test": "1"}, "{}")))
+    pause(server, router, "1", "https://example.com/api/config")
+
+    wait_for(lambda: calls)
+    method, params = calls[0]
+    assert method == "Fetch.fulfillRequest"
+    assert params["responseCode"] == 201
+    assert params["responseHeaders"] == [{"name": "X-Test", "value": "1"}]
+    assert base64.b64decode(params["body"]) == b"{}"
+
+def test_failing_handler_lets_request_through(server, router, calls):
+    def handler(route):
+        raise RuntimeError("broken handler")
+
+    router.add(Rule("*", handler=handler))
+    pause(server, router, "1", "https://example.com/")
+    wait_for(lambda: calls)
+    assert calls == [("Fetch.continueRequest", {"requestId": "1"})]
+
+def test_route_resolves_once(server, router, calls):
+    def handler(route):
+        route.abort()
+        route.fulfill()
+
+    router.add(Rule("*", handler=handler))
+    pause(server, router, "1", "https://example.com/")
+    wait_for(lambda: calls)
+    assert calls == [("Fetch.failRequest", {"errorReason": "BlockedByClient", "requestId": "1"})]
+
+def test_close_stops_intercepting(runtime, router):
+    assert runtime.wants("Fetch.requestPaused")
+    router.close()
+    assert router.closed
+    assert "Fetch.requestPaused" not in router.session.listeners
+    assert not runtime.wants("Fetch.requestPaused")
+
+def test_detach_closes_router(runtime, router):
+    session = router.session
+    session.router = router
+    runtime.close_session(session)
+    assert router.closed
+    assert session.router is None
@@ -0,0 +1,22 @@
+import pytest
+
+from scripts.element import ElementHandle
+from scripts.page import PageCommands
+
+
+def test_function_command_without_context(runtime):
+    page = PageCommands(runtime, None)
+    command = page.function_command("(a, b) => a + b", (1, "x"), True, False)
+    assert command["method"] == "Runtime.evaluate"
+    assert command["params"]["expression"] == '((a, b) => a + b)(...[1, "x"])'
+
+    with pytest.raises(ValueError, match="execution context"):
+        page.function_command("(el) => el.click()", (ElementHandle(page, "1.2.3"),), False, False)
+
+def test_function_command_with_context(runtime):
+    page = PageCommands(runtime, None)
+    runtime.main.contexts[runtime.main.target_id] = 7
+    command = page.function_command("(el, n) => n", (ElementHandle(page, "1.2.3"), 2), True, False)
+    assert command["method"] == "Runtime.callFunctionOn"
+    assert command["params"]["executionContextId"] == 7
+    assert command["params"]["arguments"] == [{"objectId": "1.2.3"}, {"value": 2}]
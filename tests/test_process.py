@@ -0,0 +1,47 @@
+import os
+import socket
+import subprocess
+import sys
+
+from scripts import process
+from scripts.process import OWNER_FILE, boot_id, pid_alive, read_owner, sweep_stale_profiles, write_owner
+
+
+def profile(root, name: str, owner: str = None):
+    path = root / f"navium_{name}"
+    path.mkdir()
+    if owner is not None:
+        (path / OWNER_FILE).write_text(owner)
+    return path
+
+def dead_pid() -> int:
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    return child.pid
+
+
+def test_owner_round_trip(tmp_path):
+    write_owner(str(tmp_path), 42)
+    assert read_owner(str(tmp_path)) == (os.getpid(), 42, socket.gethostname(), boot_id())
+
+def test_sweeps_only_this_hosts_stale_profiles(tmp_path):
+    host, boot = socket.gethostname(), boot_id()
+    live = profile(tmp_path, "live", f"{os.getpid()} 0 {host} {boot}")
+    dead = profile(tmp_path, "dead", f"{dead_pid()} 0 {host} {boot}")
+    rebooted = profile(tmp_path, "rebooted", f"{os.getpid()} 0 {host} previous-boot")
+    foreign = profile(tmp_path, "foreign", f"{dead_pid()} 0 {host}.elsewhere {boot}")
+    legacy = profile(tmp_path, "legacy", f"{dead_pid()} 0")
+
+    removed = sweep_stale_profiles(str(tmp_path))
+    assert sorted(removed) == sorted([str(dead), str(rebooted)])
+    assert live.exists() and foreign.exists() and legacy.exists()
+
+    os.utime(legacy, (0, 0))
+    assert sweep_stale_profiles(str(tmp_path)) == [str(legacy)]
+
+def test_windows_pid_alive_matches_whole_pid(monkeypatch):
+    output = '"chrome.exe","123","Console","1","120,000 K"\n'
+    monkeypatch.setattr(process.os, "name", "nt")
+    monkeypatch.setattr(process.subprocess, "run", lambda *args, **kwargs: subprocess.CompletedProcess(args, 0, output, ""))
+    assert pid_alive(123)
+    assert not pid_alive(12)
@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+from scripts.exceptions import ProtocolError
+from scripts.fake_cdp import FakeCDPServer, FakeError
+from scripts.runtime import Runtime
+from conftest import wait_for
+
+
+def echo(params, session_id, connection):
+    return {"result": {"type": "number", "value": params["n"]}}
+
+def test_responses_resolve_their_own_command():
+    with FakeCDPServer(responses={"Runtime.evaluate": echo}, latency=0.001) as server:
+        runtime = Runtime(server.ws_url, codec="json")
+        results = {}
+
+        def run(start):
+            for n in range(start, start + 50):
+                results[n] = runtime.execute_command({"method": "Runtime.evaluate", "params": {"n": n}})
+
+        threads = [threading.Thread(target=run, args=(start,)) for start in range(0, 400, 50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == {n: {"result": {"type": "number", "value": n}} for n in range(400)}
+        assert runtime.pending == {}
+        runtime.ws.close()
+
+def test_error_response_raises_protocol_error():
+    def fail(params, session_id, connection):
+        raise FakeError("Cannot find context", code=-32000)
+
+    with FakeCDPServer(responses={"Runtime.evaluate": fail}) as server:
+        runtime = Runtime(server.ws_url, codec="json")
+        with pytest.raises(ProtocolError) as info:
+            runtime.execute_command({"method": "Runtime.evaluate"})
+        assert info.value.code == -32000
+        assert "Cannot find context" in str(info.value)
+        runtime.ws.close()
+
+def test_timed_out_command_is_forgotten(runtime):
+    with pytest.raises(TimeoutError):
+        runtime.execute_command({"method": "Test.hold"}, timeout=0.1)
+    assert runtime.pending == {}
+
+def test_disconnect_cancels_pending_commands(server, runtime):
+    future = runtime.main.send_command({"method": "Test.hold"})
+    wait_for(lambda: server.commands["Test.hold"])
+
+    server.close()
+    with pytest.raises(CancelledError):
+        future.result(timeout=5)
+    assert runtime.pending == {}
+
+def test_new_session_attaches_and_routes_by_session_id(server, runtime):
+    session = runtime.new_session("https://example.com/")
+    assert session.session_id is not None
+    assert runtime.sessions[session.session_id] is session
+    assert runtime.targets[session.target_id] is session
+
+    session.goto("https://example.com/next", wait_until="load")
+    assert session.frames[session.target_id].url == "https://example.com/next"
+    assert "https://example.com" in runtime.origins
+    assert not runtime.main.frames
+
+def test_close_session_detaches(server, runtime):
+    session = runtime.new_session()
+    runtime.close_session(session)
+    assert session.session_id not in runtime.sessions
+    assert session.target_id not in runtime.targets
+    assert session.target_id not in server.targets
+
+def test_detached_session_cancels_its_commands(server, runtime):
+    session = runtime.new_session()
+    future = session.send_command({"method": "Test.hold"})
+    other = runtime.main.send_command({"method": "Test.hold"})
+    wait_for(lambda: future.command_id in runtime.pending)
+
+    server.emit("Target.detachedFromTarget", {"sessionId": session.session_id, "targetId": session.target_id})
+    with pytest.raises(CancelledError):
+        future.result(timeout=5)
+    wait_for(lambda: session.session_id not in runtime.sessions)
+    assert not other.done()
+
+def test_unwanted_events_are_not_decoded(server, runtime):
+    received = []
+    runtime.on("Network.responseReceived", received.append)
+    server.flood("Network.dataReceived", 200)
+    server.flood("Network.responseReceived", 5)
+
+    wait_for(lambda: len(received) == 5)
+    assert runtime.skipped >= 200
+    assert [params["seq"] for params in received] == list(range(5))
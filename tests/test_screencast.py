@@ -0,0 +1,48 @@
+import base64
+import threading
+from types import SimpleNamespace
+
+from scripts.screencast import Screencast
+from conftest import wait_for
+
+
+def frame(server, session, n: int):
+    server.emit("Page.screencastFrame", {
+        "data": base64.b64encode(b"frame %d" % n).decode(),
+        "metadata": {"n": n},
+        "sessionId": n
+    }, session.session_id)
+
+
+def test_frames_are_acknowledged_while_there_is_room(server, runtime):
+    session = runtime.new_session()
+    screencast = Screencast(SimpleNamespace(session=session), buffer_size=2).start()
+    frame(server, session, 1)
+    frame(server, session, 2)
+
+    wait_for(lambda: screencast.unacked == 2)
+    assert server.commands["Page.screencastFrameAck"] == 1
+    assert next(screencast).data == b"frame 1"
+    wait_for(lambda: server.commands["Page.screencastFrameAck"] == 2)
+
+    screencast.stop()
+    assert [f.metadata["n"] for f in screencast] == [2]
+    assert "Page.screencastFrame" not in session.listeners
+
+def test_detach_ends_iteration(server, runtime):
+    session = runtime.new_session()
+    screencast = Screencast(SimpleNamespace(session=session)).start()
+    frames = []
+    consumer = threading.Thread(target=lambda: frames.extend(f.metadata["n"] for f in screencast))
+    consumer.start()
+    frame(server, session, 1)
+    wait_for(lambda: frames)
+
+    server.emit("Target.detachedFromTarget", {"sessionId": session.session_id, "targetId": session.target_id})
+    consumer.join(5)
+    assert not consumer.is_alive()
+    assert frames == [1]
+    assert session.detach_callbacks == []
+
+    screencast.stop()
+    assert server.commands["Page.stopScreencast"] == 0